@@ -6,16 +6,1784 @@ Dev wiki to the Git repo.
 """
 
 __author__ = "Andrew Eissen"
-__version__ = "1.0"
+__version__ = "1.2"
 
+import argparse
+import concurrent
 import configparser
+import contextlib
+import hashlib
+import itertools
 import json
-import requests
+import os
+import re
+import shlex
 import sys
+import time
+import urllib.parse
 
-import dev.api as api
 import dev.util as util
 
+# Modules needed by some actions alone are only loaded once first used
+util.lazy_import("concurrent.futures")
+difflib = util.lazy_import("difflib")
+requests = util.lazy_import("requests")
+api = util.lazy_import("dev.api")
+build = util.lazy_import("dev.build")
+cache = util.lazy_import("dev.cache")
+history = util.lazy_import("dev.history")
+index = util.lazy_import("dev.index")
+journal = util.lazy_import("dev.journal")
+message = util.lazy_import("dev.message")
+mirror = util.lazy_import("dev.mirror")
+replace = util.lazy_import("dev.replace")
+trace = util.lazy_import("dev.trace")
+watch = util.lazy_import("dev.watch")
+
+# Actions supported by the script
+ACTIONS = ("batch", "diff", "find", "history", "message", "mirror", "pull",
+    "push", "replace", "watch")
+
+# Actions that may be listed in the file read by ``batch``
+BATCH_ACTIONS = ("pull", "push")
+
+# Default location of the manifest mapping local files to wiki pages
+MANIFEST_FILE = "manifest.json"
+
+# Directory housing local, untracked state such as saved sessions
+LOCAL_DIR = os.path.join("dev", "local")
+
+# Record of the revision of each wiki page as of its last sync
+SYNC_STATE_FILE = os.path.join(LOCAL_DIR, "state.json")
+
+# Directory of the cache of fetched page content
+CACHE_DIR = os.path.join(LOCAL_DIR, "cache")
+
+# Directory of the journals recording the progress of bulk runs
+JOURNAL_DIR = os.path.join(LOCAL_DIR, "journals")
+
+# Directory of the trigram indices of the cached pages of each wiki
+INDEX_DIR = os.path.join(LOCAL_DIR, "index")
+
+# Directory of the minified files pushed in place of their sources
+BUILD_DIR = os.path.join(LOCAL_DIR, "build")
+
+# Directory of the stored revision histories of individual pages
+HISTORY_DIR = os.path.join(LOCAL_DIR, "history")
+
+# Directory of the records of the pages mirrored by ``mirror``
+MIRROR_DIR = os.path.join(LOCAL_DIR, "mirror")
+
+# Default directory to which ``mirror`` writes pages
+MIRROR_OUTPUT_DIR = "mirror"
+
+# Default number of wikis pushed to at once by ``push --wikis``
+MAX_CONCURRENT_WIKIS = 8
+
+# Default number of processes among which ``replace`` divides large batches
+MAX_REPLACE_PROCESSES = os.cpu_count() or 1
+
+
+def build_argument_parser():
+    """
+    The ``build_argument_parser`` function assembles the command line interface
+    of the script. Both the ``push`` and ``pull`` actions accept an optional
+    wiki page URL and local file path; if these are omitted, the files listed in
+    the manifest are synced instead, and if no manifest is present either, the
+    user is prompted for the missing values as before. ``push`` may also deploy
+    the same pages to several wikis at once by means of ``--wikis``, and may
+    minify JavaScript and JSON files on the way by means of ``--minify``. The
+    ``diff`` and ``watch`` actions take the same arguments, the former showing
+    what a push would change and the latter pushing files as they are saved.
+    The ``replace`` action finds and replaces text on a list of wiki pages in
+    the manner of the JavaScript application's find-and-replace scene, and the
+    ``message`` action messages a list of users in the manner of its messaging
+    scene. The ``history`` action imports the revision history of a page into a
+    local store from which any revision may be recovered, and the ``mirror``
+    action keeps a local copy of every page under one or more prefixes. Lastly,
+    the ``batch`` action runs a list of pushes and pulls in a single process,
+    logging into each wiki only once.
+        :return: An ``argparse.ArgumentParser`` for the script's arguments
+    """
+
+    parser = argparse.ArgumentParser(prog="dev.py", description=__doc__)
+    subparsers = parser.add_subparsers(dest="action")
+
+    for action in ("diff", "pull", "push", "watch"):
+        subparser = subparsers.add_parser(action)
+        subparser.add_argument("mwurl", nargs="?",
+            help="URL of the Fandom MediaWiki file")
+        subparser.add_argument("local_path", nargs="?",
+            help="path to the target file in the local repository")
+        subparser.add_argument("--manifest",
+            help=f"manifest of files to sync (default: {MANIFEST_FILE})")
+
+        if action == "push":
+            subparser.add_argument("--wikis", type=parse_wikis,
+                help="comma-separated wikis to push to instead, i.e. a,b,c")
+            subparser.add_argument("--jobs", type=int,
+                default=MAX_CONCURRENT_WIKIS,
+                help="number of wikis to push to at once (default: "
+                     f"{MAX_CONCURRENT_WIKIS})")
+            subparser.add_argument("--minify", action="store_true",
+                help="strip comments and whitespace from JS and JSON files "
+                     "before pushing them")
+            subparser.add_argument("--prune-i18n", action="store_true",
+                help="with --minify, also drop message documentation and "
+                     "messages missing from the _metadata of i18n files")
+        elif action == "diff":
+            subparser.add_argument("--refresh", action="store_true",
+                help="compare with the wiki's latest revisions instead, "
+                     "fetched without logging in")
+        elif action == "watch":
+            subparser.add_argument("--debounce", type=float,
+                default=watch.DEBOUNCE,
+                help="seconds to wait for further saves before pushing "
+                     f"(default: {watch.DEBOUNCE})")
+
+    for action in ("find", "replace"):
+        verb = ("search", "replace on")[action == "replace"]
+        subparser = subparsers.add_parser(action)
+        subparser.add_argument("mwurl", help="URL of the Fandom wiki")
+        subparser.add_argument("target", help="text or regex to be " +
+            ("replaced" if action == "replace" else "searched for"))
+        if action == "replace":
+            subparser.add_argument("replacement", help="text to be inserted")
+        sources = subparser.add_mutually_exclusive_group()
+        sources.add_argument("--pages",
+            help="file listing one page per line (default: " +
+                 ("standard input)" if action == "replace" else
+                  "every cached page of the wiki)"))
+        sources.add_argument("--category", dest="categories",
+            help=f"{verb} the members of a category, i.e. Category:Foo")
+        sources.add_argument("--namespace", dest="namespaces", type=int,
+            help=f"{verb} the pages in a namespace, i.e. 10")
+        sources.add_argument("--template", dest="templates",
+            help=f"{verb} the pages transcluding a template, i.e. "
+                 "Template:Foo")
+        subparser.add_argument("--regex", action="store_true",
+            help="treat the target as a regex")
+        subparser.add_argument("--case-insensitive", action="store_true",
+            help="match the target regardless of case")
+
+    subparser = subparsers.choices["replace"]
+    subparser.add_argument("--indices", type=parse_indices,
+        help="comma-separated occurrences to replace, i.e. 1,3 (default: all)")
+    subparser.add_argument("--summary", default="", help="edit summary")
+    subparser.add_argument("--resume", action="store_true",
+        help="continue an interrupted run with the same arguments where it "
+             "stopped")
+    subparser.add_argument("--jobs", type=int, default=MAX_REPLACE_PROCESSES,
+        help="number of processes among which large batches of pages are "
+             f"divided (default: {MAX_REPLACE_PROCESSES})")
+
+    subparser = subparsers.add_parser("message")
+    subparser.add_argument("mwurl", help="URL of the Fandom wiki")
+    subparser.add_argument("subject", help="title of the message")
+    subparser.add_argument("body", help="file holding the wikitext of the "
+        "message")
+    subparser.add_argument("--users",
+        help="file listing one user per line (default: standard input)")
+    subparser.add_argument("--resume", action="store_true",
+        help="continue an interrupted run with the same arguments where it "
+             "stopped")
+
+    subparser = subparsers.add_parser("history")
+    subparser.add_argument("mwurl", help="URL of the Fandom MediaWiki page")
+    subparser.add_argument("--revision", type=int,
+        help="ID of a revision whose content is to be written out")
+    subparser.add_argument("--output",
+        help="file to which --revision is written (default: standard output)")
+    subparser.add_argument("--list", action="store_true",
+        help="list the ID, time, user and summary of each revision")
+
+    subparser = subparsers.add_parser("mirror")
+    subparser.add_argument("mwurl", help="URL of the Fandom wiki")
+    subparser.add_argument("--prefix", dest="prefixes", action="append",
+        required=True,
+        help="beginning of the titles of the pages to mirror, i.e. "
+             "MediaWiki:MassEdit/ (repeatable)")
+    subparser.add_argument("--directory", default=MIRROR_OUTPUT_DIR,
+        help="directory to which pages are written (default: "
+             f"{MIRROR_OUTPUT_DIR})")
+    subparser.add_argument("--interval", type=float, default=0,
+        help="seconds between checks for changes until interrupted "
+             "(default: check once)")
+
+    subparser = subparsers.add_parser("batch")
+    subparser.add_argument("batch_file", nargs="?",
+        help="file listing one push or pull command per line, i.e. push "
+             "https://dev.fandom.com/wiki/MediaWiki:Foo.js src/foo.js "
+             "(default: standard input)")
+
+    for subparser in subparsers.choices.values():
+        subparser.add_argument("--trace", metavar="FILE",
+            help="record every API call to FILE, as a Chrome trace if it ends "
+                 "in .json or as JSON lines otherwise, and summarize them")
+
+    return parser
+
+
+def build_files(files, local_file_hashes, lang, prune_i18n=False):
+    """
+    The ``build_files`` function passes the local files to be pushed through
+    the transform stage of ``build.build_file``, reporting the size of each
+    output relative to its source. The hash of each output replaces that of its
+    source in ``local_file_hashes``, so that the pushed output is what is
+    compared against the wiki's copy. Files built by an earlier run from the
+    same content are reused rather than built again.
+        :param files: A dictionary mapping local file paths to page names
+        :param local_file_hashes: A dictionary mapping local file paths to
+            the SHA-1 hashes of their present contents, updated in place
+        :param lang: A dictionary of i18n console messages
+        :param prune_i18n: An optional boolean indicating whether to drop
+            unused messages from i18n files
+        :return: A dictionary mapping the local file paths of built files to
+            the paths of their outputs, or ``None`` if a file failed to build
+    """
+    built_paths = {}
+
+    for local_path in files:
+        try:
+            # May throw IOError, UnicodeDecodeError, or ValueError
+            built = build.build_file(local_path, BUILD_DIR, prune_i18n)
+        except (IOError, UnicodeDecodeError, ValueError):
+            log_sync_msg(lang["e_build"], local_path, text_io=sys.stderr)
+            return None
+
+        if built is None:
+            continue
+
+        built_paths[local_path], is_cached = built
+        local_file_hashes[local_path] = api.get_file_sha1(built[0])
+
+        source_size = os.path.getsize(local_path)
+        built_size = os.path.getsize(built[0])
+        log_sync_msg(lang["s_build_cached" if is_cached else "s_build"],
+            local_path, f"{source_size} -> {built_size} bytes, "
+            f"{built_size / (source_size or 1):.0%}")
+
+    return built_paths
+
+
+def configure_edit_rate(client, edit_rates=None):
+    """
+    The ``configure_edit_rate`` function throttles a client's edits to the rate
+    permitted to the user. Should the user's rate limits be unobtainable, edits
+    proceed unthrottled, relying on the scheduler's backoff should the wiki
+    respond with ``ratelimited``.
+        :param client: The logged-in ``ApiClient`` of the wiki
+        :param edit_rates: An optional dictionary of edit rates by user group
+        :return: None
+    """
+    try:
+        client.configure_edit_rate(edit_rates)
+    except (requests.exceptions.RequestException, json.decoder.JSONDecodeError,
+            AssertionError, KeyError):
+        pass
+
+
+def diff_wiki(mwurl, files, local_file_hashes, sync_state, lang, refresh=False,
+        page_cache=None, tracer=None):
+    """
+    The ``diff_wiki`` function prints a unified diff of each local file against
+    the revision of its page last synced, showing what a push would change. The
+    base revisions are read from the page cache, so no network access is needed;
+    files whose hash matches that of their base are reported as unchanged
+    without being read at all. With ``refresh``, the pages' latest revisions are
+    fetched anonymously in batches instead, and the files are compared with
+    those. The record of synced revisions is left untouched either way, so that
+    a subsequent push still detects intervening edits.
+        :param mwurl: A link to the wiki or a page on the wiki
+        :param files: A dictionary mapping local file paths to page names
+        :param local_file_hashes: A dictionary mapping local file paths to
+            the SHA-1 hashes of their present contents
+        :param sync_state: A dictionary of the synced revisions of each wiki
+        :param lang: A dictionary of i18n console messages
+        :param refresh: An optional boolean indicating whether to compare with
+            the latest revisions on the wiki rather than those last synced
+        :param page_cache: An optional ``cache.PageCache`` of page content
+        :param tracer: An optional ``trace.Tracer`` recording every API call
+        :return: A status boolean indicating whether all files were compared
+    """
+
+    api_php = util.build_api_php_url(mwurl)
+
+    # Revisions against which the local files are compared
+    base_revisions = sync_state[api_php]
+
+    if refresh:
+        # Pooled session, instrumented if the run is being traced
+        session = api.build_session()
+        if tracer is not None:
+            tracer.attach(session)
+
+        with api.ApiClient(api_php, session, page_cache) as client:
+            try:
+                # Grab content of the latest revisions in batches of 50
+                base_revisions = client.get_latest_revisions(files.values(),
+                    content=True)
+            except (requests.exceptions.HTTPError,
+                    json.decoder.JSONDecodeError):
+                util.log_msg(lang["e_get_content_api"], sys.stderr)
+                return False
+            except (AssertionError, KeyError):
+                util.log_msg(lang["e_get_content"], sys.stderr)
+                return False
+
+    # Flag to keep track of files that could not be compared
+    has_failures = False
+
+    for local_path, mediawiki_file_name in files.items():
+        base_revision = base_revisions.get(mediawiki_file_name, {})
+
+        # Skip reading files whose content is known to match their base
+        if base_revision.get("sha1") == local_file_hashes[local_path]:
+            log_sync_msg(lang["s_unchanged"], local_path)
+            continue
+
+        base_content = base_revision.get("content")
+        if base_content is None and page_cache is not None and\
+                "revid" in base_revision:
+            base_content = page_cache.get(api_php, mediawiki_file_name,
+                base_revision["revid"])
+
+        if base_content is None:
+            log_sync_msg(lang["e_diff_base"], local_path, text_io=sys.stderr)
+            has_failures = True
+            continue
+
+        try:
+            local_content = util.get_file_contents(local_path)
+        except (FileNotFoundError, UnicodeDecodeError):
+            log_sync_msg(lang["e_local_path"], local_path, text_io=sys.stderr)
+            has_failures = True
+            continue
+
+        # Trailing whitespace is stripped by MediaWiki and so never differs
+        util.log_msg("\n".join(difflib.unified_diff(
+            base_content.rstrip().splitlines(),
+            local_content.rstrip().splitlines(), mediawiki_file_name,
+            local_path, f"revision {base_revision['revid']}", lineterm="")))
+
+    return not has_failures
+
+
+def find_wiki(mwurl, regexp, lang, members=None, pages=None, page_cache=None,
+        tracer=None):
+    """
+    The ``find_wiki`` function lists the pages of a wiki whose content matches
+    a regex, in the manner of the JavaScript application's find scene, printing
+    the name of each matching page on a line of its own so that the list may be
+    passed to ``replace --pages``. Rather than scanning every page, the search
+    consults a trigram index of the cached pages, which is brought up to date
+    with any pages cached since it was last used, and confirms matches on the
+    candidate pages alone. Searches are made offline against the pages as last
+    fetched unless ``members`` is passed, in which case the members are first
+    enumerated anonymously and any changed since they were cached are fetched.
+        :param mwurl: A link to the wiki or a page on the wiki
+        :param regexp: A compiled ``re.Pattern``, as returned by
+            ``replace.build_regexp``
+        :param lang: A dictionary of i18n console messages
+        :param members: An optional tuple of a key of ``api.MEMBER_LISTS`` and
+            the category, namespace or template to whose members the search is
+            confined
+        :param pages: An optional list of page names to which the search is
+            confined, ignored if ``members`` is passed
+        :param page_cache: An optional ``cache.PageCache`` of page content
+        :param tracer: An optional ``trace.Tracer`` recording every API call
+        :return: A status boolean indicating whether the search was made
+    """
+    api_php = util.build_api_php_url(mwurl)
+
+    if page_cache is None:
+        util.log_msg(lang["e_find_cache"], sys.stderr)
+        return False
+
+    if members:
+        # Pooled session, instrumented if the run is being traced
+        session = api.build_session()
+        if tracer is not None:
+            tracer.attach(session)
+
+        with api.ApiClient(api_php, session, page_cache) as client:
+            try:
+                # Only members changed since they were cached are downloaded
+                pages = [page for page, _ in client.get_member_revisions(
+                    *members, content=True)]
+            except (requests.exceptions.HTTPError,
+                    json.decoder.JSONDecodeError):
+                util.log_msg(lang["e_get_content_api"], sys.stderr)
+                return False
+            except (AssertionError, KeyError):
+                util.log_msg(lang["e_get_content"], sys.stderr)
+                return False
+
+    # Most recent cached revision of each page, as of the page's last fetch
+    revisions = page_cache.get_cached_revisions(api_php)
+    if not revisions:
+        util.log_msg(lang["e_find_cache"], sys.stderr)
+        return False
+
+    def get_content(page):
+        return page_cache.get(api_php, page, revisions[page]["revid"])
+
+    # Index any pages cached since the index was last brought up to date
+    search_index = index.TrigramIndex(get_index_file(api_php))
+    indexed = search_index.update({page: revision["sha1"]
+        for page, revision in revisions.items()}, get_content)
+
+    matches = search_index.search(regexp, get_content, pages)
+    for page in matches:
+        util.log_msg(page)
+
+    # Status goes to standard error so that the list of pages may be piped
+    log_sync_msg(lang["s_find"], f"{len(matches)} of "
+        f"{len(pages) if pages is not None else len(revisions)} pages",
+        text_io=sys.stderr)
+
+    if indexed:
+        try:
+            search_index.save()
+        except OSError:
+            util.log_msg(lang["e_index"], sys.stderr)
+
+    return True
+
+
+def get_history_file(api_php, page):
+    """
+    The ``get_history_file`` function returns the location of the store of a
+    page's revision history. Stores are named for a hash of the page name, as
+    page names may contain characters that file names may not.
+        :param api_php: The full URL pointing to the wiki's `api.php` resource
+        :param page: A string representing the name of the page
+        :return: A string path to the page's store, without extension
+    """
+    netloc = urllib.parse.urlparse(api_php).netloc
+    digest = hashlib.sha1(page.encode("UTF-8")).hexdigest()
+    return os.path.join(HISTORY_DIR, netloc, digest[:16])
+
+
+def get_index_file(api_php):
+    """
+    The ``get_index_file`` function returns the location of the trigram index
+    of a wiki's cached pages.
+        :param api_php: The full URL pointing to the wiki's `api.php` resource
+        :return: A string path to the wiki's index
+    """
+    netloc = urllib.parse.urlparse(api_php).netloc
+    return os.path.join(INDEX_DIR, f"{netloc}.pickle")
+
+
+def get_journal_file(api_php, job):
+    """
+    The ``get_journal_file`` function returns the location of the journal of a
+    bulk run. Journals are keyed by wiki and by a hash of everything defining
+    the run, so that ``--resume`` picks up the journal of a run with the same
+    arguments and no other.
+        :param api_php: The full URL pointing to the wiki's `api.php` resource
+        :param job: A JSON-serializable list of the arguments defining the run
+        :return: A string path to the run's journal
+    """
+    netloc = urllib.parse.urlparse(api_php).netloc
+    digest = hashlib.sha1(json.dumps(job).encode("UTF-8")).hexdigest()
+    return os.path.join(JOURNAL_DIR, f"{netloc}_{digest[:16]}.jsonl")
+
+
+def get_mirror_file(api_php, prefixes, directory):
+    """
+    The ``get_mirror_file`` function returns the location of the record of a
+    mirror. Records are keyed by wiki and by a hash of the prefixes mirrored and
+    the directory mirrored to, so that several mirrors may be kept side by side.
+        :param api_php: The full URL pointing to the wiki's `api.php` resource
+        :param prefixes: A list of strings representing the mirrored prefixes
+        :param directory: A string path to the directory of the mirror
+        :return: A string path to the mirror's record
+    """
+    netloc = urllib.parse.urlparse(api_php).netloc
+    digest = hashlib.sha1(json.dumps([sorted(prefixes),
+        os.path.abspath(directory)]).encode("UTF-8")).hexdigest()
+    return os.path.join(MIRROR_DIR, f"{netloc}_{digest[:16]}.json")
+
+
+def get_session_file(api_php, username):
+    """
+    The ``get_session_file`` function returns the location at which the cookies
+    of the session logged into a given wiki as a given bot user are saved.
+    Sessions are keyed by both so that multiple wikis and bot passwords may be
+    used side by side.
+        :param api_php: The full URL pointing to the wiki's `api.php` resource
+        :param username: A string representing the bot user name
+        :return: A string path to the session's cookie file
+    """
+    netloc = urllib.parse.urlparse(api_php).netloc
+    return os.path.join(LOCAL_DIR, "sessions",
+        urllib.parse.quote(f"{netloc}_{username}", safe="@") + ".lwp")
+
+
+def history_wiki(mwurl, lang, revid=None, output=None, is_listing=False,
+        tracer=None):
+    """
+    The ``history_wiki`` function brings the local store of a page's revision
+    history up to date and, if asked, writes out the content of one of its
+    revisions. Only revisions made since the newest revision already stored are
+    fetched, anonymously and as many per query as the API allows, and a
+    revision already stored is written out without contacting the wiki at all.
+    Status messages go to standard error so that a revision written to standard
+    output may be piped.
+        :param mwurl: A link to the page on the wiki
+        :param lang: A dictionary of i18n console messages
+        :param revid: An optional integer denoting the ID of the revision whose
+            content is to be written out
+        :param output: An optional string path to the file to which the content
+            is written, standard output by default
+        :param is_listing: An optional boolean indicating whether to list the
+            details of each stored revision
+        :param tracer: An optional ``trace.Tracer`` recording every API call
+        :return: A status boolean indicating whether the history was brought up
+            to date and any requested revision written out
+    """
+    api_php = util.build_api_php_url(mwurl)
+    page = util.get_mediawiki_page_name(mwurl)
+    store = history.HistoryStore(get_history_file(api_php, page))
+
+    # Flags to keep track of whether the history could be fetched and saved
+    is_fetched = True
+    added = 0
+
+    if revid is None or revid not in {revision["revid"]
+            for revision in store.revisions}:
+        # Pooled session, instrumented if the run is being traced
+        session = api.build_session()
+        if tracer is not None:
+            tracer.attach(session)
+
+        with api.ApiClient(api_php, session) as client:
+            try:
+                # Only revisions newer than those already stored are fetched
+                for revision in client.get_revision_history(page,
+                        store.latest_revid):
+                    added += store.add(revision)
+            except (requests.exceptions.HTTPError,
+                    json.decoder.JSONDecodeError):
+                util.log_msg(lang["e_history_api"], sys.stderr)
+                is_fetched = False
+            except (AssertionError, KeyError):
+                util.log_msg(lang["e_history"], sys.stderr)
+                is_fetched = False
+            except (OSError, ValueError):
+                util.log_msg(lang["e_history_store"], sys.stderr)
+                is_fetched = False
+
+        try:
+            # Keep whatever was fetched, even if the history is incomplete
+            if added:
+                store.save()
+        except OSError:
+            util.log_msg(lang["e_history_store"], sys.stderr)
+            is_fetched = False
+
+    if not store.revisions:
+        util.log_msg(lang["e_history"], sys.stderr)
+        return False
+
+    text_size, stored_size = store.get_sizes()
+    log_sync_msg(lang["s_history"], page, f"{added} new",
+        f"{len(store.revisions)} revisions",
+        f"{text_size} -> {stored_size} bytes", text_io=sys.stderr)
+
+    if is_listing:
+        for revision in store.revisions:
+            util.log_msg("\t".join(str(revision[key] or "") for key in
+                ("revid", "timestamp", "user", "comment")))
+
+    if revid is None:
+        return is_fetched
+
+    try:
+        # May throw KeyError, IOError, or ValueError
+        content = store.get_content(revid)
+    except KeyError:
+        log_sync_msg(lang["e_revision"], str(revid), text_io=sys.stderr)
+        return False
+    except (OSError, ValueError):
+        util.log_msg(lang["e_history_store"], sys.stderr)
+        return False
+
+    if content is None:
+        log_sync_msg(lang["e_revision_hidden"], str(revid), text_io=sys.stderr)
+        return False
+
+    if output is None:
+        sys.stdout.write(content)
+    else:
+        try:
+            util.write_to_file(content, output)
+        except OSError:
+            log_sync_msg(lang["e_write_to_file"], output, text_io=sys.stderr)
+            return False
+
+    return is_fetched
+
+
+def load_batch_jobs(lines, lang):
+    """
+    The ``load_batch_jobs`` function reads the commands listed for ``batch``,
+    one ``push`` or ``pull`` per line in the same form as on the command line,
+    blank lines and lines beginning with ``#`` excepted. Each command is checked
+    and its files hashed up front, so that a mistake on any line is caught
+    before any wiki is touched. Consecutive commands of the same action on the
+    same wiki are merged into a single job, so that their pages are queried
+    together in batches rather than one command at a time.
+        :param lines: An iterable of strings representing the commands
+        :param lang: A dictionary of i18n console messages
+        :return jobs: A list of dictionaries holding the ``action``, ``wiki``,
+            ``files``, ``local_file_hashes`` and ``built_paths`` of each job,
+            or ``None`` if any command is invalid
+    """
+    parser = build_argument_parser()
+    jobs = []
+
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        try:
+            # May throw ValueError on unbalanced quotes
+            argv = shlex.split(line)
+            if argv[0] not in BATCH_ACTIONS:
+                raise ValueError(argv[0])
+
+            # May throw SystemExit, as argparse exits on invalid arguments
+            args = parser.parse_args(argv)
+
+            if args.mwurl is None:
+                # May throw IOError, JSONDecodeError, KeyError, or TypeError
+                mwurl, files = load_manifest(args.manifest or MANIFEST_FILE)
+            else:
+                # May throw IndexError or TypeError
+                mwurl = args.mwurl
+                files = {args.local_path: util.get_mediawiki_page_name(mwurl)}
+        except (ValueError, SystemExit, IOError, KeyError, TypeError,
+                IndexError):
+            log_sync_msg(lang["e_batch_line"], str(number), text_io=sys.stderr)
+            return None
+
+        wikis = getattr(args, "wikis", None) or [mwurl]
+        if not all(map(util.is_fandom_wiki_url, wikis)) or not files:
+            log_sync_msg(lang["e_mwurl"], str(number), text_io=sys.stderr)
+            return None
+
+        local_file_hashes = {}
+        for local_path in files:
+            try:
+                # Hash contents as a means of checking if the local file exists
+                local_file_hashes[local_path] = api.get_file_sha1(local_path)
+            except FileNotFoundError:
+                log_sync_msg(lang["e_local_path"], str(number), local_path,
+                    text_io=sys.stderr)
+                return None
+
+        built_paths = build_files(files, local_file_hashes, lang,
+            args.prune_i18n) if getattr(args, "minify", False) else {}
+        if built_paths is None:
+            return None
+
+        for wiki in wikis:
+            job = jobs[-1] if jobs else {}
+
+            if job.get("action") == args.action and\
+                    util.build_api_php_url(job["wiki"]) ==\
+                    util.build_api_php_url(wiki):
+                job["files"].update(files)
+                job["local_file_hashes"].update(local_file_hashes)
+                job["built_paths"].update(built_paths)
+            else:
+                jobs.append({
+                    "action": args.action,
+                    "wiki": wiki,
+                    "files": dict(files),
+                    "local_file_hashes": dict(local_file_hashes),
+                    "built_paths": dict(built_paths)
+                })
+
+    return jobs
+
+
+def load_cache_size(parser):
+    """
+    The ``load_cache_size`` function reads the optional ``max_size`` of the
+    ``CACHE`` section of ``settings.ini``, the size in mebibytes beyond which
+    the least recently used page content is evicted from the local cache, i.e.
+    ``max_size = 256``.
+        :param parser: The ``configparser.ConfigParser`` of ``settings.ini``
+        :return: The cache's size cap in bytes
+    """
+    if not parser.has_option("CACHE", "max_size"):
+        return cache.MAX_SIZE
+
+    # May throw ValueError
+    return int(float(parser["CACHE"]["max_size"]) * 1024 * 1024)
+
+
+def load_edit_rates(parser):
+    """
+    The ``load_edit_rates`` function reads the optional ``RATELIMITS`` section
+    of ``settings.ini``, in which the rate at which members of a user group may
+    edit is given as edits per period in seconds, i.e. ``user = 90/60``. Rates
+    given here override those reported by the wiki.
+        :param parser: The ``configparser.ConfigParser`` of ``settings.ini``
+        :return: A dictionary mapping group names to tuples of edits and seconds
+    """
+    if not parser.has_section("RATELIMITS"):
+        return {}
+
+    # Sections inherit the DEFAULT section's credentials, which are skipped
+    return {
+        group: tuple(map(int, rate.split("/")))
+        for group, rate in parser["RATELIMITS"].items()
+        if group not in parser.defaults()
+    }
+
+
+def load_manifest(manifest_path):
+    """
+    The ``load_manifest`` function reads the JSON manifest listing the files to
+    be synced in a single run. The manifest names the wiki on which the pages
+    reside under the ``wiki`` key and maps local file paths to wiki page names
+    under the ``files`` key, i.e.
+    ``{"wiki": "https://dev.fandom.com", "files": {"src/code.js":
+    "MediaWiki:MassEdit/code.js"}}``.
+        :param manifest_path: A string indicating the location of the manifest
+        :return: A tuple of the wiki URL and a dictionary mapping local file
+            paths to wiki page names
+    """
+
+    # May throw IOError or JSONDecodeError
+    manifest = util.get_json_file(manifest_path)
+
+    # May throw KeyError
+    return manifest["wiki"], dict(manifest["files"])
+
+
+def iterate_member_batches(client, member_type, entry, run_journal=None):
+    """
+    The ``iterate_member_batches`` generator function enumerates the members of
+    a category, namespace or template along with the content of their latest
+    revisions, grouping them into batches of ``api.MAX_TITLES_PER_QUERY``.
+    Members are fetched lazily, so the first batch may be processed long before
+    the last has been enumerated. Members are listed with their revision IDs
+    alone and their content fetched, or served from the cache, a batch at a
+    time, so that pages already finished according to the journal are never
+    fetched. Once a batch has been processed, the latest ``continue`` object
+    received is journaled, from which a resumed run continues the enumeration.
+        :param client: The logged-in ``ApiClient`` of the wiki
+        :param member_type: A key of ``api.MEMBER_LISTS``, i.e. ``"categories"``
+        :param entry: The category or template title or namespace number
+        :param run_journal: An optional ``journal.Journal`` of the run
+        :return: A generator yielding tuples of a list of page names and a
+            dictionary mapping them to their latest revisions
+    """
+
+    # Continue objects of the enumeration in the order received
+    continuations = []
+    members = client.get_member_revisions(member_type, entry,
+        continuation=getattr(run_journal, "continuation", None),
+        on_continue=continuations.append)
+
+    while batch := dict(itertools.islice(members, api.MAX_TITLES_PER_QUERY)):
+        if run_journal is not None:
+            # Pages finished by an earlier run are neither fetched nor checked
+            batch = {page: revision for page, revision in batch.items()
+                if page not in run_journal.done}
+
+        if batch:
+            # May throw HTTPError, JSONDecodeError, AssertionError, or KeyError
+            yield list(batch), client.get_revisions(batch)
+
+        # Every member listed before the latest continuation is now finished
+        if run_journal is not None and continuations:
+            run_journal.record_continuation(continuations[-1])
+
+
+def iterate_page_batches(client, pages):
+    """
+    The ``iterate_page_batches`` generator function fetches the content of the
+    latest revisions of a list of pages ``api.MAX_TITLES_PER_QUERY`` pages at a
+    time, in the form yielded by ``iterate_member_batches``. Pages that do not
+    exist are named in the list but absent from the dictionary.
+        :param client: The logged-in ``ApiClient`` of the wiki
+        :param pages: A list of page names
+        :return: A generator yielding tuples of a list of page names and a
+            dictionary mapping them to their latest revisions
+    """
+    for start in range(0, len(pages), api.MAX_TITLES_PER_QUERY):
+        chunk = pages[start:start + api.MAX_TITLES_PER_QUERY]
+        yield chunk, client.get_latest_revisions(chunk, content=True)
+
+
+def load_page_names(pages_path=None):
+    """
+    The ``load_page_names`` function reads the list of pages on which ``replace``
+    operates, one page name per line, from a file or from standard input. As in
+    the JavaScript application, blank lines are ignored.
+        :param pages_path: An optional string indicating the location of the
+            list. If no path is passed, the list is read from standard input.
+        :return: A list of page names
+    """
+
+    # May throw IOError
+    contents = util.get_file_contents(pages_path) if pages_path\
+        else sys.stdin.read()
+
+    return list(filter(None, map(str.strip, contents.split("\n"))))
+
+
+def load_sync_state():
+    """
+    The ``load_sync_state`` function reads the record of the revision ID and
+    SHA-1 hash of each wiki page as of its last push or pull, keyed by wiki
+    ``api.php`` URL and page name. If no valid record exists, an empty one is
+    returned, in which case every file is treated as out of date.
+        :return: A dictionary of the synced revisions of each wiki
+    """
+    try:
+        return util.get_json_file(SYNC_STATE_FILE)
+    except (IOError, json.decoder.JSONDecodeError):
+        return {}
+
+
+def log_in(client, username, password, lang, label=None, edit_rates=None):
+    """
+    The ``log_in`` function authenticates an ``ApiClient``, first attempting to
+    resume the session saved by a previous run, which costs a single
+    ``meta=userinfo`` query, and logging in with the bot password only if that
+    session has expired. Newly created sessions are saved for subsequent runs.
+    Once logged in, the client's edits are throttled to the user's rate limits.
+        :param client: The ``ApiClient`` of the wiki to log into
+        :param username: A string representing the bot user name
+        :param password: The bot password of the user
+        :param lang: A dictionary of i18n console messages
+        :param label: An optional string identifying the wiki in log messages
+        :param edit_rates: An optional dictionary of edit rates by user group
+            overriding those of the wiki, as returned by ``load_edit_rates``
+        :return is_logged_in: A status boolean indicating whether the client is
+            logged in
+    """
+
+    # Cookies of the session saved by a previous run, if any
+    session_file = get_session_file(client.api_php, username)
+
+    # Fandom login flag
+    is_logged_in = False
+
+    try:
+        # Reuse the saved session if a single userinfo query shows it is live
+        is_logged_in = client.load_cookies(session_file) and\
+            client.is_logged_in_as(username)
+    except (requests.exceptions.RequestException, json.decoder.JSONDecodeError,
+            AssertionError, KeyError):
+        pass
+
+    if is_logged_in:
+        log_sync_msg(lang["s_session"], label)
+        configure_edit_rate(client, edit_rates)
+        return is_logged_in
+
+    try:
+        # Log in, catching bad credentials in the process
+        is_logged_in = client.login(username, password)
+    except (requests.exceptions.HTTPError, json.decoder.JSONDecodeError):
+        log_sync_msg(lang["e_login_api"], label, text_io=sys.stderr)
+    except (AssertionError, KeyError):
+        log_sync_msg(lang["e_login"], label, text_io=sys.stderr)
+
+    # Only proceed with main script if logged in and in right groups
+    if not is_logged_in:
+        return is_logged_in
+
+    log_sync_msg(lang["s_login"], label)
+
+    try:
+        # Save the new session so the next run may skip logging in
+        client.save_cookies(session_file)
+    except OSError:
+        log_sync_msg(lang["e_session"], label, text_io=sys.stderr)
+
+    configure_edit_rate(client, edit_rates)
+    return is_logged_in
+
+
+def log_sync_msg(message_text, *subjects, text_io=sys.stdout):
+    """
+    The ``log_sync_msg`` function logs a message pertaining to particular wikis
+    or local files, appending their names so that the output of multi-file and
+    multi-wiki runs remains legible. Subjects that are ``None`` are omitted.
+        :param message_text: A string representing the intended message
+        :param subjects: Strings naming the wikis and/or local files to which
+            the message relates
+        :param text_io: An optional text IO, ``sys.stdout`` by default
+        :return: None
+    """
+    subjects = ", ".join(filter(None, subjects))
+    util.log_msg(f"{message_text} ({subjects})" if subjects else message_text,
+        text_io)
+
+
+def list_mirror_pages(client, wiki_mirror, prefixes):
+    """
+    The ``list_mirror_pages`` function lists every page under the given
+    prefixes by means of ``list=allpages``, fetching the content of each in
+    the same requests, and brings the mirror in line with them. The wiki's time
+    is noted beforehand, so that changes made while the pages are listed are
+    seen by the next check of the recent changes.
+        :param client: The ``ApiClient`` of the wiki
+        :param wiki_mirror: The ``mirror.Mirror`` to be brought up to date
+        :param prefixes: A list of strings representing the prefixes to mirror
+        :return: A tuple of the integer numbers of pages written and removed
+    """
+
+    # May throw HTTPError, JSONDecodeError, AssertionError, or KeyError
+    site_info = client.get_site_info("general|namespaces|namespacealiases")
+    wiki_mirror.prefixes = [list(mirror.resolve_prefix(prefix, site_info))
+        for prefix in prefixes]
+
+    listed = set()
+    written = 0
+
+    for namespace, prefix, _ in wiki_mirror.prefixes:
+        # May throw HTTPError, JSONDecodeError, AssertionError, or KeyError
+        for page, revision in client.get_prefix_revisions(namespace, prefix,
+                content=True):
+            listed.add(page)
+
+            # May throw OSError
+            written += wiki_mirror.put(page, revision)
+
+    removed = sum(map(wiki_mirror.remove, set(wiki_mirror.pages) - listed))
+    wiki_mirror.timestamp = site_info["general"]["time"]
+    wiki_mirror.seen = []
+
+    return written, removed
+
+
+def message_wiki(mwurl, users, subject, body, credentials, lang,
+        edit_rates=None, tracer=None, run_journal=None):
+    """
+    The ``message_wiki`` function messages a list of users on a single wiki in
+    the manner of the JavaScript application's messaging scene. Recipients are
+    vetted ``api.MAX_TITLES_PER_QUERY`` users per query rather than one at a
+    time, and whether messages go to Message Walls or talk pages is settled
+    once for the whole wiki. Each message is posted through the client's
+    scheduled session, so that the edit rate of the account is respected. Given
+    a journal resumed from an earlier run, users already messaged are skipped.
+        :param mwurl: A link to the wiki or a page on the wiki
+        :param users: A list of the names of the users to be messaged
+        :param subject: A string representing the title of the message
+        :param body: A string representing the wikitext of the message
+        :param credentials: A tuple of the bot user name and password
+        :param lang: A dictionary of i18n console messages
+        :param edit_rates: An optional dictionary of edit rates by user group
+        :param tracer: An optional ``trace.Tracer`` recording every API call
+        :param run_journal: An optional ``journal.Journal`` of the run
+        :return: A status boolean indicating whether all recipients were
+            messaged
+    """
+
+    # Pooled session, instrumented if the run is being traced
+    session = api.build_session()
+    if tracer is not None:
+        tracer.attach(session)
+
+    # Client holding a pooled session and cached tokens for the wiki
+    with api.ApiClient(util.build_api_php_url(mwurl), session) as client:
+        if not log_in(client, *credentials, lang, edit_rates=edit_rates):
+            return False
+
+        try:
+            # Settle the kind of target and vet every recipient up front
+            has_walls = client.has_message_walls()
+            content = message.build_json_model(client.parse_wikitext(body),
+                mwurl) if has_walls else body
+            recipients, rejected = message.get_recipients(client,
+                [user for user in users
+                    if user not in getattr(run_journal, "done", {})])
+        except (requests.exceptions.HTTPError, json.decoder.JSONDecodeError):
+            util.log_msg(lang["e_get_users_api"], sys.stderr)
+            return False
+        except (AssertionError, KeyError):
+            util.log_msg(lang["e_get_users"], sys.stderr)
+            return False
+
+        # Users that may not be messaged are noted but are not failures
+        for user, reason in rejected.items():
+            log_sync_msg(lang[f"e_user_{reason}"], user, text_io=sys.stderr)
+
+        # Flag to keep track of recipients that could not be messaged
+        has_failures = False
+
+        for recipient in recipients:
+            name = recipient["name"]
+            if run_journal is not None and name in run_journal.done:
+                continue
+
+            # Flag to keep track of a successful POST request
+            is_posted = False
+            try:
+                if has_walls:
+                    client.post_message_wall_thread(recipient["userid"],
+                        subject, content)
+                    is_posted = True
+                else:
+                    is_posted = client.post_talk_page_topic(
+                        f"User talk:{name}", subject,
+                        content)["result"] == "Success"
+            except (requests.exceptions.HTTPError,
+                    json.decoder.JSONDecodeError):
+                log_sync_msg(lang["e_post_content_api"], name,
+                    text_io=sys.stderr)
+            except (AssertionError, KeyError):
+                log_sync_msg(lang["e_post_content"], name, text_io=sys.stderr)
+            finally:
+                if is_posted:
+                    log_sync_msg(lang["s_post_content"], name)
+                    if run_journal is not None:
+                        run_journal.record_page(name)
+                else:
+                    if run_journal is not None:
+                        run_journal.record_failure(name)
+                    has_failures = True
+
+        return not has_failures
+
+
+def mirror_wiki(mwurl, prefixes, directory, lang, interval=0, tracer=None):
+    """
+    The ``mirror_wiki`` function keeps a local mirror of every page on a wiki
+    under the given prefixes. The pages are listed in full only the first time,
+    or should the mirror have gone so long without being brought up to date
+    that changes since may have aged out of the wiki's recent changes. Every
+    later check asks the recent changes for changes since the latest seen, so
+    that a check finding nothing costs a single request, and only the pages
+    changed are fetched anew, in batches. With an interval, checks are repeated
+    until interrupted. No login is needed.
+        :param mwurl: A link to the wiki or a page on the wiki
+        :param prefixes: A list of strings representing the beginnings of the
+            titles of the pages to mirror, namespaces included
+        :param directory: A string path to the directory of the mirror
+        :param lang: A dictionary of i18n console messages
+        :param interval: An optional float denoting the number of seconds
+            between checks, or zero to check once
+        :param tracer: An optional ``trace.Tracer`` recording every API call
+        :return is_mirrored: A status boolean indicating whether the latest
+            check succeeded
+    """
+    api_php = util.build_api_php_url(mwurl)
+    wiki_mirror = mirror.Mirror(get_mirror_file(api_php, prefixes, directory),
+        directory)
+
+    # Pooled session, instrumented if the run is being traced
+    session = api.build_session()
+    if tracer is not None:
+        tracer.attach(session)
+
+    # Flag to keep track of whether the latest check succeeded
+    is_mirrored = False
+
+    with api.ApiClient(api_php, session) as client:
+        try:
+            while True:
+                is_mirrored = False
+                is_listing = wiki_mirror.is_stale
+
+                try:
+                    written, removed = list_mirror_pages(client, wiki_mirror,
+                        prefixes) if is_listing else\
+                        update_mirror_pages(client, wiki_mirror)
+                except (requests.exceptions.HTTPError,
+                        json.decoder.JSONDecodeError):
+                    util.log_msg(lang["e_mirror_api"], sys.stderr)
+                except (AssertionError, KeyError):
+                    util.log_msg(lang["e_mirror"], sys.stderr)
+                except OSError:
+                    log_sync_msg(lang["e_write_to_file"], directory,
+                        text_io=sys.stderr)
+                else:
+                    is_mirrored = True
+                    log_sync_msg(lang["s_mirror_list" if is_listing else
+                        "s_mirror"], f"{written} written",
+                        f"{removed} removed",
+                        f"{len(wiki_mirror.pages)} pages")
+
+                try:
+                    # Record progress after each check, should the next fail
+                    wiki_mirror.save()
+                except OSError:
+                    util.log_msg(lang["e_mirror_state"], sys.stderr)
+                    is_mirrored = False
+
+                if not interval:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+
+    return is_mirrored
+
+
+def parse_wikis(wikis):
+    """
+    The ``parse_wikis`` function converts the value of the ``--wikis`` argument
+    into a list of wiki URLs. Each comma-separated entry may either be a full
+    URL or the subdomain of a Fandom wiki, i.e. ``eizen`` for
+    ``https://eizen.fandom.com``.
+        :param wikis: A comma-separated string of wiki subdomains or URLs
+        :return: A list of wiki URLs
+    """
+    return [wiki if "://" in wiki else f"https://{wiki}.fandom.com"
+        for wiki in filter(None, map(str.strip, wikis.split(",")))]
+
+
+def parse_indices(indices):
+    """
+    The ``parse_indices`` function converts the value of the ``--indices``
+    argument into a list of the occurrences to be replaced. As in the JavaScript
+    application, entries that are not wellformed integers are ignored.
+        :param indices: A comma-separated string of one-based indices
+        :return: A list of integers
+    """
+    return [int(index) for index in map(str.strip, indices.split(","))
+        if index.isdigit()]
+
+
+def pull_files(client, files, local_file_hashes, synced_revisions, lang,
+        label=None):
+    """
+    The ``pull_files`` function pulls the latest content of the given wiki pages
+    into their local files. A single batched ``prop=info`` query reveals which
+    pages have changed since their last sync, and only those pages, along with
+    any whose local copy has diverged, are downloaded. Files whose content is
+    already up to date are not written to at all.
+        :param client: The logged-in ``ApiClient`` of the wiki
+        :param files: A dictionary mapping local file paths to page names
+        :param local_file_hashes: A dictionary mapping local file paths to
+            the SHA-1 hashes of their present contents
+        :param synced_revisions: A dictionary of the wiki's synced revisions,
+            updated in place
+        :param lang: A dictionary of i18n console messages
+        :param label: An optional string identifying the wiki in log messages
+        :return: A status boolean indicating whether all files were pulled
+    """
+
+    # Flag to keep track of files that could not be synced
+    has_failures = False
+
+    try:
+        # Grab IDs of the latest revisions in batches of 50 titles
+        page_info = client.get_page_info(files.values())
+    except (requests.exceptions.HTTPError, json.decoder.JSONDecodeError):
+        log_sync_msg(lang["e_get_content_api"], label, text_io=sys.stderr)
+        return False
+    except (AssertionError, KeyError):
+        log_sync_msg(lang["e_get_content"], label, text_io=sys.stderr)
+        return False
+
+    # Files whose page has moved on or whose local copy has diverged
+    stale_files = {}
+    for local_path, mediawiki_file_name in files.items():
+        synced_revision = synced_revisions.get(mediawiki_file_name, {})
+
+        if mediawiki_file_name not in page_info:
+            log_sync_msg(lang["e_get_content"], label, local_path,
+                text_io=sys.stderr)
+            has_failures = True
+        elif synced_revision.get("revid") ==\
+                page_info[mediawiki_file_name]["lastrevid"] and\
+                synced_revision.get("source", synced_revision.get("sha1")) ==\
+                local_file_hashes[local_path]:
+            log_sync_msg(lang["s_unchanged"], label, local_path)
+        else:
+            stale_files[local_path] = mediawiki_file_name
+
+    try:
+        # Download content only for those files in need of updating
+        latest_revisions = client.get_latest_revisions(
+            stale_files.values(), content=True) if stale_files else {}
+    except (requests.exceptions.HTTPError, json.decoder.JSONDecodeError):
+        log_sync_msg(lang["e_get_content_api"], label, text_io=sys.stderr)
+        return False
+    except (AssertionError, KeyError):
+        log_sync_msg(lang["e_get_content"], label, text_io=sys.stderr)
+        return False
+
+    for local_path, mediawiki_file_name in stale_files.items():
+        if mediawiki_file_name not in latest_revisions:
+            log_sync_msg(lang["e_get_content"], label, local_path,
+                text_io=sys.stderr)
+            has_failures = True
+            continue
+
+        latest_revision = latest_revisions.pop(mediawiki_file_name)
+        content = latest_revision.pop("content")
+
+        # Leave files alone if only the recorded revision was out of date
+        if latest_revision["sha1"] == local_file_hashes[local_path]:
+            synced_revisions[mediawiki_file_name] = latest_revision
+            log_sync_msg(lang["s_unchanged"], label, local_path)
+            continue
+
+        # Flag to keep track of success of file writing of new content
+        is_written = False
+        try:
+            # Determine if some content was successfully written
+            is_written = util.write_to_file(content, local_path) > 0
+        except IOError:
+            log_sync_msg(lang["e_write_to_file"], label, local_path,
+                text_io=sys.stderr)
+        finally:
+            if is_written:
+                synced_revisions[mediawiki_file_name] = latest_revision
+                log_sync_msg(lang["s_write_to_file"], label, local_path)
+            else:
+                has_failures = True
+
+    return not has_failures
+
+
+def push_file(client, local_path, mediawiki_file_name, local_sha1, baserevid,
+        synced_revisions, lang, label=None, built_path=None):
+    """
+    The ``push_file`` function posts the content of a single local file to its
+    wiki page on top of the given base revision, recording the new revision as
+    synced if the edit succeeds. Files larger than ``api.MULTIPART_THRESHOLD``
+    are streamed from disk rather than read into memory. If the file has been
+    built, its output is pushed in its place, and the hash of the source is
+    recorded alongside that of the output so that pulls recognize the source
+    as up to date.
+        :param client: The logged-in ``ApiClient`` of the wiki
+        :param local_path: A string path to the local file
+        :param mediawiki_file_name: A string representing the name of the page
+        :param local_sha1: The SHA-1 hash of the file's present contents
+        :param baserevid: The ID of the revision on which the edit is based, or
+            ``None`` if the page is to be created
+        :param synced_revisions: A dictionary of the wiki's synced revisions,
+            updated in place
+        :param lang: A dictionary of i18n console messages
+        :param label: An optional string identifying the wiki in log messages
+        :param built_path: An optional string path to the output built from
+            the file by ``build_files``, pushed in place of the file
+        :return is_posted: A status boolean indicating whether the file was
+            pushed
+    """
+
+    # Flag to keep track of a successful POST request to Action API
+    is_posted = False
+    try:
+        with open(built_path or local_path, "rb") as local_file:
+            # Stream large files rather than reading them into memory
+            if os.fstat(local_file.fileno()).st_size > api.MULTIPART_THRESHOLD:
+                content = local_file
+            else:
+                content = local_file.read().decode("UTF-8")
+
+            # Query action=edit endpoint of MW Action API
+            edit = client.edit_page(content, mediawiki_file_name, baserevid)
+        is_posted = edit["result"] == "Success"
+    except (requests.exceptions.HTTPError, json.decoder.JSONDecodeError):
+        log_sync_msg(lang["e_post_content_api"], label, local_path,
+            text_io=sys.stderr)
+    except api.ApiError as error:
+        log_sync_msg(lang["e_edit_conflict"
+            if error.code == "editconflict" else "e_post_content"],
+            label, local_path, text_io=sys.stderr)
+    except (AssertionError, KeyError):
+        log_sync_msg(lang["e_post_content"], label, local_path,
+            text_io=sys.stderr)
+    except (FileNotFoundError, UnicodeDecodeError):
+        log_sync_msg(lang["e_local_path"], label, local_path,
+            text_io=sys.stderr)
+    finally:
+        if is_posted:
+            synced_revisions[mediawiki_file_name] = {
+                "revid": edit.get("newrevid", baserevid),
+                "sha1": local_sha1
+            }
+            if built_path is not None:
+                synced_revisions[mediawiki_file_name]["source"] =\
+                    api.get_file_sha1(local_path)
+            log_sync_msg(lang["s_post_content"], label, local_path)
+
+            # Keep the content pushed as the base against which to diff
+            if client.cache is not None and "newrevid" in edit and\
+                    isinstance(content, str):
+                client.cache.put(client.api_php, mediawiki_file_name,
+                    edit["newrevid"], content.rstrip(" \t\n\r\0\x0b"),
+                    local_sha1)
+
+    return is_posted
+
+
+def push_files(client, files, local_file_hashes, synced_revisions, lang,
+        label=None, built_paths=None):
+    """
+    The ``push_files`` function pushes the contents of the given local files to
+    their wiki pages. The IDs and hashes of the pages' latest revisions are
+    first fetched in batches, and files whose content the wiki already has are
+    skipped. The remainder are posted on top of the revision last synced, so
+    that edits made on the wiki in the meantime surface as edit conflicts.
+        :param client: The logged-in ``ApiClient`` of the wiki
+        :param files: A dictionary mapping local file paths to page names
+        :param local_file_hashes: A dictionary mapping local file paths to
+            the SHA-1 hashes of their present contents
+        :param synced_revisions: A dictionary of the wiki's synced revisions,
+            updated in place
+        :param lang: A dictionary of i18n console messages
+        :param label: An optional string identifying the wiki in log messages
+        :param built_paths: An optional dictionary mapping local file paths to
+            the outputs built from them, pushed in their place
+        :return: A status boolean indicating whether all files were pushed
+    """
+
+    # Flag to keep track of files that could not be synced
+    has_failures = False
+
+    try:
+        # Grab IDs and hashes of the latest revisions in batches of 50
+        latest_revisions = client.get_latest_revisions(files.values())
+    except (requests.exceptions.HTTPError, json.decoder.JSONDecodeError):
+        log_sync_msg(lang["e_get_content_api"], label, text_io=sys.stderr)
+        return False
+    except (AssertionError, KeyError):
+        log_sync_msg(lang["e_get_content"], label, text_io=sys.stderr)
+        return False
+
+    for local_path, mediawiki_file_name in files.items():
+        # Pages that do not yet exist are created without a base revision
+        latest_revision = latest_revisions.get(mediawiki_file_name, {})
+        local_sha1 = local_file_hashes[local_path]
+
+        # Skip the upload entirely if the wiki already has this content
+        if latest_revision.get("sha1") == local_sha1:
+            synced_revisions[mediawiki_file_name] = latest_revision
+            if local_path in (built_paths or {}):
+                latest_revision["source"] = api.get_file_sha1(local_path)
+            log_sync_msg(lang["s_unchanged"], label, local_path)
+            continue
+
+        # Base the edit on the last synced revision to catch others' edits
+        baserevid = synced_revisions.get(mediawiki_file_name,
+            latest_revision).get("revid")
+
+        if not push_file(client, local_path, mediawiki_file_name, local_sha1,
+                baserevid, synced_revisions, lang, label,
+                (built_paths or {}).get(local_path)):
+            has_failures = True
+
+    return not has_failures
+
+
+def replace_pages(client, batches, replacer, lang, label=None, summary="",
+        executor=None, run_journal=None):
+    """
+    The ``replace_pages`` function performs a find-and-replace operation on
+    batches of pages as yielded by ``iterate_page_batches`` or
+    ``iterate_member_batches``, whereby the pages' content is fetched
+    ``api.MAX_TITLES_PER_QUERY`` pages at a time rather than one request per
+    page. The replacer is applied to each batch, in worker processes if the
+    batch is large, and only those pages whose text has actually changed are
+    edited. Each edit is based on the revision fetched so that intervening edits
+    surface as edit conflicts. Each page is journaled as finished or failed as
+    soon as it has been dealt with.
+        :param client: The logged-in ``ApiClient`` of the wiki
+        :param batches: An iterable of tuples of a list of page names and a
+            dictionary mapping them to their latest revisions
+        :param replacer: A callable returned by ``replace.replace_occurrences``
+        :param lang: A dictionary of i18n console messages
+        :param label: An optional string identifying the wiki in log messages
+        :param summary: An optional string representing the edit summary
+        :param executor: An optional ``concurrent.futures.Executor`` used to
+            replace text in large batches
+        :param run_journal: An optional ``journal.Journal`` of the run
+        :return: A status boolean indicating whether all pages were processed
+    """
+
+    # Flag to keep track of pages that could not be edited
+    has_failures = False
+
+    batches = iter(batches)
+    while True:
+        try:
+            # Grab content and revision IDs of the whole batch at once
+            chunk, latest_revisions = next(batches, ((), None))
+        except (requests.exceptions.HTTPError, json.decoder.JSONDecodeError):
+            log_sync_msg(lang["e_get_content_api"], label, text_io=sys.stderr)
+            return False
+        except (AssertionError, KeyError):
+            log_sync_msg(lang["e_get_content"], label, text_io=sys.stderr)
+            return False
+
+        if latest_revisions is None:
+            break
+
+        new_texts = replace.replace_in_texts(replacer, {
+            page: revision["content"]
+            for page, revision in latest_revisions.items()
+        }, executor)
+
+        for page in chunk:
+            if page not in latest_revisions:
+                log_sync_msg(lang["e_get_content"], label, page,
+                    text_io=sys.stderr)
+                if run_journal is not None:
+                    run_journal.record_failure(page)
+                has_failures = True
+                continue
+            elif page not in new_texts:
+                log_sync_msg(lang["s_no_occurrences"], label, page)
+                if run_journal is not None:
+                    run_journal.record_page(page,
+                        latest_revisions[page]["revid"])
+                continue
+
+            # Flag to keep track of a successful POST request to Action API
+            is_posted = False
+            try:
+                # Query action=edit endpoint of MW Action API
+                edit = client.edit_page(new_texts[page], page,
+                    latest_revisions[page]["revid"], summary)
+                is_posted = edit["result"] == "Success"
+            except (requests.exceptions.HTTPError,
+                    json.decoder.JSONDecodeError):
+                log_sync_msg(lang["e_post_content_api"], label, page,
+                    text_io=sys.stderr)
+            except api.ApiError as error:
+                log_sync_msg(lang["e_edit_conflict"
+                    if error.code == "editconflict" else "e_post_content"],
+                    label, page, text_io=sys.stderr)
+            except (AssertionError, KeyError):
+                log_sync_msg(lang["e_post_content"], label, page,
+                    text_io=sys.stderr)
+            finally:
+                if is_posted:
+                    log_sync_msg(lang["s_post_content"], label, page)
+                    if run_journal is not None:
+                        run_journal.record_page(page, edit.get("newrevid"))
+                else:
+                    if run_journal is not None:
+                        run_journal.record_failure(page)
+                    has_failures = True
+
+    return not has_failures
+
+
+def replace_wiki(mwurl, pages, replacer, credentials, lang, summary="",
+        jobs=MAX_REPLACE_PROCESSES, edit_rates=None, members=None,
+        page_cache=None, tracer=None, run_journal=None):
+    """
+    The ``replace_wiki`` function performs a complete find-and-replace operation
+    on a single wiki, from logging in to editing each page. Large batches of
+    pages are divided among up to ``jobs`` worker processes, which are only
+    started once a batch large enough to warrant them is encountered. Given a
+    journal resumed from an earlier run, pages it finished are skipped and pages
+    that failed are retried.
+        :param mwurl: A link to the wiki or a page on the wiki
+        :param pages: A list of page names, ignored if ``members`` is passed
+        :param replacer: A callable returned by ``replace.replace_occurrences``
+        :param credentials: A tuple of the bot user name and password
+        :param lang: A dictionary of i18n console messages
+        :param summary: An optional string representing the edit summary
+        :param jobs: An optional integer denoting the number of processes
+        :param edit_rates: An optional dictionary of edit rates by user group
+        :param members: An optional tuple of a key of ``api.MEMBER_LISTS`` and
+            the category, namespace or template whose members are to be edited
+            in place of ``pages``
+        :param page_cache: An optional ``cache.PageCache`` of page content
+        :param tracer: An optional ``trace.Tracer`` recording every API call
+        :param run_journal: An optional ``journal.Journal`` of the run
+        :return: A status boolean indicating whether all pages were processed
+    """
+
+    # Pooled session, instrumented if the run is being traced
+    session = api.build_session()
+    if tracer is not None:
+        tracer.attach(session)
+
+    # Client holding a pooled session and cached tokens for the wiki
+    with api.ApiClient(util.build_api_php_url(mwurl), session,
+            page_cache) as client:
+        if not log_in(client, *credentials, lang, edit_rates=edit_rates):
+            return False
+
+        # Pages finished and failed by the run being resumed, if any
+        done = getattr(run_journal, "done", {})
+        failed = sorted(getattr(run_journal, "failed", ()))
+
+        if members:
+            # Stream members as they are enumerated rather than listing them
+            batches = itertools.chain(iterate_page_batches(client, failed),
+                iterate_member_batches(client, *members, run_journal))
+        else:
+            batches = iterate_page_batches(client,
+                [page for page in pages if page not in done])
+
+        if jobs <= 1:
+            return replace_pages(client, batches, replacer, lang, None,
+                summary, run_journal=run_journal)
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as\
+                executor:
+            return replace_pages(client, batches, replacer, lang, None,
+                summary, executor, run_journal)
+
+
+def run_batch(jobs, credentials, sync_state, lang, edit_rates=None,
+        page_cache=None, tracer=None):
+    """
+    The ``run_batch`` function runs the jobs read by ``load_batch_jobs`` in
+    order within a single process. Each wiki is logged into once, when its
+    first job is reached, and its client, along with the client's pooled
+    connections and cached tokens, serves every later job on that wiki.
+        :param jobs: A list of jobs as returned by ``load_batch_jobs``
+        :param credentials: A tuple of the bot user name and password
+        :param sync_state: A dictionary of the synced revisions of each wiki,
+            whose entries are updated in place
+        :param lang: A dictionary of i18n console messages
+        :param edit_rates: An optional dictionary of edit rates by user group
+        :param page_cache: An optional ``cache.PageCache`` of page content
+        :param tracer: An optional ``trace.Tracer`` recording every API call
+        :return is_synced: A dictionary mapping the URL of each wiki to a
+            status boolean indicating whether all of its jobs succeeded
+    """
+
+    # Logged-in clients by wiki, or None where logging in failed
+    clients = {}
+    is_synced = {}
+
+    with contextlib.ExitStack() as stack:
+        for job in jobs:
+            api_php = util.build_api_php_url(job["wiki"])
+            label = urllib.parse.urlparse(api_php).netloc
+
+            if api_php not in clients:
+                # Pooled session, instrumented if the run is being traced
+                session = api.build_session()
+                if tracer is not None:
+                    tracer.attach(session, label)
+
+                client = stack.enter_context(api.ApiClient(api_php, session,
+                    page_cache))
+                clients[api_php] = client if log_in(client, *credentials,
+                    lang, label, edit_rates) else None
+
+            if (client := clients[api_php]) is None:
+                is_job_synced = False
+            elif job["action"] == "pull":
+                is_job_synced = pull_files(client, job["files"],
+                    job["local_file_hashes"], sync_state[api_php], lang,
+                    label)
+            else:
+                is_job_synced = push_files(client, job["files"],
+                    job["local_file_hashes"], sync_state[api_php], lang,
+                    label, job["built_paths"])
+
+            is_synced[job["wiki"]] = is_job_synced and\
+                is_synced.get(job["wiki"], True)
+
+    return is_synced
+
+
+def save_sync_state(sync_state):
+    """
+    The ``save_sync_state`` function writes the record of synced revisions read
+    by ``load_sync_state`` back to disk.
+        :param sync_state: A dictionary of the synced revisions of each wiki
+        :return: None
+    """
+    util.write_json_file(sync_state, SYNC_STATE_FILE)
+
+
+def sync_wiki(action, mwurl, files, local_file_hashes, credentials,
+        sync_state, lang, label=None, edit_rates=None, page_cache=None,
+        tracer=None, built_paths=None):
+    """
+    The ``sync_wiki`` function performs a complete push or pull against a single
+    wiki, from logging in to syncing each file. Each call uses a client, and
+    thereby a pooled session, of its own, so that several wikis may be synced
+    concurrently from separate threads.
+        :param action: Either ``"push"`` or ``"pull"``
+        :param mwurl: A link to the wiki or a page on the wiki
+        :param files: A dictionary mapping local file paths to page names
+        :param local_file_hashes: A dictionary mapping local file paths to
+            the SHA-1 hashes of their present contents
+        :param credentials: A tuple of the bot user name and password
+        :param sync_state: A dictionary of the synced revisions of each wiki,
+            whose entry for this wiki is updated in place
+        :param lang: A dictionary of i18n console messages
+        :param label: An optional string identifying the wiki in log messages
+        :param edit_rates: An optional dictionary of edit rates by user group
+        :param page_cache: An optional ``cache.PageCache`` of page content
+        :param tracer: An optional ``trace.Tracer`` recording every API call
+        :param built_paths: An optional dictionary mapping local file paths to
+            the outputs built from them, pushed in their place
+        :return: A status boolean indicating whether all files were synced
+    """
+
+    # Pooled session, instrumented if the run is being traced
+    session = api.build_session()
+    if tracer is not None:
+        tracer.attach(session, label)
+
+    # Client holding a pooled session and cached tokens for the wiki
+    with api.ApiClient(util.build_api_php_url(mwurl), session,
+            page_cache) as client:
+        if not log_in(client, *credentials, lang, label, edit_rates):
+            return False
+
+        if action == "pull":
+            return pull_files(client, files, local_file_hashes,
+                sync_state[client.api_php], lang, label)
+
+        return push_files(client, files, local_file_hashes,
+            sync_state[client.api_php], lang, label, built_paths)
+
+
+def update_mirror_pages(client, wiki_mirror):
+    """
+    The ``update_mirror_pages`` function brings a mirror up to date with the
+    changes made since the latest change it has seen. Changes already seen by
+    the last check, which are listed again if made at the very second of the
+    latest change, are disregarded, as are changes to pages outside the
+    mirrored prefixes and edits already mirrored. The latest revisions of the
+    pages changed are then fetched in batches, and pages found to no longer
+    exist, having been deleted or moved, are removed.
+        :param client: The ``ApiClient`` of the wiki
+        :param wiki_mirror: The ``mirror.Mirror`` to be brought up to date
+        :return: A tuple of the integer numbers of pages written and removed
+    """
+    changed = set()
+
+    # May throw HTTPError, JSONDecodeError, AssertionError, or KeyError
+    changes = [change for change in client.get_recent_changes(
+        wiki_mirror.timestamp, (namespace for namespace, _, _ in
+        wiki_mirror.prefixes)) if change["rcid"] not in wiki_mirror.seen]
+
+    for change in changes:
+        # Moves concern both the page moved and the page it was moved to
+        pages = (change["title"], change.get("logparams", {}).get(
+            "target_title"))
+
+        for page in filter(wiki_mirror.has_page, filter(None, pages)):
+            # Log events carry no revision and are always rechecked
+            if not change.get("revid") or change["revid"] >\
+                    wiki_mirror.pages.get(page, {}).get("revid", 0):
+                changed.add(page)
+
+    # May throw HTTPError, JSONDecodeError, AssertionError, or KeyError
+    revisions = client.get_latest_revisions(sorted(changed), content=True)\
+        if changed else {}
+
+    # May throw OSError
+    written = sum(wiki_mirror.put(page, revisions[page])
+        for page in changed if page in revisions)
+    removed = sum(map(wiki_mirror.remove, changed - set(revisions)))
+
+    # Changes at the time of the latest change are skipped by the next check
+    timestamp = max([wiki_mirror.timestamp] + [change["timestamp"]
+        for change in changes])
+    wiki_mirror.seen = [change["rcid"] for change in changes
+        if change["timestamp"] == timestamp] +\
+        (wiki_mirror.seen if timestamp == wiki_mirror.timestamp else [])
+    wiki_mirror.timestamp = timestamp
+
+    return written, removed
+
+
+def watch_wiki(mwurl, files, local_file_hashes, credentials, sync_state, lang,
+        debounce=watch.DEBOUNCE, edit_rates=None, page_cache=None, tracer=None):
+    """
+    The ``watch_wiki`` function keeps a single wiki in step with local files
+    until interrupted. Having logged in and pushed any files changed since their
+    last sync, it watches the files and, whenever one is saved, pushes it by
+    means of a single edit request over the same session, reusing the client's
+    cached token. Saves that leave a file's hash unchanged, as when an editor
+    merely touches it, are ignored, and the record of synced revisions is saved
+    after each push so that an interrupted watch loses nothing.
+        :param mwurl: A link to the wiki or a page on the wiki
+        :param files: A dictionary mapping local file paths to page names
+        :param local_file_hashes: A dictionary mapping local file paths to
+            the SHA-1 hashes of their present contents, updated in place
+        :param credentials: A tuple of the bot user name and password
+        :param sync_state: A dictionary of the synced revisions of each wiki,
+            whose entry for this wiki is updated in place
+        :param lang: A dictionary of i18n console messages
+        :param debounce: An optional float denoting the number of seconds to
+            wait for further saves before pushing
+        :param edit_rates: An optional dictionary of edit rates by user group
+        :param page_cache: An optional ``cache.PageCache`` of page content
+        :param tracer: An optional ``trace.Tracer`` recording every API call
+        :return: A status boolean indicating whether the initial push succeeded
+            and the files could be watched
+    """
+
+    # Pooled session, instrumented if the run is being traced
+    session = api.build_session()
+    if tracer is not None:
+        tracer.attach(session)
+
+    # Client holding a pooled session and cached tokens for the wiki
+    with api.ApiClient(util.build_api_php_url(mwurl), session,
+            page_cache) as client:
+        if not log_in(client, *credentials, lang, edit_rates=edit_rates):
+            return False
+
+        synced_revisions = sync_state[client.api_php]
+
+        # Bring the wiki up to date with changes made while not watching
+        is_synced = push_files(client, files, local_file_hashes,
+            synced_revisions, lang)
+
+        try:
+            # Acquire the edit token now so that every save costs one request
+            client.csrf_token
+        except (requests.exceptions.RequestException,
+                json.decoder.JSONDecodeError, AssertionError, KeyError):
+            pass
+
+        def push_changes(changed):
+            for local_path in sorted(changed):
+                try:
+                    local_sha1 = api.get_file_sha1(local_path)
+                except FileNotFoundError:
+                    # Deleted, or caught midway through being replaced
+                    continue
+
+                # Skip saves that leave the content as last pushed
+                if local_sha1 == local_file_hashes[local_path]:
+                    continue
+
+                mediawiki_file_name = files[local_path]
+                if push_file(client, local_path, mediawiki_file_name,
+                        local_sha1, synced_revisions.get(mediawiki_file_name,
+                        {}).get("revid"), synced_revisions, lang):
+                    local_file_hashes[local_path] = local_sha1
+
+            try:
+                # Record the synced revisions in case the watch is interrupted
+                save_sync_state(sync_state)
+            except OSError:
+                util.log_msg(lang["e_sync_state"], sys.stderr)
+
+        util.log_msg(lang["s_watch"])
+
+        try:
+            watch.watch(files, push_changes, debounce)
+        except KeyboardInterrupt:
+            pass
+
+        return is_synced
+
 
 def main():
     """
@@ -45,125 +1813,295 @@ def main():
         action = argv[0]
     except IndexError:
         action = util.prompt_for_value(lang["p_action"])
+        argv = [action]
 
-    # Only push and pull are supported at present
-    if action != "pull" and action != "push":
+    # Only actions handled below are supported
+    if action not in ACTIONS:
         util.log_msg(lang["e_action"], sys.stderr)
         sys.exit(1)
 
-    try:
-        # Link to the file from which to pull or to which to push
-        mwurl = argv[1]
-    except IndexError:
-        mwurl = util.prompt_for_value(lang["p_mwurl"])
+    args = build_argument_parser().parse_args(argv)
 
-    # Only Fandom wikis are supported as wiki-side locations
-    if not util.is_fandom_wiki_url(mwurl):
-        util.log_msg(lang["e_mwurl"], sys.stderr)
-        sys.exit(1)
+    # Manifest listing the files to sync should no single file be specified
+    manifest_path = getattr(args, "manifest", None) or MANIFEST_FILE
 
-    try:
-        # File in repo to be used as source or replaced by content from file
-        local_path = argv[2]
-    except IndexError:
-        local_path = util.prompt_for_value(lang["p_local_path"])
+    # Category, namespace or template whose members are to be searched
+    members = next(((member_type, getattr(args, member_type))
+        for member_type in api.MEMBER_LISTS
+        if getattr(args, member_type, None) is not None), None)
 
-    try:
-        # Grab contents as a means of checking if the local file exists
-        local_file_contents = util.get_file_contents(local_path)
-    except FileNotFoundError:
-        util.log_msg(lang["e_local_path"], sys.stderr)
-        sys.exit(1)
+    if action == "batch":
+        try:
+            # May throw IOError or UnicodeDecodeError
+            lines = util.get_file_contents(args.batch_file).splitlines()\
+                if args.batch_file else sys.stdin.readlines()
+        except (IOError, UnicodeDecodeError):
+            util.log_msg(lang["e_batch"], sys.stderr)
+            sys.exit(1)
 
-    try:
-        # Check if settings.ini file is present
-        (parser := configparser.ConfigParser()).read("settings.ini")
-        credentials = parser["DEFAULT"].values()
-    except KeyError:
-        # Prompt for manual inclusion if not
-        if sys.stdin.isatty():
-            util.log_msg(lang["p_intro"], sys.stdout)
-            credentials = [arg.rstrip() for arg in sys.stdin.readlines()]
-        else:
+        # Every command is checked before any of them is run
+        jobs = load_batch_jobs(lines, lang)
+        if jobs is None:
             sys.exit(1)
 
-    # Remove any empty strings from the outset to catch empty input
-    credentials = list(filter(None, credentials))
+        mwurl, files = None, {}
+    elif action == "replace":
+        mwurl = args.mwurl
 
-    # Unpack the input list
-    username, password = credentials
+        try:
+            # Define regex, etc. only once using partial application
+            replacer = replace.replace_occurrences(replace.build_regexp(
+                args.target, args.regex, not args.case_insensitive),
+                args.replacement, args.indices)
+        except re.error:
+            util.log_msg(lang["e_regex"], sys.stderr)
+            sys.exit(1)
 
-    # New requests.Session object
-    session = requests.Session()
+        try:
+            # Pages on which to find and replace, in lieu of local files
+            files = load_page_names(args.pages) if members is None else []
+        except IOError:
+            util.log_msg(lang["e_pages"], sys.stderr)
+            sys.exit(1)
+    elif action == "find":
+        mwurl = args.mwurl
 
-    # Link to wiki's api.php resource
-    api_php = util.build_api_php_url(mwurl)
+        try:
+            regexp = replace.build_regexp(args.target, args.regex,
+                not args.case_insensitive)
+        except re.error:
+            util.log_msg(lang["e_regex"], sys.stderr)
+            sys.exit(1)
 
-    # Fandom login flag
-    is_logged_in = False
+        try:
+            # Pages to which to confine the search, if any
+            files = load_page_names(args.pages) if args.pages else None
+        except IOError:
+            util.log_msg(lang["e_pages"], sys.stderr)
+            sys.exit(1)
+    elif action == "history":
+        mwurl = args.mwurl
 
-    try:
-        # Log in, catching bad credentials in the process
-        is_logged_in = api.login(username, password, api_php, session)
-    except (requests.exceptions.HTTPError, json.decoder.JSONDecodeError):
-        util.log_msg(lang["e_login_api"], sys.stderr)
-    except (AssertionError, KeyError):
-        util.log_msg(lang["e_login"], sys.stderr)
-    finally:
-        # Only proceed with main script if logged in and in right groups
-        if is_logged_in:
-            util.log_msg(lang["s_login"], sys.stdout)
-        else:
+        # Only a URL pointing to a page is usable
+        try:
+            files = {None: util.get_mediawiki_page_name(mwurl)}
+        except IndexError:
+            files = None
+    elif action == "mirror":
+        mwurl = args.mwurl
+
+        # Prefixes stand in for local files
+        files = dict.fromkeys(args.prefixes)
+    elif action == "message":
+        mwurl = args.mwurl
+
+        # Titles of threads and topics are bound by the rules of page titles
+        if not message.is_legal_input(args.subject):
+            util.log_msg(lang["e_subject"], sys.stderr)
             sys.exit(1)
 
-    # Grab file name from URL (https://eizen.fandom.com/wiki/Test -> Test)
-    mediawiki_file_name = util.get_mediawiki_page_name(mwurl)
+        try:
+            # May throw IOError or UnicodeDecodeError
+            body = util.get_file_contents(args.body)
+        except (IOError, UnicodeDecodeError):
+            util.log_msg(lang["e_body"], sys.stderr)
+            sys.exit(1)
 
-    # Pull requests, pulling content from Fandom to local repo
-    if action == "pull":
         try:
-            # Try to grab contents of MediaWiki file on Fandom wiki
-            mediawiki_file_contents = api.get_revision_content(
-                api_php, mediawiki_file_name, session)
-        except (requests.exceptions.HTTPError, json.decoder.JSONDecodeError):
-            util.log_msg(lang["e_get_content_api"], sys.stderr)
+            # Users to be messaged, in lieu of local files
+            files = load_page_names(args.users)
+        except IOError:
+            util.log_msg(lang["e_users"], sys.stderr)
             sys.exit(1)
-        except (AssertionError, KeyError):
-            util.log_msg(lang["e_get_content"], sys.stderr)
+    elif args.mwurl is None and\
+            (args.manifest or os.path.isfile(manifest_path)):
+        # Sync every file listed in the manifest
+        try:
+            mwurl, files = load_manifest(manifest_path)
+        except (IOError, json.decoder.JSONDecodeError, KeyError, TypeError):
+            util.log_msg(lang["e_manifest"], sys.stderr)
             sys.exit(1)
+    else:
+        # Link to the file from which to pull or to which to push
+        mwurl = args.mwurl or util.prompt_for_value(lang["p_mwurl"])
 
-        # Flag to keep track of success of file writing of new content
-        is_written = False
+        # File in repo to be used as source or replaced by content from file
+        local_path = args.local_path or\
+            util.prompt_for_value(lang["p_local_path"])
+
+        # Only a URL pointing to a page is usable without a manifest
         try:
-            # Determine if some content was successfully written
-            is_written =\
-                util.write_to_file(mediawiki_file_contents, local_path) > 0
-        except IOError:
-            util.log_msg(lang["e_write_to_file"], sys.stderr)
-        finally:
-            if is_written:
-                util.log_msg(lang["s_write_to_file"], sys.stdout)
+            files = {local_path: util.get_mediawiki_page_name(mwurl)}
+        except IndexError:
+            files = None
+
+    # Push to each of the listed wikis in place of the page's own wiki
+    wikis = getattr(args, "wikis", None) or ([job["wiki"] for job in jobs]
+        if action == "batch" else [mwurl])
+
+    # Only Fandom wikis are supported as wiki-side locations
+    if not all(map(util.is_fandom_wiki_url, wikis)) or\
+            not (files or members or action in ("batch", "find")):
+        util.log_msg(lang["e_mwurl"], sys.stderr)
+        sys.exit(1)
+
+    local_file_hashes = {}
+    for local_path in files if action in ("diff", "pull", "push", "watch")\
+            else ():
+        try:
+            # Hash contents as a means of checking if the local file exists
+            local_file_hashes[local_path] = api.get_file_sha1(local_path)
+        except FileNotFoundError:
+            log_sync_msg(lang["e_local_path"], local_path, text_io=sys.stderr)
+            sys.exit(1)
+
+    # Minify files to be pushed, reusing the outputs of earlier builds
+    built_paths = build_files(files, local_file_hashes, lang,
+        args.prune_i18n) if getattr(args, "minify", False) else {}
+    if built_paths is None:
+        sys.exit(1)
+
+    # Check if settings.ini file is present
+    (parser := configparser.ConfigParser()).read("settings.ini")
+
+    if action in ("diff", "find", "history", "mirror"):
+        # Diffs, searches, histories and mirrors are made anonymously if at all
+        username = password = None
+    else:
+        try:
+            credentials = parser["DEFAULT"].values()
+        except KeyError:
+            # Prompt for manual inclusion if not
+            if sys.stdin.isatty():
+                util.log_msg(lang["p_intro"], sys.stdout)
+                credentials = [arg.rstrip() for arg in sys.stdin.readlines()]
             else:
                 sys.exit(1)
 
-    # Push requests, pushing updates from local repo to Fandom MediaWiki file
-    elif action == "push":
+        # Remove any empty strings from the outset to catch empty input
+        credentials = list(filter(None, credentials))
+
+        # Unpack the input list
+        username, password = credentials
+
+    try:
+        # Grab any edit rates configured per user group
+        edit_rates = load_edit_rates(parser)
+    except ValueError:
+        util.log_msg(lang["e_ratelimits"], sys.stderr)
+        sys.exit(1)
+
+    try:
+        # Content of pages fetched by previous runs, shared by all wikis
+        page_cache = cache.PageCache(CACHE_DIR, load_cache_size(parser))
+    except ValueError:
+        util.log_msg(lang["e_cache_size"], sys.stderr)
+        sys.exit(1)
 
-        # Flag to keep track of a successful POST request to Action API
-        is_posted = False
+    # Record of every API call made, if requested
+    tracer = trace.Tracer() if args.trace else None
+
+    # Revisions of the wiki's pages as of the last sync of each local file
+    sync_state = load_sync_state()
+    for wiki in wikis:
+        sync_state.setdefault(util.build_api_php_url(wiki), {})
+
+    if action == "batch":
+        is_synced = run_batch(jobs, (username, password), sync_state, lang,
+            edit_rates, page_cache, tracer)
+    elif action == "find":
+        is_synced = {mwurl: find_wiki(mwurl, regexp, lang, members, files,
+            page_cache, tracer)}
+    elif action == "mirror":
+        is_synced = {mwurl: mirror_wiki(mwurl, list(files), args.directory,
+            lang, args.interval, tracer)}
+    elif action == "history":
+        is_synced = {mwurl: history_wiki(mwurl, lang, args.revision,
+            args.output, args.list, tracer)}
+    elif action == "diff":
+        is_synced = {mwurl: diff_wiki(mwurl, files, local_file_hashes,
+            sync_state, lang, args.refresh, page_cache, tracer)}
+    elif action in ("message", "replace"):
         try:
-            # Query action=edit endpoint of MW Action API
-            is_posted = api.post_new_content(
-                api_php, local_file_contents, mediawiki_file_name, session)
-        except (requests.exceptions.HTTPError, json.decoder.JSONDecodeError):
-            util.log_msg(lang["e_post_content_api"], sys.stderr)
-        except (AssertionError, KeyError):
-            util.log_msg(lang["e_post_content"], sys.stderr)
-        finally:
-            if is_posted:
-                util.log_msg(lang["s_post_content"], sys.stdout)
+            # Progress of the run, continuing that of an earlier run if resumed
+            run_journal = journal.Journal(get_journal_file(
+                util.build_api_php_url(mwurl), [args.subject, body, files]
+                if action == "message" else [args.target, args.replacement,
+                args.regex, args.case_insensitive, args.indices, args.summary,
+                members or files]), args.resume)
+        except OSError:
+            util.log_msg(lang["e_journal"], sys.stderr)
+            sys.exit(1)
+
+        if run_journal.done or run_journal.failed or run_journal.continuation:
+            util.log_msg(lang["s_resume"])
+
+        with run_journal:
+            if action == "message":
+                is_synced = {mwurl: message_wiki(mwurl, files, args.subject,
+                    body, (username, password), lang, edit_rates, tracer,
+                    run_journal)}
             else:
-                sys.exit(1)
+                is_synced = {mwurl: replace_wiki(mwurl, files, replacer,
+                    (username, password), lang, args.summary, args.jobs,
+                    edit_rates, members, page_cache, tracer, run_journal)}
+    elif action == "watch":
+        is_synced = {mwurl: watch_wiki(mwurl, files, local_file_hashes,
+            (username, password), sync_state, lang, args.debounce, edit_rates,
+            page_cache, tracer)}
+    elif len(wikis) == 1:
+        is_synced = {wikis[0]: sync_wiki(action, wikis[0], files,
+            local_file_hashes, (username, password), sync_state, lang,
+            edit_rates=edit_rates, page_cache=page_cache, tracer=tracer,
+            built_paths=built_paths)}
+    else:
+        # Log in and push to every wiki at once, each with its own session
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, args.jobs)) as executor:
+            futures = {
+                wiki: executor.submit(sync_wiki, action, wiki, files,
+                    local_file_hashes, (username, password), sync_state,
+                    lang, urllib.parse.urlparse(wiki).netloc, edit_rates,
+                    page_cache, tracer, built_paths)
+                for wiki in wikis
+            }
+
+        is_synced = {}
+        for wiki, future in futures.items():
+            try:
+                is_synced[wiki] = future.result()
+            except requests.exceptions.RequestException:
+                is_synced[wiki] = False
+
+        # Summarize the outcome for each wiki once all have finished
+        for wiki, is_wiki_synced in is_synced.items():
+            log_sync_msg(lang["s_deploy" if is_wiki_synced else "e_deploy"],
+                urllib.parse.urlparse(wiki).netloc,
+                text_io=sys.stdout if is_wiki_synced else sys.stderr)
+
+    try:
+        # Record the synced revisions for the next run
+        save_sync_state(sync_state)
+    except OSError:
+        util.log_msg(lang["e_sync_state"], sys.stderr)
+
+    try:
+        # Record the contents of the cache for the next run
+        page_cache.save()
+    except OSError:
+        util.log_msg(lang["e_cache"], sys.stderr)
+
+    if tracer is not None:
+        # Break down where the time of the run went
+        util.log_msg(tracer.format_summary())
+
+        try:
+            tracer.write(args.trace)
+        except OSError:
+            util.log_msg(lang["e_trace"], sys.stderr)
+
+    if not all(is_synced.values()):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,19 @@
 __all__ = [
     "api",
-    "util"
+    "bench",
+    "build",
+    "cache",
+    "fakewiki",
+    "history",
+    "index",
+    "journal",
+    "message",
+    "mirror",
+    "replace",
+    "scheduler",
+    "trace",
+    "util",
+    "watch"
 ]
 __author__ = "Andrew Eissen"
 __version__ = "1.0"
\ No newline at end of file
@@ -9,14 +9,403 @@ values for calling functions.
 """
 
 __all__ = [
+    "ApiClient",
+    "ApiError",
+    "build_session",
+    "edit_page",
+    "get_category_members",
+    "get_content_sha1",
+    "get_file_sha1",
+    "get_latest_revisions",
+    "get_member_revisions",
+    "get_namespace_members",
+    "get_page_info",
+    "get_prefix_revisions",
+    "get_recent_changes",
     "get_revision_content",
+    "get_revision_history",
+    "get_revisions_content",
+    "get_site_info",
+    "get_template_transclusions",
+    "get_user_info",
+    "get_users",
+    "has_message_walls",
     "login",
-    "post_new_content"
+    "parse_wikitext",
+    "post_message_wall_thread",
+    "post_new_content",
+    "post_talk_page_topic"
 ]
 __author__ = "Andrew Eissen"
 __version__ = "0.1"
 
-import requests
+import hashlib
+import http
+import os
+
+import dev.util as util
+
+# Loaded on first use, so that offline actions need not wait on networking
+util.lazy_import("http.cookiejar")
+requests = util.lazy_import("requests")
+scheduler = util.lazy_import("dev.scheduler")
+
+# Maximum number of titles the API accepts per query for non-bot accounts
+MAX_TITLES_PER_QUERY = 50
+
+# Number of keep-alive connections pooled per wiki by ``ApiClient``
+POOL_SIZE = 10
+
+# Size in bytes beyond which files are pushed as streamed multipart/form-data
+MULTIPART_THRESHOLD = 64 * 1024
+
+# Size in bytes of the blocks in which files are read when hashed
+READ_BLOCK_SIZE = 64 * 1024
+
+# Namespace of the Message Wall pages of wikis on which walls are enabled
+MESSAGE_WALL_NAMESPACE = 1200
+
+# Empty attachments accompanying each new Message Wall thread
+WALL_ATTACHMENTS = '{"contentImages":[],"openGraphs":[],"atMentions":[]}'
+
+# List modules enumerating member pages, their prefixes and target parameters
+MEMBER_LISTS = {
+    "categories": ("categorymembers", "cm", "cmtitle"),
+    "namespaces": ("allpages", "ap", "apnamespace"),
+    "templates": ("embeddedin", "ei", "eititle")
+}
+
+
+class ApiError(AssertionError):
+    """
+    The ``ApiError`` exception is raised whenever a response from the MediaWiki
+    Action API carries an error object. It subclasses ``AssertionError`` so that
+    callers catching the latter, as ``dev.py`` does, continue to handle it,
+    while exposing the API's error ``code`` (``badtoken``, ``ratelimited``,
+    etc.) to callers that need to react to specific failures.
+    """
+
+    def __init__(self, code, info=""):
+        super().__init__(f"{code}: {info}" if info else code)
+        self.code = code
+        self.info = info
+
+
+class ApiClient:
+    """
+    The ``ApiClient`` class wraps the module's functions for repeated use
+    against a single wiki. It owns one ``requests.Session`` whose connection
+    pool keeps connections to the wiki alive between requests, and it caches
+    the CSRF token after the first edit, refreshing it only if the API rejects
+    it with a ``badtoken`` error. Bulk edits thereby cost one request apiece
+    rather than two. If given a page cache, such as a ``dev.cache.PageCache``,
+    the client serves page content from the cache whenever it is current.
+    """
+
+    def __init__(self, api_php, session=None, cache=None):
+        """
+        The ``ApiClient`` constructor sets up the pooled session used for all
+        of the client's requests.
+            :param api_php: The full URL pointing to the MediaWiki Action API
+                `api.php` resource
+            :param session: An optional `requests.Session` object. If no
+                session is passed, a new pooled session is instantiated.
+            :param cache: An optional page cache providing
+                ``get_latest_revisions``, ``get_member_revisions`` and
+                ``get_revisions`` methods
+        """
+        self.api_php = api_php
+        self.session = session or build_session()
+        self.cache = cache
+        self._csrf_token = None
+        self._user_info = None
+
+        # Requests through sessions other than ScheduledSession are unpaced
+        self.scheduler = getattr(self.session, "scheduler", None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _post_with_token(self, post, *args):
+        """
+        The private ``_post_with_token`` method calls a posting function of the
+        module with the cached CSRF token, acquiring a fresh token and retrying
+        once should the API reject the cached one with a ``badtoken`` error.
+            :param post: A function of the module accepting ``session`` and
+                ``token`` keyword arguments
+            :param args: The positional arguments following ``api_php``
+            :return: The return value of ``post``
+        """
+        try:
+            return post(self.api_php, *args, session=self.session,
+                token=self.csrf_token)
+        except ApiError as error:
+            if error.code != "badtoken":
+                raise
+            self._csrf_token = None
+            return post(self.api_php, *args, session=self.session,
+                token=self.csrf_token)
+
+    @property
+    def csrf_token(self):
+        """
+        The ``csrf_token`` property returns the cached CSRF token, acquiring
+        one from the API on first access.
+            :return: A string CSRF token for use in ``POST`` requests
+        """
+        if self._csrf_token is None:
+            self._csrf_token = _get_csrf_token(self.api_php, self.session)
+        return self._csrf_token
+
+    def close(self):
+        """
+        The ``close`` method closes the client's session and all pooled
+        connections.
+            :return: None
+        """
+        self.session.close()
+
+    def configure_edit_rate(self, edit_rates=None):
+        """
+        The ``configure_edit_rate`` method sizes the scheduler's edit token
+        bucket to the rate at which the user may edit. By default, the rate
+        limits the wiki reports for the user via ``uiprop=ratelimits`` are used,
+        though rates given in ``edit_rates`` for any of the user's groups take
+        precedence. Where several rates apply, the most permissive wins, as it
+        does in MediaWiki; where none do, as for users with the
+        ``noratelimit`` right, edits are left unthrottled.
+            :param edit_rates: An optional dictionary mapping user group names
+                to tuples of permitted edits and the period in seconds over
+                which they are permitted, i.e. ``{"user": (90, 60)}``
+            :return: The tuple of edits and seconds applied, or ``None``
+        """
+        # Reuse the user info fetched when checking the session, if any
+        user_info = self._user_info or self.get_user_info("groups|ratelimits")
+
+        # Only rates for groups to which the user belongs are relevant
+        rates = [rate for group, rate in (edit_rates or {}).items()
+            if group in user_info.get("groups", [])]
+
+        if not rates:
+            rates = [(limit["hits"], limit["seconds"]) for limit in
+                user_info.get("ratelimits", {}).get("edit", {}).values()]
+
+        rate = max(rates, key=lambda hits_seconds:
+            hits_seconds[0] / hits_seconds[1]) if rates else None
+
+        if self.scheduler is not None:
+            self.scheduler.set_edit_rate(*(rate or (None, None)))
+
+        return rate
+
+    def edit_page(self, content, page, baserevid=None, summary=""):
+        """
+        The ``edit_page`` method edits a page using the cached CSRF token.
+        Should the token have expired, the API responds with a ``badtoken``
+        error, in which case a fresh token is acquired and the edit is retried
+        once.
+            :param content: A string representing the new content of the page,
+                or a binary file object from which to stream the content
+            :param page: A string representing the name of the page to edit
+            :param baserevid: An optional revision ID on which the edit is
+                based. If the page has changed since, the edit fails with an
+                ``editconflict`` error.
+            :param summary: An optional string representing the edit summary
+            :return: The dictionary describing the edit returned by the API
+        """
+
+        # Note the file's position so that a retried edit resends it in full
+        start = content.tell() if hasattr(content, "read") else None
+        try:
+            return edit_page(self.api_php, content, page, self.session,
+                self.csrf_token, baserevid, summary)
+        except ApiError as error:
+            if error.code != "badtoken":
+                raise
+            self._csrf_token = None
+            if start is not None:
+                content.seek(start)
+            return edit_page(self.api_php, content, page, self.session,
+                self.csrf_token, baserevid, summary)
+
+    def get_category_members(self, category):
+        return get_category_members(self.api_php, category, self.session)
+
+    def get_latest_revisions(self, pages, content=False):
+        if content and self.cache is not None:
+            return self.cache.get_latest_revisions(self.api_php, pages,
+                self.session)
+        return get_latest_revisions(self.api_php, pages, self.session, content)
+
+    def get_member_revisions(self, member_type, entry, content=False,
+            continuation=None, on_continue=None):
+        if content and self.cache is not None:
+            return self.cache.get_member_revisions(self.api_php, member_type,
+                entry, self.session, continuation, on_continue)
+        return get_member_revisions(self.api_php, member_type, entry,
+            self.session, content, continuation, on_continue)
+
+    def get_namespace_members(self, namespace):
+        return get_namespace_members(self.api_php, namespace, self.session)
+
+    def get_page_info(self, pages):
+        return get_page_info(self.api_php, pages, self.session)
+
+    def get_prefix_revisions(self, namespace, prefix, content=False):
+        return get_prefix_revisions(self.api_php, namespace, prefix,
+            self.session, content)
+
+    def get_recent_changes(self, start, namespaces):
+        return get_recent_changes(self.api_php, start, namespaces,
+            self.session)
+
+    def get_revision_content(self, page):
+        # May throw KeyError if the page does not exist
+        return self.get_revisions_content([page])[page]
+
+    def get_revision_history(self, page, start_id=None):
+        return get_revision_history(self.api_php, page, self.session, start_id)
+
+    def get_revisions(self, revisions):
+        """
+        The ``get_revisions`` method adds content to revisions whose IDs are
+        already known, such as those enumerated by ``get_member_revisions``
+        without content. If the client has a cache, content is served from it
+        where possible; otherwise the pages' latest revisions are fetched.
+            :param revisions: A dictionary mapping page names to dictionaries
+                of their latest revisions
+            :return: A dictionary mapping page names to dictionaries of their
+                latest revisions, content included
+        """
+        if self.cache is not None:
+            return self.cache.get_revisions(self.api_php, revisions,
+                self.session)
+        return get_latest_revisions(self.api_php, revisions, self.session,
+            True) if revisions else {}
+
+    def get_revisions_content(self, pages):
+        if self.cache is not None:
+            return {
+                page: revision["content"]
+                for page, revision in self.get_latest_revisions(pages,
+                    True).items()
+            }
+        return get_revisions_content(self.api_php, pages, self.session)
+
+    def get_site_info(self, properties="general"):
+        return get_site_info(self.api_php, self.session, properties)
+
+    def get_template_transclusions(self, template):
+        return get_template_transclusions(self.api_php, template, self.session)
+
+    def get_user_info(self, properties=None):
+        return get_user_info(self.api_php, self.session, properties)
+
+    def get_users(self, users, active_since=None):
+        return get_users(self.api_php, users, self.session, active_since)
+
+    def has_message_walls(self):
+        return has_message_walls(self.api_php, self.session)
+
+    def is_logged_in_as(self, username):
+        """
+        The ``is_logged_in_as`` method checks by means of a single
+        ``meta=userinfo`` query whether the client's session is still
+        authenticated as the given user. Bot password user names of the form
+        ``User@BotName`` are matched against the account name ``User``.
+            :param username: A string representing the expected user name
+            :return: A status boolean indicating whether the session belongs to
+                the user
+        """
+        user_info = self._user_info = self.get_user_info("groups|ratelimits")
+        return "anon" not in user_info and\
+            user_info["name"] == username.split("@")[0]
+
+    def load_cookies(self, cookie_file):
+        """
+        The ``load_cookies`` method restores the cookies of a session saved by
+        ``save_cookies`` into the client's session, permitting a previously
+        authenticated session to be reused without logging in again.
+            :param cookie_file: A string indicating the location of the saved
+                cookie jar
+            :return: A status boolean indicating whether any cookies were loaded
+        """
+        jar = http.cookiejar.LWPCookieJar(cookie_file)
+        try:
+            jar.load(ignore_discard=True)
+        except (OSError, http.cookiejar.LoadError):
+            return False
+
+        for cookie in jar:
+            self.session.cookies.set_cookie(cookie)
+
+        # Any cached token belonged to the previous session
+        self._csrf_token = None
+        self._user_info = None
+        return len(jar) > 0
+
+    def login(self, username, password):
+        # Tokens are bound to the session's user, so discard any cached one
+        self._csrf_token = None
+        self._user_info = None
+        return login(username, password, self.api_php, self.session)
+
+    def parse_wikitext(self, text):
+        return parse_wikitext(self.api_php, text, self.session)
+
+    def post_message_wall_thread(self, wall_owner_id, title, json_model):
+        return self._post_with_token(post_message_wall_thread, wall_owner_id,
+            title, json_model)
+
+    def post_new_content(self, content, page, baserevid=None):
+        # May throw KeyError
+        return self.edit_page(content, page, baserevid)["result"] == "Success"
+
+    def post_talk_page_topic(self, page, section_title, text):
+        return self._post_with_token(post_talk_page_topic, page,
+            section_title, text)
+
+    def save_cookies(self, cookie_file):
+        """
+        The ``save_cookies`` method writes the cookies of the client's session
+        to disk, including session cookies that would otherwise be discarded on
+        exit. As these cookies authenticate the user, the file and its
+        directory are made readable by their owner alone.
+            :param cookie_file: A string indicating the location at which to
+                save the cookie jar
+            :return: None
+        """
+        jar = http.cookiejar.LWPCookieJar(cookie_file)
+        for cookie in self.session.cookies:
+            jar.set_cookie(cookie)
+
+        os.makedirs(os.path.dirname(cookie_file) or ".", mode=0o700,
+            exist_ok=True)
+        jar.save(ignore_discard=True)
+
+        # Files created before the jar was saved retain their former mode
+        os.chmod(cookie_file, 0o600)
+
+
+def _check_for_errors(data):
+    """
+    The private ``_check_for_errors`` function inspects a decoded API response
+    for an error object, raising an ``ApiError`` bearing the error code if one
+    is present. Both the default ``error`` object and the ``errors`` list
+    returned when ``errorformat`` is specified are recognized.
+        :param data: The decoded JSON response from the API
+        :return: None
+    """
+    if "error" in data:
+        raise ApiError(data["error"].get("code", ""),
+            data["error"].get("info", ""))
+    elif "errors" in data:
+        error = (data["errors"] or [{}])[0]
+        raise ApiError(error.get("code", ""),
+            error.get("text", error.get("*", "")))
 
 
 def _get_csrf_token(api_php, session=None):
@@ -49,7 +438,7 @@ def _get_csrf_token(api_php, session=None):
     data = request.json()
 
     # May throw AssertionError
-    assert ("errors" not in data)
+    _check_for_errors(data)
 
     # May throw KeyError
     token = data["query"]["tokens"]["csrftoken"]
@@ -85,7 +474,7 @@ def _get_login_token(api_php, session=None):
     data = request.json()
 
     # May throw AssertionError
-    assert ("errors" not in data)
+    _check_for_errors(data)
 
     # May throw KeyError
     token = data["query"]["tokens"]["logintoken"]
@@ -93,13 +482,612 @@ def _get_login_token(api_php, session=None):
     return token
 
 
-def get_revision_content(api_php, page, session=None):
-    request = (session or requests.Session()).get(url=api_php, params={
+def _get_members(api_php, member_type, entry, session=None):
+    """
+    The private ``_get_members`` generator function enumerates the members of a
+    category, namespace or template by means of the corresponding ``list``
+    module, as ``main.getMemberPages`` does in the JavaScript application.
+    Titles are yielded as each batch of up to 5000 arrives, so that callers may
+    begin work on the first batch and need never hold the full list in memory.
+        :param api_php: The full URL pointing to the MediaWiki Action API
+            `api.php` resource
+        :param member_type: A key of ``MEMBER_LISTS``, i.e. ``"categories"``
+        :param entry: The category or template title or namespace number whose
+            members are desired
+        :param session: An optional `requests.Session` object. If no session is
+            passed, a new `requests.Session` is instantiated for the function.
+        :return: A generator yielding the title of each member page
+    """
+    query, prefix, target = MEMBER_LISTS[member_type]
+
+    # May throw HTTPError, JSONDecodeError, AssertionError, or KeyError
+    for data in _iterate_query(api_php, {
+        "list": query,
+        f"{prefix}limit": "max",
+        target: entry
+    }, session):
+        for member in data["query"][query]:
+            yield member["title"]
+
+
+def _get_revision(entry, content=False):
+    """
+    The private ``_get_revision`` helper function extracts the ID, SHA-1 hash
+    and, if requested, content of the latest revision from a page object
+    returned by a ``prop=revisions`` query.
+        :param entry: A dictionary representing the page object
+        :param content: An optional boolean indicating whether the content of
+            the revision should be included
+        :return revision: A dictionary holding the ``revid``, ``sha1`` and, if
+            requested, ``content`` of the revision
+    """
+
+    # May throw KeyError
+    latest = entry["revisions"][0]
+    revision = {
+        "revid": latest["revid"],
+        "sha1": latest["sha1"]
+    }
+    if content:
+        revision["content"] = latest["slots"]["main"]["content"]
+
+    return revision
+
+
+def _iterate_query(api_php, params, session=None, continuation=None):
+    """
+    The private ``_iterate_query`` generator function performs a query and any
+    number of continuations thereof, yielding each response as it arrives. The
+    modern ``continue`` scheme is used in place of the legacy ``rawcontinue``
+    and ``query-continue`` scheme of the JavaScript application; the values of
+    the ``continue`` object of each response are simply merged into the
+    parameters of the next request until none is returned.
+        :param api_php: The full URL pointing to the MediaWiki Action API
+            `api.php` resource
+        :param params: A dictionary of the query's parameters
+        :param session: An optional `requests.Session` object. If no session is
+            passed, a new `requests.Session` is instantiated for the function.
+        :param continuation: An optional ``continue`` object of an earlier
+            response from which to resume the query
+        :return: A generator yielding the decoded data of each response
+    """
+
+    session = session or requests.Session()
+    params = {
         "action": "query",
+        "continue": "",
+        "formatversion": 2,
+        "format": "json",
+        **params,
+        **(continuation or {})
+    }
+
+    while True:
+        request = session.get(url=api_php, params=params)
+
+        # May throw requests.exceptions.HTTPError
+        request.raise_for_status()
+
+        # May throw JSONDecodeError
+        data = request.json()
+
+        # May throw AssertionError
+        _check_for_errors(data)
+
+        yield data
+
+        if "continue" not in data:
+            return
+        params.update(data["continue"])
+
+
+def _query_pages(api_php, pages, params, session=None):
+    """
+    The private ``_query_pages`` generator function performs a ``prop`` query
+    for any number of pages, packing up to ``MAX_TITLES_PER_QUERY`` titles into
+    each request. Titles normalized by the API (``mediaWiki:Foo`` ->
+    ``MediaWiki:Foo``) are mapped back to the titles originally requested so
+    that callers may look up results by the names they passed, and pages that
+    do not exist are skipped.
+        :param api_php: The full URL pointing to the MediaWiki Action API
+            `api.php` resource
+        :param pages: An iterable of strings representing the names of the
+            desired pages
+        :param params: A dictionary of the query's ``prop`` parameters
+        :param session: An optional `requests.Session` object. If no session is
+            passed, a new `requests.Session` is instantiated for the function.
+        :return: A generator yielding tuples of each requested page name and
+            the page object returned for it by the API
+    """
+
+    session = session or requests.Session()
+
+    for chunk in _split_into_chunks(list(pages), MAX_TITLES_PER_QUERY):
+        request = session.get(url=api_php, params={
+            "action": "query",
+            "titles": "|".join(chunk),
+            "formatversion": 2,
+            "format": "json",
+            **params
+        })
+
+        # May throw requests.exceptions.HTTPError
+        request.raise_for_status()
+
+        # May throw JSONDecodeError
+        data = request.json()
+
+        # May throw AssertionError
+        _check_for_errors(data)
+
+        # Map normalized titles back onto the titles originally requested
+        aliases = {title: title for title in chunk}
+        for entry in data["query"].get("normalized", []):
+            aliases[entry["to"]] = entry["from"]
+
+        # May throw KeyError
+        for entry in data["query"]["pages"]:
+            if "missing" in entry or "invalid" in entry:
+                continue
+            yield aliases.get(entry["title"], entry["title"]), entry
+
+
+def _split_into_chunks(items, size):
+    """
+    The private ``_split_into_chunks`` helper function divides a list into
+    successive sublists of at most ``size`` members apiece, as required by the
+    multi-value parameters of the MediaWiki API (``titles``, ``ususers``, etc.)
+    that only accept a limited number of values per query.
+        :param items: A list of values to be divided
+        :param size: An integer denoting the maximum length of each sublist
+        :return: A generator yielding the successive sublists
+    """
+    return (items[i:i + size] for i in range(0, len(items), size))
+
+
+def build_session(pool_size=POOL_SIZE, request_scheduler=None):
+    """
+    The ``build_session`` function creates a ``requests.Session`` whose
+    transport adapters keep up to ``pool_size`` connections alive per host, so
+    that successive requests to the same wiki reuse open connections rather
+    than performing a fresh TCP and TLS handshake each time. The session is a
+    ``ScheduledSession``, which sends every request with ``maxlag`` and retries
+    those refused on account of lag or rate limits.
+        :param pool_size: An optional integer denoting the number of pooled
+            connections per host
+        :param request_scheduler: An optional ``Scheduler`` pacing the
+            session's requests. If none is passed, a new one is created.
+        :return session: The new ``requests.Session`` object
+    """
+    session = scheduler.ScheduledSession(request_scheduler)
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size,
+        pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def edit_page(api_php, content, page, session=None, token=None,
+        baserevid=None, summary=""):
+    """
+    The ``edit_page`` function replaces the content of a page by means of the
+    ``action=edit`` endpoint. Unlike ``post_new_content``, which merely reports
+    success, it returns the API's description of the edit, including the
+    ``newrevid`` of the revision created, for callers tracking revisions.
+        :param api_php: The full URL pointing to the MediaWiki Action API
+            `api.php` resource
+        :param content: A string representing the new content of the page, or
+            a binary file object from which the content is streamed as
+            ``multipart/form-data``
+        :param page: A string representing the name of the page to edit
+        :param session: An optional `requests.Session` object. If no session is
+            passed, a new `requests.Session` is instantiated for the function.
+        :param token: An optional CSRF token. If no token is passed, a new one
+            is acquired for the edit.
+        :param baserevid: An optional revision ID on which the edit is based.
+            If the page has changed since, the edit fails with an
+            ``editconflict`` error.
+        :param summary: An optional string representing the edit summary
+        :return edit: A dictionary holding the ``result`` of the edit and, if
+            the content changed, the ``newrevid``
+    """
+
+    session = session or requests.Session()
+    data = {
+        "action": "edit",
+        "title": page,
+        "summary": summary,
+        "format": "json"
+    }
+
+    # Have the API reject the edit if the page has changed since baserevid
+    if baserevid is not None:
+        data["baserevid"] = baserevid
+
+    # The token is sent last so that truncated requests are rejected
+    data["text"] = content
+    data["token"] = token or _get_csrf_token(api_php, session)
+
+    if hasattr(content, "read"):
+        # Stream file content from disk without percent-encoding it
+        stream = util.MultipartStream(data)
+        request = session.post(api_php, data=stream,
+            headers={"Content-Type": stream.content_type})
+    else:
+        request = session.post(api_php, data=data)
+
+    # May throw requests.exceptions.HTTPError
+    request.raise_for_status()
+
+    # May throw JSONDecodeError
+    data = request.json()
+
+    # May throw AssertionError
+    _check_for_errors(data)
+
+    # May throw KeyError
+    edit = data["edit"]
+
+    return edit
+
+
+def get_category_members(api_php, category, session=None):
+    """
+    The ``get_category_members`` function is the counterpart of the JavaScript
+    ``main.getCategoryMembers`` method, lazily enumerating the titles of the
+    pages in a category by means of ``list=categorymembers``.
+        :param api_php: The full URL pointing to the MediaWiki Action API
+            `api.php` resource
+        :param category: A string representing the full title of the category,
+            i.e. ``Category:Foo``
+        :param session: An optional `requests.Session` object. If no session is
+            passed, a new `requests.Session` is instantiated for the function.
+        :return: A generator yielding the title of each member page
+    """
+    return _get_members(api_php, "categories", category, session)
+
+
+def get_content_sha1(content):
+    """
+    The ``get_content_sha1`` function computes the SHA-1 hash that MediaWiki
+    would record for a revision with the given content. As MediaWiki strips
+    trailing whitespace from page text on save, the same is done here so that
+    a local file ending in a newline matches its counterpart on the wiki.
+        :param content: A string representing the content of a page
+        :return: The hexadecimal SHA-1 hash of the content as a string
+    """
+    return hashlib.sha1(
+        content.rstrip(" \t\n\r\0\x0b").encode("UTF-8")).hexdigest()
+
+
+def get_file_sha1(file_path):
+    """
+    The ``get_file_sha1`` function computes the same hash as
+    ``get_content_sha1`` for the content of a file, reading the file in blocks
+    so that it need not be loaded into memory or decoded. Trailing whitespace
+    is excluded by withholding runs of whitespace from the hash until
+    non-whitespace content is found to follow them.
+        :param file_path: A path to the file to hash
+        :return: The hexadecimal SHA-1 hash of the content as a string
+    """
+
+    sha1 = hashlib.sha1()
+    pending = b""
+
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(READ_BLOCK_SIZE), b""):
+            stripped = block.rstrip(b" \t\n\r\0\x0b")
+            if stripped:
+                sha1.update(pending + stripped)
+                pending = b""
+            pending += block[len(stripped):]
+
+    return sha1.hexdigest()
+
+
+def get_latest_revisions(api_php, pages, session=None, content=False):
+    """
+    The ``get_latest_revisions`` function retrieves the ID and SHA-1 hash of the
+    most recent revisions of any number of pages, batching titles as
+    ``get_revisions_content`` does. By default the content itself is not
+    downloaded; comparing the hash with that of a local file (see
+    ``get_content_sha1``) reveals whether a push would change anything at all.
+        :param api_php: The full URL pointing to the MediaWiki Action API
+            `api.php` resource
+        :param pages: An iterable of strings representing the names of the
+            desired pages
+        :param session: An optional `requests.Session` object. If no session is
+            passed, a new `requests.Session` is instantiated for the function.
+        :param content: An optional boolean indicating whether the content of
+            the revisions should be retrieved as well
+        :return revisions: A dictionary mapping each requested page name to a
+            dictionary holding the ``revid``, ``sha1`` and, if requested,
+            ``content`` of its latest revision. Pages that do not exist are
+            absent from the dictionary.
+    """
+
+    # May throw HTTPError, JSONDecodeError, AssertionError, or KeyError
+    return {
+        page: _get_revision(entry, content)
+        for page, entry in _query_pages(api_php, pages, {
+            "prop": "revisions",
+            "rvslots": "*",
+            "rvprop": "ids|sha1|content" if content else "ids|sha1"
+        }, session)
+    }
+
+
+def get_member_revisions(api_php, member_type, entry, session=None,
+        content=False, continuation=None, on_continue=None):
+    """
+    The ``get_member_revisions`` function enumerates the members of a category,
+    namespace or template as ``get_category_members`` and the like do, but uses
+    the ``list`` module as a ``generator`` of a ``prop=revisions`` query so that
+    the latest revision of each member, and if requested its content, arrives in
+    the same round trip as its title. When content is requested, members are
+    generated ``MAX_TITLES_PER_QUERY`` at a time, the most for which the API
+    returns content in a single response. An interrupted enumeration may be
+    resumed from any ``continue`` object passed to ``on_continue``.
+        :param api_php: The full URL pointing to the MediaWiki Action API
+            `api.php` resource
+        :param member_type: A key of ``MEMBER_LISTS``, i.e. ``"categories"``
+        :param entry: The category or template title or namespace number whose
+            members are desired
+        :param session: An optional `requests.Session` object. If no session is
+            passed, a new `requests.Session` is instantiated for the function.
+        :param content: An optional boolean indicating whether the content of
+            the revisions should be retrieved as well
+        :param continuation: An optional ``continue`` object from which to
+            resume the enumeration
+        :param on_continue: An optional callable invoked with the ``continue``
+            object of each response once all of its members have been yielded
+        :return: A generator yielding tuples of each member's title and a
+            dictionary of its latest revision as returned by
+            ``get_latest_revisions``
+    """
+    query, prefix, target = MEMBER_LISTS[member_type]
+
+    # May throw HTTPError, JSONDecodeError, AssertionError, or KeyError
+    for data in _iterate_query(api_php, {
+        "generator": query,
+        f"g{prefix}limit": MAX_TITLES_PER_QUERY if content else "max",
+        f"g{target}": entry,
+        "prop": "revisions",
+        "rvslots": "*",
+        "rvprop": "ids|sha1|content" if content else "ids|sha1"
+    }, session, continuation):
+        for page in data.get("query", {}).get("pages", []):
+            # Pages left for a continuation of the same batch lack revisions
+            if "revisions" in page:
+                yield page["title"], _get_revision(page, content)
+
+        if on_continue is not None and "continue" in data:
+            on_continue(data["continue"])
+
+
+def get_namespace_members(api_php, namespace, session=None):
+    """
+    The ``get_namespace_members`` function is the counterpart of the JavaScript
+    ``main.getNamespaceMembers`` method, lazily enumerating the titles of the
+    pages in a namespace by means of ``list=allpages``.
+        :param api_php: The full URL pointing to the MediaWiki Action API
+            `api.php` resource
+        :param namespace: An integer denoting the number of the namespace
+        :param session: An optional `requests.Session` object. If no session is
+            passed, a new `requests.Session` is instantiated for the function.
+        :return: A generator yielding the title of each member page
+    """
+    return _get_members(api_php, "namespaces", namespace, session)
+
+
+def get_page_info(api_php, pages, session=None):
+    """
+    The ``get_page_info`` function retrieves basic information about any number
+    of pages by means of batched ``prop=info`` queries. Of particular interest
+    is the ``lastrevid`` of each page, which reveals whether a page has changed
+    since it was last synced without downloading its content or hash.
+        :param api_php: The full URL pointing to the MediaWiki Action API
+            `api.php` resource
+        :param pages: An iterable of strings representing the names of the
+            desired pages
+        :param session: An optional `requests.Session` object. If no session is
+            passed, a new `requests.Session` is instantiated for the function.
+        :return info: A dictionary mapping each requested page name to the page
+            object returned by the API, holding ``lastrevid``, ``touched``,
+            ``length``, etc. Pages that do not exist are absent from the
+            dictionary.
+    """
+
+    # May throw HTTPError, JSONDecodeError, AssertionError, or KeyError
+    return dict(_query_pages(api_php, pages, {"prop": "info"}, session))
+
+
+def get_prefix_revisions(api_php, namespace, prefix, session=None,
+        content=False):
+    """
+    The ``get_prefix_revisions`` function enumerates the pages of a namespace
+    whose titles begin with a given prefix, i.e. every subpage of a script, by
+    means of ``list=allpages`` used as the ``generator`` of a
+    ``prop=revisions`` query, so that the latest revision of each page, and if
+    requested its content, arrives in the same round trip as its title, as in
+    ``get_member_revisions``.
+        :param api_php: The full URL pointing to the MediaWiki Action API
+            `api.php` resource
+        :param namespace: An integer denoting the number of the namespace
+        :param prefix: A string representing the beginning of the titles of the
+            desired pages, without the namespace, i.e. ``"MassEdit/"``
+        :param session: An optional `requests.Session` object. If no session is
+            passed, a new `requests.Session` is instantiated for the function.
+        :param content: An optional boolean indicating whether the content of
+            the revisions should be retrieved as well
+        :return: A generator yielding tuples of each page's title and a
+            dictionary of its latest revision as returned by
+            ``get_latest_revisions``
+    """
+
+    # May throw HTTPError, JSONDecodeError, AssertionError, or KeyError
+    for data in _iterate_query(api_php, {
+        "generator": "allpages",
+        "gaplimit": MAX_TITLES_PER_QUERY if content else "max",
+        "gapnamespace": namespace,
+        "gapprefix": prefix,
+        "prop": "revisions",
+        "rvslots": "*",
+        "rvprop": "ids|sha1|content" if content else "ids|sha1"
+    }, session):
+        for page in data.get("query", {}).get("pages", []):
+            # Pages left for a continuation of the same batch lack revisions
+            if "revisions" in page:
+                yield page["title"], _get_revision(page, content)
+
+
+def get_recent_changes(api_php, start, namespaces, session=None):
+    """
+    The ``get_recent_changes`` function enumerates the edits, page creations
+    and log events, such as deletions and moves, made in the given namespaces
+    since a given time, oldest first, by means of ``list=recentchanges``. When
+    nothing has changed, the enumeration costs a single request returning no
+    changes at all. As the start time is inclusive, changes made at that very
+    second are enumerated again.
+        :param api_php: The full URL pointing to the MediaWiki Action API
+            `api.php` resource
+        :param start: A string representing an ISO 8601 timestamp, i.e.
+            ``"2024-01-01T00:00:00Z"``
+        :param namespaces: An iterable of integers denoting the numbers of the
+            namespaces of interest
+        :param session: An optional `requests.Session` object. If no session is
+            passed, a new `requests.Session` is instantiated for the function.
+        :return: A generator yielding a dictionary of each change holding its
+            ``type``, ``title``, ``timestamp``, ``rcid``, ``revid`` and, for
+            log events, ``logtype``, ``logaction`` and ``logparams``
+    """
+
+    # May throw HTTPError, JSONDecodeError, AssertionError, or KeyError
+    for data in _iterate_query(api_php, {
+        "list": "recentchanges",
+        "rcstart": start,
+        "rcdir": "newer",
+        "rcnamespace": "|".join(map(str, sorted(set(namespaces)))),
+        "rctype": "edit|new|log",
+        "rcprop": "title|timestamp|ids|loginfo",
+        "rclimit": "max"
+    }, session):
+        yield from data["query"]["recentchanges"]
+
+
+def get_revision_content(api_php, page, session=None):
+    """
+    The ``get_revision_content`` function retrieves the content of the most
+    recent revision of a single page. It is a thin convenience wrapper around
+    ``get_revisions_content`` for callers that only need one page.
+        :param api_php: The full URL pointing to the MediaWiki Action API
+            `api.php` resource
+        :param page: A string representing the name of the desired page
+        :param session: An optional `requests.Session` object. If no session is
+            passed, a new `requests.Session` is instantiated for the function.
+        :return content: A string representing the content of the page
+    """
+
+    # May throw KeyError if the page does not exist
+    return get_revisions_content(api_php, [page], session)[page]
+
+
+def get_revision_history(api_php, page, session=None, start_id=None):
+    """
+    The ``get_revision_history`` generator function enumerates the revisions of
+    a single page, oldest first, content included, by means of ``rvlimit=max``
+    queries continued by way of ``rvcontinue``. Passing the ID of the newest
+    revision already held as ``start_id`` limits the enumeration to revisions
+    made since. Revisions whose content or user has been hidden on the wiki are
+    yielded with ``None`` in place of the hidden values.
+        :param api_php: The full URL pointing to the MediaWiki Action API
+            `api.php` resource
+        :param page: A string representing the name of the desired page
+        :param session: An optional `requests.Session` object. If no session is
+            passed, a new `requests.Session` is instantiated for the function.
+        :param start_id: An optional integer denoting the ID of a revision after
+            which to begin the enumeration
+        :return: A generator yielding a dictionary holding the ``revid``,
+            ``parentid``, ``timestamp``, ``user``, ``comment``, ``sha1``,
+            ``size`` and ``content`` of each revision. Nothing is yielded if the
+            page does not exist.
+    """
+    params = {
         "prop": "revisions",
         "titles": page,
+        "rvslots": "main",
+        "rvprop": "ids|timestamp|user|comment|sha1|size|content",
+        "rvlimit": "max",
+        "rvdir": "newer"
+    }
+    if start_id is not None:
+        params["rvstartid"] = start_id + 1
+
+    # May throw HTTPError, JSONDecodeError, AssertionError, or KeyError
+    for data in _iterate_query(api_php, params, session):
+        for entry in data["query"]["pages"]:
+            for revision in entry.get("revisions", []):
+                yield {
+                    "revid": revision["revid"],
+                    "parentid": revision.get("parentid"),
+                    "timestamp": revision["timestamp"],
+                    "user": revision.get("user"),
+                    "comment": revision.get("comment"),
+                    "sha1": revision.get("sha1"),
+                    "size": revision.get("size"),
+                    "content": revision.get("slots", {}).get("main", {}).get(
+                        "content")
+                }
+
+
+def get_revisions_content(api_php, pages, session=None):
+    """
+    The ``get_revisions_content`` function retrieves the content of the most
+    recent revisions of any number of pages, packing up to
+    ``MAX_TITLES_PER_QUERY`` titles into each ``prop=revisions`` query so that
+    N pages cost roughly N/50 round trips rather than N.
+        :param api_php: The full URL pointing to the MediaWiki Action API
+            `api.php` resource
+        :param pages: An iterable of strings representing the names of the
+            desired pages
+        :param session: An optional `requests.Session` object. If no session is
+            passed, a new `requests.Session` is instantiated for the function.
+        :return contents: A dictionary mapping each requested page name to its
+            content. Pages that do not exist are absent from the dictionary.
+    """
+
+    contents = {}
+
+    # May throw HTTPError, JSONDecodeError, AssertionError, or KeyError
+    for page, entry in _query_pages(api_php, pages, {
+        "prop": "revisions",
         "rvslots": "*",
-        "rvprop": "content",
+        "rvprop": "content"
+    }, session):
+        contents[page] = entry["revisions"][0]["slots"]["main"]["content"]
+
+    return contents
+
+
+def get_site_info(api_php, session=None, properties="general"):
+    """
+    The ``get_site_info`` function queries the ``meta=siteinfo`` endpoint for
+    information about the wiki itself, such as its namespaces and the time on
+    its servers.
+        :param api_php: The full URL pointing to the MediaWiki Action API
+            `api.php` resource
+        :param session: An optional `requests.Session` object. If no session is
+            passed, a new `requests.Session` is instantiated for the function.
+        :param properties: An optional string of pipe-separated ``siprop``
+            values denoting the information to retrieve, i.e.
+            ``"general|namespaces"``
+        :return: A dictionary mapping each requested property to its value
+    """
+
+    request = (session or requests.Session()).get(url=api_php, params={
+        "action": "query",
+        "meta": "siteinfo",
+        "siprop": properties,
         "formatversion": 2,
         "format": "json"
     })
@@ -111,13 +1099,163 @@ def get_revision_content(api_php, page, session=None):
     data = request.json()
 
     # May throw AssertionError
-    assert ("errors" not in data)
+    _check_for_errors(data)
+
+    # May throw KeyError
+    return data["query"]
+
+
+def get_template_transclusions(api_php, template, session=None):
+    """
+    The ``get_template_transclusions`` function is the counterpart of the
+    JavaScript ``main.getTemplateTransclusions`` method, lazily enumerating the
+    titles of the pages transcluding a template by means of ``list=embeddedin``.
+        :param api_php: The full URL pointing to the MediaWiki Action API
+            `api.php` resource
+        :param template: A string representing the full title of the template,
+            i.e. ``Template:Foo``
+        :param session: An optional `requests.Session` object. If no session is
+            passed, a new `requests.Session` is instantiated for the function.
+        :return: A generator yielding the title of each transcluding page
+    """
+    return _get_members(api_php, "templates", template, session)
+
+
+def get_user_info(api_php, session=None, properties=None):
+    """
+    The ``get_user_info`` function queries the ``meta=userinfo`` endpoint for
+    information about the user to whom the session belongs. As it costs but a
+    single request, it serves as a cheap means of checking whether a saved
+    session is still logged in; anonymous sessions are flagged with an ``anon``
+    key.
+        :param api_php: The full URL pointing to the MediaWiki Action API
+            `api.php` resource
+        :param session: An optional `requests.Session` object. If no session is
+            passed, a new `requests.Session` is instantiated for the function.
+        :param properties: An optional string of pipe-separated ``uiprop``
+            values denoting additional information to retrieve, i.e.
+            ``"groups|ratelimits"``
+        :return user_info: A dictionary containing the ``id`` and ``name`` of
+            the current user along with any additional properties requested
+    """
+
+    params = {
+        "action": "query",
+        "meta": "userinfo",
+        "format": "json"
+    }
+    if properties:
+        params["uiprop"] = properties
+
+    request = (session or requests.Session()).get(url=api_php, params=params)
+
+    # May throw requests.exceptions.HTTPError
+    request.raise_for_status()
+
+    # May throw JSONDecodeError
+    data = request.json()
+
+    # May throw AssertionError
+    _check_for_errors(data)
 
     # May throw KeyError
-    content =\
-        data["query"]["pages"][0]["revisions"][0]["slots"]["main"]["content"]
+    user_info = data["query"]["userinfo"]
 
-    return content
+    return user_info
+
+
+def get_users(api_php, users, session=None, active_since=None):
+    """
+    The ``get_users`` function is the batched counterpart of the JavaScript
+    ``main.getUserData`` method. Rather than querying one user per request, it
+    combines the ``list=users`` and ``list=usercontribs`` modules in queries of
+    up to ``MAX_TITLES_PER_QUERY`` users apiece, so that the existence, edit
+    count and latest contribution of fifty users arrive in a single round trip.
+    Contributions are only listed back to ``active_since``, and further pages
+    of them are requested only until every user with edits has been seen.
+        :param api_php: The full URL pointing to the MediaWiki Action API
+            `api.php` resource
+        :param users: An iterable of strings representing the user names
+        :param session: An optional `requests.Session` object. If no session is
+            passed, a new `requests.Session` is instantiated for the function.
+        :param active_since: An optional ISO 8601 timestamp before which
+            contributions are disregarded
+        :return: A generator yielding a dictionary for each user as returned by
+            ``list=users``, flagged ``missing`` or ``invalid`` if applicable,
+            with the ``timestamp`` of the user's latest contribution under
+            ``lastedit`` or ``None`` if there is none
+    """
+
+    session = session or requests.Session()
+
+    for chunk in _split_into_chunks(list(users), MAX_TITLES_PER_QUERY):
+        params = {
+            "list": "users|usercontribs",
+            "ususers": "|".join(chunk),
+            "usprop": "editcount",
+            "ucuser": "|".join(chunk),
+            "ucprop": "timestamp",
+            "uclimit": "max"
+        }
+        if active_since is not None:
+            params["ucend"] = active_since
+
+        found = {}
+        last_edits = {}
+
+        # May throw HTTPError, JSONDecodeError, AssertionError, or KeyError
+        for data in _iterate_query(api_php, params, session):
+            for user in data["query"].get("users", []):
+                found[user["name"]] = user
+
+            # Contributions are listed newest first
+            for contribution in data["query"].get("usercontribs", []):
+                last_edits.setdefault(contribution["user"],
+                    contribution["timestamp"])
+
+            # Stop paging through contributions once every editor has one
+            if all(name in last_edits for name, user in found.items()
+                    if user.get("editcount")):
+                break
+
+        for name, user in found.items():
+            yield {**user, "lastedit": last_edits.get(name)}
+
+
+def has_message_walls(api_php, session=None):
+    """
+    The ``has_message_walls`` function determines whether a wiki has Message
+    Walls enabled, in which case users are messaged by means of wall threads
+    rather than talk page topics. As the Message Wall namespace only exists on
+    wikis with walls enabled, a single ``meta=siteinfo`` query settles the
+    matter for every recipient, standing in for the ``wgMessageWallsExist``
+    variable consulted by the JavaScript application.
+        :param api_php: The full URL pointing to the MediaWiki Action API
+            `api.php` resource
+        :param session: An optional `requests.Session` object. If no session is
+            passed, a new `requests.Session` is instantiated for the function.
+        :return: A boolean indicating whether the wiki has Message Walls
+    """
+
+    request = (session or requests.Session()).get(url=api_php, params={
+        "action": "query",
+        "meta": "siteinfo",
+        "siprop": "namespaces",
+        "formatversion": 2,
+        "format": "json"
+    })
+
+    # May throw requests.exceptions.HTTPError
+    request.raise_for_status()
+
+    # May throw JSONDecodeError
+    data = request.json()
+
+    # May throw AssertionError
+    _check_for_errors(data)
+
+    # May throw KeyError
+    return str(MESSAGE_WALL_NAMESPACE) in data["query"]["namespaces"]
 
 
 def login(username, password, api_php, session=None):
@@ -156,7 +1294,7 @@ def login(username, password, api_php, session=None):
     data = request.json()
 
     # May throw AssertionError
-    assert ("errors" not in data)
+    _check_for_errors(data)
 
     # May throw KeyError
     is_successful = data["login"]["result"] == "Success"
@@ -166,15 +1304,122 @@ def login(username, password, api_php, session=None):
     return is_successful and is_right_user
 
 
-def post_new_content(api_php, content, page, session=None):
+def parse_wikitext(api_php, text, session=None):
+    """
+    The ``parse_wikitext`` function renders wikitext to HTML by means of the
+    ``action=parse`` endpoint, as is required of messages posted to Message
+    Walls, which accept HTML converted to a jsonModel rather than wikitext.
+        :param api_php: The full URL pointing to the MediaWiki Action API
+            `api.php` resource
+        :param text: A string representing the wikitext to be parsed
+        :param session: An optional `requests.Session` object. If no session is
+            passed, a new `requests.Session` is instantiated for the function.
+        :return: A string representing the parsed HTML
+    """
+
+    request = (session or requests.Session()).post(url=api_php, data={
+        "action": "parse",
+        "text": text,
+        "contentmodel": "wikitext",
+        "prop": "text",
+        "disablelimitreport": 1,
+        "formatversion": 2,
+        "format": "json"
+    })
+
+    # May throw requests.exceptions.HTTPError
+    request.raise_for_status()
+
+    # May throw JSONDecodeError
+    data = request.json()
+
+    # May throw AssertionError
+    _check_for_errors(data)
+
+    # May throw KeyError
+    return data["parse"]["text"]
+
+
+def post_message_wall_thread(api_php, wall_owner_id, title, json_model,
+        session=None, token=None):
+    """
+    The ``post_message_wall_thread`` function is the counterpart of the
+    JavaScript ``main.postMessageWallThread`` method, posting a new thread to a
+    user's Message Wall by means of the ``createThread`` method of the Nirvana
+    ``MessageWall`` controller housed at the wiki's ``wikia.php``.
+        :param api_php: The full URL pointing to the MediaWiki Action API
+            `api.php` resource
+        :param wall_owner_id: An integer denoting the user ID of the recipient
+        :param title: A string representing the title of the thread
+        :param json_model: A string representing the jsonModel of the body of
+            the thread, as built by ``dev.message.build_json_model``
+        :param session: An optional `requests.Session` object. If no session is
+            passed, a new `requests.Session` is instantiated for the function.
+        :param token: An optional CSRF token. If no token is passed, a new one
+            is acquired for the post.
+        :return: The dictionary describing the new thread returned by the
+            controller
+    """
+
+    session = session or requests.Session()
+    request = session.post(util.build_wikia_php_url(api_php), params={
+        "controller": "Fandom\\MessageWall\\MessageWall",
+        "method": "createThread",
+        "format": "json"
+    }, data={
+        "wallOwnerId": wall_owner_id,
+        "title": title,
+        "jsonModel": json_model,
+        "attachments": WALL_ATTACHMENTS,
+        "token": token or _get_csrf_token(api_php, session)
+    })
+
+    # May throw requests.exceptions.HTTPError
+    request.raise_for_status()
+
+    # May throw JSONDecodeError
+    data = request.json()
+
+    # May throw AssertionError
+    _check_for_errors(data)
+
+    return data
+
+
+def post_new_content(api_php, content, page, session=None, token=None,
+        baserevid=None):
+    # May throw KeyError
+    return edit_page(api_php, content, page, session, token,
+        baserevid)["result"] == "Success"
+
+
+def post_talk_page_topic(api_php, page, section_title, text, session=None,
+        token=None):
+    """
+    The ``post_talk_page_topic`` function is the counterpart of the JavaScript
+    ``main.postTalkPageTopic`` method, adding a new section to a user's talk
+    page by means of the ``action=edit`` endpoint.
+        :param api_php: The full URL pointing to the MediaWiki Action API
+            `api.php` resource
+        :param page: A string representing the name of the talk page
+        :param section_title: A string representing the title of the section
+        :param text: A string representing the wikitext of the section
+        :param session: An optional `requests.Session` object. If no session is
+            passed, a new `requests.Session` is instantiated for the function.
+        :param token: An optional CSRF token. If no token is passed, a new one
+            is acquired for the edit.
+        :return: A dictionary holding the ``result`` of the edit
+    """
+
     session = session or requests.Session()
     request = session.post(api_php, data={
         "action": "edit",
-        "token": _get_csrf_token(api_php, session),
         "title": page,
-        "summary": "",
-        "text": content,
-        "format": "json"
+        "section": "new",
+        "sectiontitle": section_title,
+        "text": text,
+        "format": "json",
+        "token": token or _get_csrf_token(api_php, session)
     })
 
     # May throw requests.exceptions.HTTPError
@@ -184,7 +1429,7 @@ def post_new_content(api_php, content, page, session=None):
     data = request.json()
 
     # May throw AssertionError
-    assert ("errors" not in data)
+    _check_for_errors(data)
 
     # May throw KeyError
-    return data["edit"]["result"] == "Success"
+    return data["edit"]
@@ -0,0 +1,354 @@
+"""
+The ``bench`` module measures the cost of the script's sync path against local
+``dev.fakewiki`` servers, so that changes to ``dev.api`` and ``dev.py`` may be
+judged by numbers rather than impressions. Each workload pushes or pulls a
+given number of pages to or from a given number of wikis by means of the same
+functions ``dev.py`` itself uses, and the wall time, number of API requests,
+bytes sent and received and peak memory allocated are reported for each. The
+servers run in a separate process so that neither their time nor their memory
+is counted against the client. With ``--startup``, the time ``dev.py`` takes
+to start is measured instead, against that of a bare interpreter. Run it from
+the repository root:
+
+    python -m dev.bench
+    python -m dev.bench --workload push:5000:1 --latency 20 --ratelimit-every 50
+    python -m dev.bench --startup
+"""
+
+__all__ = [
+    "Workload",
+    "main",
+    "measure_startup",
+    "parse_workload",
+    "run_workload"
+]
+__author__ = "Andrew Eissen"
+__version__ = "0.1"
+
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import importlib.util
+import json
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import requests
+
+import dev.api as api
+import dev.fakewiki as fakewiki
+import dev.util as util
+
+# Location of the script whose sync functions are measured
+SCRIPT_FILE = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "dev.py")
+
+# Location of the script's i18n messages
+I18N_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data",
+    "i18n.json")
+
+# Credentials accepted by the fake wikis
+CREDENTIALS = ("Bench@bench", "password")
+
+# Approximate size in characters of each generated page
+PAGE_SIZE = 2048
+
+# Seconds the script may take to start beyond a bare interpreter's start-up
+STARTUP_TARGET = 0.05
+
+# Command lines whose start-up time is measured, none of which contact a wiki
+STARTUP_COMMANDS = [
+    ["push", "--help"],
+    ["pull", "--help"],
+    ["find", "--help"]
+]
+
+# A workload consisting of an action and numbers of pages and wikis
+Workload = collections.namedtuple("Workload", ["action", "pages", "wikis"])
+
+# Workloads run if none are specified
+WORKLOADS = [
+    Workload("pull", 1, 1),
+    Workload("pull", 50, 1),
+    Workload("pull", 5000, 1),
+    Workload("pull", 50, 20),
+    Workload("push", 1, 1),
+    Workload("push", 50, 1),
+    Workload("push", 5000, 1),
+    Workload("push", 50, 20)
+]
+
+
+def _load_script():
+    """
+    The private ``_load_script`` function imports ``dev.py`` under a name of
+    its own, as the name ``dev`` belongs to the package alongside it.
+        :return: The module object of the script
+    """
+    spec = importlib.util.spec_from_file_location("dev_script", SCRIPT_FILE)
+    script = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(script)
+    return script
+
+
+def _serve(connection, wikis, latency, ratelimit_every):
+    """
+    The private ``_serve`` function is the target of the server process. It
+    starts the fake wikis, sends their URLs back through the connection, and
+    serves them until the process is terminated.
+        :param connection: The child end of a ``multiprocessing.Pipe``
+        :param wikis: An integer denoting the number of wikis to serve
+        :param latency: A float denoting the delay in seconds before each
+            response
+        :param ratelimit_every: An integer. If nonzero, every nth edit is
+            refused with a ``ratelimited`` error.
+        :return: None
+    """
+    connection.send(fakewiki.serve(wikis, latency=latency,
+        ratelimit_every=ratelimit_every))
+    connection.close()
+
+    while True:
+        time.sleep(60)
+
+
+@contextlib.contextmanager
+def _silence():
+    """
+    The private ``_silence`` context manager redirects the standard output and
+    error streams to the null device at the level of their file descriptors,
+    silencing console messages even where ``sys.stdout`` was bound as a default
+    argument before the redirection.
+        :return: A context manager
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = [os.dup(1), os.dup(2)]
+    with open(os.devnull, "w") as devnull:
+        os.dup2(devnull.fileno(), 1)
+        os.dup2(devnull.fileno(), 2)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(saved[0], 1)
+        os.dup2(saved[1], 2)
+        os.close(saved[0])
+        os.close(saved[1])
+
+
+def measure_startup(command, runs):
+    """
+    The ``measure_startup`` function times a command line of ``dev.py`` from
+    the launch of a fresh interpreter to its exit. As start-up times vary from
+    run to run with the state of the disk cache and the scheduler, the median of
+    several runs is taken, the first run being discarded to warm the cache.
+        :param command: A list of strings representing the arguments of
+            ``dev.py``, or ``None`` to time a bare interpreter
+        :param runs: An integer denoting the number of runs to time
+        :return: A float denoting the median wall time in seconds
+    """
+    argv = [sys.executable] + ([SCRIPT_FILE, *command] if command is not None
+        else ["-c", "pass"])
+    times = []
+
+    for run in range(runs + 1):
+        start = time.perf_counter()
+        subprocess.run(argv, cwd=os.path.dirname(SCRIPT_FILE),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if run:
+            times.append(time.perf_counter() - start)
+
+    return statistics.median(times)
+
+
+def parse_workload(workload):
+    """
+    The ``parse_workload`` function converts the value of a ``--workload``
+    argument of the form ``action:pages:wikis`` into a ``Workload``.
+        :param workload: A string such as ``push:50:20``
+        :return: A ``Workload``
+    """
+    try:
+        action, pages, wikis = workload.split(":")
+        if action not in ("pull", "push"):
+            raise ValueError(action)
+        return Workload(action, int(pages), int(wikis))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"invalid workload: {workload} (expected i.e. push:50:20)")
+
+
+def run_workload(script, workload, urls, directory, lang, trace_memory=True):
+    """
+    The ``run_workload`` function runs a single workload, first resetting the
+    fake wikis and preparing local files that differ from every page, so that
+    every page must be transferred. Local files are written before measuring
+    begins, and console messages are silenced for the duration.
+        :param script: The module object of ``dev.py``
+        :param workload: The ``Workload`` to run
+        :param urls: A list of the URLs of the fake wikis, of which the first
+            ``workload.wikis`` are used
+        :param directory: A string path to a scratch directory
+        :param lang: A dictionary of i18n console messages
+        :param trace_memory: An optional boolean indicating whether to measure
+            peak memory by means of ``tracemalloc``, which slows the workload
+        :return: A dictionary of the workload's measurements
+    """
+    requests.post(f"{urls[0]}/_reset", data={"pages": workload.pages,
+        "page_size": PAGE_SIZE}).raise_for_status()
+
+    # Local files whose content differs from that of the generated pages
+    files = {}
+    for index in range(workload.pages):
+        local_path = os.path.join(directory, f"{index}.js")
+        util.write_to_file(f"// Local {index}\n" + "y" * (PAGE_SIZE - 16),
+            local_path)
+        files[local_path] = f"{fakewiki.PAGE_PREFIX}{index}.js"
+
+    local_file_hashes = {
+        local_path: api.get_file_sha1(local_path) for local_path in files
+    }
+    wikis = urls[:workload.wikis]
+    sync_state = {util.build_api_php_url(wiki): {} for wiki in wikis}
+
+    # Keep sessions saved while logging in out of the repository
+    script.LOCAL_DIR = os.path.join(directory, "local")
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+
+    with _silence(), concurrent.futures.ThreadPoolExecutor(
+            max_workers=script.MAX_CONCURRENT_WIKIS) as executor:
+        futures = [
+            executor.submit(script.sync_wiki, workload.action, wiki, files,
+                local_file_hashes, CREDENTIALS, sync_state, lang, wiki)
+            for wiki in wikis
+        ]
+        is_synced = all(future.result() for future in futures)
+
+    wall_time = time.perf_counter() - start
+    peak_memory = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    tracemalloc.stop()
+
+    stats = requests.get(f"{urls[0]}/_stats").json()
+
+    return {
+        "workload": f"{workload.action}:{workload.pages}:{workload.wikis}",
+        "ok": is_synced,
+        "wall_time": wall_time,
+        "requests": stats["requests"],
+        "bytes_sent": stats["bytes_sent"],
+        "bytes_received": stats["bytes_received"],
+        "peak_memory": peak_memory
+    }
+
+
+def main():
+    """
+    The ``main`` function parses the command line, starts the server process,
+    runs each workload in turn, and reports the results either as a table or,
+    with ``--json``, as one JSON object per line for comparison across runs.
+    With ``--startup``, the start-up time of each of ``STARTUP_COMMANDS`` is
+    reported instead, and the process exits with a nonzero status should any
+    exceed a bare interpreter's by more than ``STARTUP_TARGET``.
+        :return: None
+    """
+    parser = argparse.ArgumentParser(prog="python -m dev.bench",
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--workload", dest="workloads", action="append",
+        type=parse_workload,
+        help="action:pages:wikis to run, repeatable (default: a standard set)")
+    parser.add_argument("--latency", type=float, default=0.0,
+        help="milliseconds added to every response (default: 0)")
+    parser.add_argument("--ratelimit-every", type=int, default=0,
+        help="refuse every nth edit as ratelimited (default: never)")
+    parser.add_argument("--no-memory", action="store_true",
+        help="skip measuring peak memory, which slows the workloads")
+    parser.add_argument("--json", action="store_true",
+        help="print results as JSON lines")
+    parser.add_argument("--startup", action="store_true",
+        help="measure the start-up time of dev.py instead of the workloads")
+    parser.add_argument("--runs", type=int, default=10,
+        help="number of runs of each command timed by --startup (default: 10)")
+    args = parser.parse_args()
+
+    if args.startup:
+        baseline = measure_startup(None, args.runs)
+        is_within_target = True
+
+        if not args.json:
+            util.log_msg(f"{'command':<16}{'ok':>4}{'wall ms':>10}"
+                f"{'overhead ms':>14}{'target ms':>12}")
+
+        for command in STARTUP_COMMANDS:
+            wall_time = measure_startup(command, args.runs)
+            result = {
+                "command": " ".join(command),
+                "ok": wall_time - baseline <= STARTUP_TARGET,
+                "wall_time": wall_time,
+                "overhead": wall_time - baseline,
+                "target": STARTUP_TARGET
+            }
+            is_within_target = is_within_target and result["ok"]
+
+            if args.json:
+                util.log_msg(json.dumps(result))
+            else:
+                util.log_msg(f"{result['command']:<16}"
+                    f"{'yes' if result['ok'] else 'no':>4}"
+                    f"{result['wall_time'] * 1000:>10.1f}"
+                    f"{result['overhead'] * 1000:>14.1f}"
+                    f"{result['target'] * 1000:>12.1f}")
+
+        sys.exit(0 if is_within_target else 1)
+
+    workloads = args.workloads or WORKLOADS
+    script = _load_script()
+    lang = util.get_json_file(I18N_FILE)["en"]
+
+    # The server process is forked before any workload allocates memory
+    parent, child = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=_serve, daemon=True, args=(child,
+        max(workload.wikis for workload in workloads), args.latency / 1000,
+        args.ratelimit_every))
+    server.start()
+
+    try:
+        urls = parent.recv()
+
+        if not args.json:
+            util.log_msg(f"{'workload':<16}{'ok':>4}{'wall s':>10}"
+                f"{'requests':>10}{'sent KiB':>12}{'recv KiB':>12}"
+                f"{'peak MiB':>10}")
+
+        for workload in workloads:
+            with tempfile.TemporaryDirectory() as directory:
+                result = run_workload(script, workload, urls, directory, lang,
+                    not args.no_memory)
+
+            if args.json:
+                util.log_msg(json.dumps(result))
+            else:
+                util.log_msg(f"{result['workload']:<16}"
+                    f"{'yes' if result['ok'] else 'no':>4}"
+                    f"{result['wall_time']:>10.3f}"
+                    f"{result['requests']:>10}"
+                    f"{result['bytes_sent'] / 1024:>12.1f}"
+                    f"{result['bytes_received'] / 1024:>12.1f}"
+                    f"{(result['peak_memory'] or 0) / 1024 / 1024:>10.2f}")
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
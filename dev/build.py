@@ -0,0 +1,278 @@
+"""
+The ``build`` module houses the transform stage through which local files may
+be passed before they are pushed. JavaScript is stripped of its comments and
+needless whitespace, and JSON is compacted, optionally with the message
+documentation and messages no longer listed in an i18n file's ``_metadata``
+dropped, so that visitors loading the script download only what the script
+actually uses. Outputs are kept in a directory of their own under names derived
+from the hash of their input, so that unchanged files are not transformed again.
+"""
+
+__all__ = [
+    "build_file",
+    "compact_json",
+    "minify_js"
+]
+__author__ = "Andrew Eissen"
+__version__ = "0.1"
+
+import hashlib
+import json
+import os
+import re
+import string
+
+import dev.api as api
+import dev.util as util
+
+# Bumped whenever a transform changes, invalidating every cached output
+TRANSFORM_VERSION = 1
+
+# Characters ending lines, and those along with them counting as whitespace
+LINE_TERMINATORS = "\n\r\u2028\u2029"
+WHITESPACE = frozenset(" \t\v\f\xa0\ufeff" + LINE_TERMINATORS)
+
+# Characters that may make up identifiers, keywords and numbers
+IDENTIFIER_CHARS = frozenset(string.ascii_letters + string.digits + "_$\\")
+
+# Characters after which a slash begins a regex literal rather than a division
+REGEX_PRECEDERS = frozenset("(,=:[!&|?{};+-*%<>~^")
+
+# Keywords after which a slash begins a regex literal rather than a division
+REGEX_KEYWORDS = frozenset(("case", "delete", "do", "else", "in",
+    "instanceof", "new", "return", "throw", "typeof", "void", "yield"))
+
+# Characters before or after which a line break is never needed
+BREAK_PRECEDERS = frozenset("{[(,;:")
+BREAK_FOLLOWERS = frozenset(")]},")
+
+# Pseudo-language of i18n files documenting each message for translators
+DOCUMENTATION_LANGUAGE = "qqq"
+
+
+def _is_identifier_char(char):
+    return char in IDENTIFIER_CHARS or char > "\x7f"
+
+
+def _skip_regex(text, index):
+    """
+    The private ``_skip_regex`` function finds the end of the regex literal
+    whose opening slash is at ``index``. Slashes that are escaped or that fall
+    within a character class do not end the literal.
+        :param text: A string of JavaScript
+        :param index: The index of the opening slash
+        :return: The index just past the closing slash
+    """
+    is_in_class = False
+    index += 1
+    while index < len(text) and text[index] not in "\n\r":
+        if text[index] == "\\":
+            index += 1
+        elif text[index] == "[":
+            is_in_class = True
+        elif text[index] == "]":
+            is_in_class = False
+        elif text[index] == "/" and not is_in_class:
+            return index + 1
+        index += 1
+    raise ValueError(f"Unterminated regex literal at {index}")
+
+
+def _skip_string(text, index):
+    """
+    The private ``_skip_string`` function finds the end of the string literal
+    whose opening quote is at ``index``. The expressions of template literals
+    are skipped in their entirety, nested strings and templates included.
+        :param text: A string of JavaScript
+        :param index: The index of the opening quote or backtick
+        :return: The index just past the closing quote or backtick
+    """
+    quote = text[index]
+    index += 1
+    while index < len(text):
+        char = text[index]
+        if char == "\\":
+            index += 2
+            continue
+        elif char == quote:
+            return index + 1
+        elif char in "\n\r" and quote != "`":
+            break
+        elif quote == "`" and text.startswith("${", index):
+            depth = 0
+            index += 1
+            while index < len(text):
+                if text[index] in "'\"`":
+                    index = _skip_string(text, index)
+                    continue
+                elif text[index] == "{":
+                    depth += 1
+                elif text[index] == "}":
+                    depth -= 1
+                    if not depth:
+                        break
+                index += 1
+        index += 1
+    raise ValueError(f"Unterminated string literal at {index}")
+
+
+def build_file(local_path, build_dir, prune_i18n=False):
+    """
+    The ``build_file`` function passes a local file through the transform for
+    its type, ``minify_js`` for JavaScript and ``compact_json`` for JSON, and
+    writes the output to the build directory. Outputs are named for the hash of
+    the input, the transform and its options, so that the output of an earlier
+    build is reused as is if none of these have changed since.
+        :param local_path: A string path to the local file
+        :param build_dir: A string path to the directory of built files
+        :param prune_i18n: An optional boolean indicating whether to drop
+            unused messages from i18n files
+        :return: A tuple of the string path to the output and a boolean
+            indicating whether it was reused from an earlier build, or ``None``
+            if no transform applies to the file
+    """
+    extension = os.path.splitext(local_path)[1].lower()
+    if extension not in (".js", ".json"):
+        return None
+
+    # May throw IOError
+    key = json.dumps([TRANSFORM_VERSION, extension, prune_i18n,
+        api.get_file_sha1(local_path)])
+    output_path = os.path.join(build_dir,
+        hashlib.sha1(key.encode("UTF-8")).hexdigest() + extension)
+
+    if os.path.isfile(output_path):
+        return output_path, True
+
+    # May throw IOError or UnicodeDecodeError
+    text = util.get_file_contents(local_path)
+
+    # May throw ValueError, of which JSONDecodeError is a subclass
+    output = minify_js(text) if extension == ".js" else\
+        compact_json(text, prune_i18n)
+
+    # Write to a temporary file first so that no partial output is reused
+    os.makedirs(build_dir, exist_ok=True)
+    with open(output_path + ".tmp", "w", encoding="UTF-8", newline="") as file:
+        file.write(output)
+    os.replace(output_path + ".tmp", output_path)
+
+    return output_path, False
+
+
+def compact_json(text, prune_i18n=False):
+    """
+    The ``compact_json`` function strips a JSON document of all insignificant
+    whitespace. If the document is an i18n file and pruning is requested, the
+    message documentation of the ``qqq`` pseudo-language is dropped, as are any
+    messages not listed in ``_metadata.order``, which are no longer used by the
+    script. The ``_metadata`` object itself is left in place.
+        :param text: A string of JSON
+        :param prune_i18n: An optional boolean indicating whether to drop
+            unused messages from i18n files
+        :return: A string of compacted JSON
+    """
+
+    # May throw JSONDecodeError
+    data = json.loads(text)
+
+    if prune_i18n and isinstance(data, dict) and\
+            isinstance(data.get("_metadata"), dict):
+        order = data["_metadata"].get("order")
+        data.pop(DOCUMENTATION_LANGUAGE, None)
+
+        if isinstance(order, list):
+            order = set(order)
+            for language, messages in data.items():
+                if language != "_metadata" and isinstance(messages, dict):
+                    data[language] = {key: message for key, message in
+                        messages.items() if key in order}
+
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def minify_js(text):
+    """
+    The ``minify_js`` function strips JavaScript of its comments and of all
+    whitespace not needed to keep adjacent tokens apart. Line breaks are only
+    removed where they cannot affect automatic semicolon insertion, and no
+    identifiers are renamed, so the output behaves exactly as the input did.
+    Comments opening with ``/*!`` are kept, as are any ``<nowiki>`` tags, which
+    keep MediaWiki from expanding signatures and substitutions in the script.
+        :param text: A string of JavaScript
+        :return: A string of minified JavaScript
+    """
+    output = []
+
+    # Last character and identifier emitted, and whitespace yet to be emitted
+    last = ""
+    word = ""
+    pending = ""
+
+    index = 0
+    while index < len(text):
+        char = text[index]
+
+        if char in WHITESPACE:
+            if char in LINE_TERMINATORS:
+                pending = "\n"
+            elif not pending:
+                pending = " "
+            index += 1
+            continue
+
+        if text.startswith("//", index) or text.startswith("/*", index):
+            if char + text[index + 1] == "//":
+                end = re.compile(f"[{LINE_TERMINATORS}]|$").search(
+                    text, index).start()
+            else:
+                end = text.find("*/", index + 2) + 2
+                if end == 1:
+                    raise ValueError(f"Unterminated comment at {index}")
+            comment = text[index:end]
+            index = end
+
+            # Comments otherwise count for whitespace
+            tags = re.findall(r"</?nowiki>", comment)
+            if comment.startswith("/*!") or tags:
+                if output:
+                    output.append(pending)
+                output.append(comment if comment.startswith("/*!") else
+                    f"/* {' '.join(tags)} */")
+                pending = "\n"
+            elif re.search(f"[{LINE_TERMINATORS}]", comment):
+                pending = "\n"
+            elif not pending:
+                pending = " "
+            continue
+
+        # Determine where the token starting at this character ends
+        if char in "'\"`":
+            end = _skip_string(text, index)
+        elif char == "/" and (not last or last in REGEX_PRECEDERS or
+                word in REGEX_KEYWORDS):
+            end = _skip_regex(text, index)
+        elif _is_identifier_char(char):
+            end = index + 1
+            while end < len(text) and _is_identifier_char(text[end]):
+                end += 1
+        else:
+            end = index + 1
+        token = text[index:end]
+        index = end
+
+        # Keep only such whitespace as keeps tokens and statements apart
+        if pending == "\n" and last and last not in BREAK_PRECEDERS and\
+                token[0] not in BREAK_FOLLOWERS:
+            output.append("\n")
+        elif pending and (_is_identifier_char(last) and
+                (_is_identifier_char(token[0]) or token[0] == ".") or
+                last in "+-/" and token[0] == last):
+            output.append(" ")
+
+        output.append(token)
+        last = token[-1]
+        word = token if _is_identifier_char(char) else ""
+        pending = ""
+
+    return "".join(output)
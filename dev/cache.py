@@ -0,0 +1,302 @@
+"""
+The ``cache`` module houses an on-disk cache of wiki page content, sparing
+repeated pulls, dry runs and diffs from downloading pages that have not changed
+since they were last fetched. Page text is stored in content-addressed blobs
+named for the SHA-1 hash MediaWiki reports for each revision, so identical texts
+on different pages, revisions or wikis are stored only once, while an index maps
+each wiki, page and revision ID to its blob. The blobs least recently used are
+evicted once the cache outgrows its size cap.
+"""
+
+__all__ = [
+    "PageCache"
+]
+__author__ = "Andrew Eissen"
+__version__ = "0.1"
+
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+
+import dev.api as api
+import dev.util as util
+
+# Default cap on the total size in bytes of the cached blobs
+MAX_SIZE = 256 * 1024 * 1024
+
+
+class PageCache:
+    """
+    The ``PageCache`` class stores the content of page revisions keyed by wiki,
+    page name and revision ID. As the content of a revision never changes, a
+    cached revision need only be revalidated in the sense of checking whether it
+    is still a page's latest, which a batched ``prop=info`` query does for fifty
+    pages at a time. It is safe for use from multiple threads.
+    """
+
+    def __init__(self, directory, max_size=MAX_SIZE):
+        """
+        The ``PageCache`` constructor loads the cache's index, if any, from
+        the given directory. A missing or corrupt index yields an empty cache.
+            :param directory: A string path to the directory of the cache
+            :param max_size: An optional integer denoting the maximum total
+                size in bytes of the cached blobs
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self._lock = threading.Lock()
+
+        try:
+            index = util.get_json_file(os.path.join(directory, "index.json"))
+            self._entries = index["entries"]
+            self._blobs = index["blobs"]
+        except (IOError, json.decoder.JSONDecodeError, KeyError, TypeError):
+            self._entries = {}
+            self._blobs = {}
+
+    def _evict(self):
+        """
+        The private ``_evict`` method deletes the least recently used blobs
+        until the cache fits within its size cap. Index entries referring to
+        evicted blobs are pruned when the index is next saved. The cache's lock
+        must be held by the caller.
+            :return: None
+        """
+        size = sum(blob["size"] for blob in self._blobs.values())
+
+        # Blobs are kept in order of use, least recent first
+        for sha1 in list(self._blobs):
+            if size <= self.max_size:
+                break
+            size -= self._blobs.pop(sha1)["size"]
+            try:
+                os.remove(self._get_blob_path(sha1))
+            except FileNotFoundError:
+                pass
+
+    def _fetch(self, api_php, pages, session=None):
+        """
+        The private ``_fetch`` method downloads the latest revisions of the
+        given pages, content included, and adds them to the cache.
+            :param api_php: The full URL pointing to the wiki's `api.php`
+                resource
+            :param pages: A list of strings representing the names of the pages
+            :param session: An optional `requests.Session` object
+            :return revisions: A dictionary in the form returned by
+                ``api.get_latest_revisions``
+        """
+
+        # May throw HTTPError, JSONDecodeError, AssertionError, or KeyError
+        revisions = api.get_latest_revisions(api_php, pages, session, True)
+
+        for page, revision in revisions.items():
+            self.put(api_php, page, revision["revid"], revision["content"],
+                revision["sha1"])
+
+        return revisions
+
+    def _get_blob_path(self, sha1):
+        return os.path.join(self.directory, "blobs", sha1[:2], sha1)
+
+    def get(self, api_php, page, revid):
+        """
+        The ``get`` method retrieves the content of a revision from the cache,
+        marking its blob as the most recently used.
+            :param api_php: The full URL pointing to the wiki's `api.php`
+                resource
+            :param page: A string representing the name of the page
+            :param revid: An integer denoting the ID of the revision
+            :return: A string representing the content of the revision, or
+                ``None`` if it is not cached
+        """
+        with self._lock:
+            sha1 = self._entries.get(api_php, {}).get(page, {}).get(str(revid))
+            if sha1 is None or sha1 not in self._blobs:
+                return None
+
+            # Move the blob to the end of the queue of blobs to be evicted
+            self._blobs[sha1] = {**self._blobs.pop(sha1), "used": time.time()}
+
+        try:
+            with open(self._get_blob_path(sha1), "rb") as blob:
+                return blob.read().decode("UTF-8")
+        except FileNotFoundError:
+            return None
+
+    def get_cached_revisions(self, api_php):
+        """
+        The ``get_cached_revisions`` method lists the most recent revision of
+        each of a wiki's pages held by the cache, without consulting the wiki.
+        The revisions listed are those latest as of each page's last fetch.
+            :param api_php: The full URL pointing to the wiki's `api.php`
+                resource
+            :return: A dictionary mapping page names to dictionaries holding
+                the ``revid`` and ``sha1`` of their most recent cached revision
+        """
+        revisions = {}
+
+        with self._lock:
+            for page, revids in self._entries.get(api_php, {}).items():
+                cached = [int(revid) for revid, sha1 in revids.items()
+                    if sha1 in self._blobs]
+                if cached:
+                    revisions[page] = {
+                        "revid": max(cached),
+                        "sha1": revids[str(max(cached))]
+                    }
+
+        return revisions
+
+    def get_latest_revisions(self, api_php, pages, session=None):
+        """
+        The ``get_latest_revisions`` method is a caching counterpart of
+        ``api.get_latest_revisions`` that always includes content. A batched
+        ``prop=info`` query first reveals the latest revision ID of each page;
+        pages whose latest revision is cached are served from disk, and only
+        the remainder are downloaded and added to the cache. If none of the
+        pages has ever been cached, the ``prop=info`` query is skipped.
+            :param api_php: The full URL pointing to the wiki's `api.php`
+                resource
+            :param pages: An iterable of strings representing the names of the
+                desired pages
+            :param session: An optional `requests.Session` object
+            :return revisions: A dictionary in the form returned by
+                ``api.get_latest_revisions``
+        """
+        pages = list(pages)
+        revisions = {}
+
+        with self._lock:
+            cached_pages = self._entries.get(api_php, {})
+            is_any_cached = any(page in cached_pages for page in pages)
+
+        if is_any_cached:
+            # May throw HTTPError, JSONDecodeError, AssertionError, or KeyError
+            for page, info in api.get_page_info(api_php, pages,
+                    session).items():
+                content = self.get(api_php, page, info["lastrevid"])
+                if content is not None:
+                    revisions[page] = {
+                        "revid": info["lastrevid"],
+                        "sha1": self._entries[api_php][page][
+                            str(info["lastrevid"])],
+                        "content": content
+                    }
+
+        misses = [page for page in pages if page not in revisions]
+        if misses:
+            revisions.update(self._fetch(api_php, misses, session))
+
+        return revisions
+
+    def get_member_revisions(self, api_php, member_type, entry, session=None,
+            continuation=None, on_continue=None):
+        """
+        The ``get_member_revisions`` method is a caching counterpart of
+        ``api.get_member_revisions`` that always includes content. Members are
+        enumerated along with the IDs of their latest revisions alone, and only
+        the content of those revisions not already cached is downloaded, in
+        batches of ``api.MAX_TITLES_PER_QUERY``.
+            :param api_php: The full URL pointing to the wiki's `api.php`
+                resource
+            :param member_type: A key of ``api.MEMBER_LISTS``
+            :param entry: The category or template title or namespace number
+            :param session: An optional `requests.Session` object
+            :param continuation: An optional ``continue`` object from which to
+                resume the enumeration
+            :param on_continue: An optional callable passed each ``continue``
+                object of the enumeration
+            :return: A generator yielding tuples of each member's title and a
+                dictionary of its latest revision
+        """
+        members = api.get_member_revisions(api_php, member_type, entry, session,
+            continuation=continuation, on_continue=on_continue)
+
+        while batch := dict(itertools.islice(members,
+                api.MAX_TITLES_PER_QUERY)):
+            yield from self.get_revisions(api_php, batch, session).items()
+
+    def get_revisions(self, api_php, revisions, session=None):
+        """
+        The ``get_revisions`` method adds content to revisions whose IDs are
+        already known. Cached revisions are served from disk, and the latest
+        revisions of the remaining pages are downloaded and added to the cache.
+            :param api_php: The full URL pointing to the wiki's `api.php`
+                resource
+            :param revisions: A dictionary mapping page names to dictionaries
+                of their latest revisions
+            :param session: An optional `requests.Session` object
+            :return: A dictionary mapping page names to dictionaries of their
+                latest revisions, content included
+        """
+        complete_revisions = {}
+        misses = []
+
+        for page, revision in revisions.items():
+            content = self.get(api_php, page, revision["revid"])
+            if content is None:
+                misses.append(page)
+            else:
+                complete_revisions[page] = {**revision, "content": content}
+
+        if misses:
+            complete_revisions.update(self._fetch(api_php, misses, session))
+
+        return complete_revisions
+
+    def put(self, api_php, page, revid, content, sha1=None):
+        """
+        The ``put`` method adds the content of a revision to the cache. The
+        blob is only written if no revision with identical content is cached
+        already, after which the least recently used blobs are evicted if need
+        be.
+            :param api_php: The full URL pointing to the wiki's `api.php`
+                resource
+            :param page: A string representing the name of the page
+            :param revid: An integer denoting the ID of the revision
+            :param content: A string representing the content of the revision
+            :param sha1: An optional string representing the SHA-1 hash of the
+                content as reported by the API. If none is passed, the hash is
+                computed.
+            :return: None
+        """
+        data = content.encode("UTF-8")
+        sha1 = sha1 or hashlib.sha1(data).hexdigest()
+        blob_path = self._get_blob_path(sha1)
+
+        with self._lock:
+            if sha1 not in self._blobs or not os.path.isfile(blob_path):
+                # Write to a temporary file so readers never see partial blobs
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                with open(f"{blob_path}.tmp", "wb") as blob:
+                    blob.write(data)
+                os.replace(f"{blob_path}.tmp", blob_path)
+
+            self._blobs.pop(sha1, None)
+            self._blobs[sha1] = {"size": len(data), "used": time.time()}
+            self._entries.setdefault(api_php, {}).setdefault(page, {})[
+                str(revid)] = sha1
+            self._evict()
+
+    def save(self):
+        """
+        The ``save`` method writes the cache's index to disk, first pruning any
+        entries whose blobs have been evicted.
+            :return: None
+        """
+        with self._lock:
+            for pages in self._entries.values():
+                for page, revids in list(pages.items()):
+                    for revid, sha1 in list(revids.items()):
+                        if sha1 not in self._blobs:
+                            del revids[revid]
+                    if not revids:
+                        del pages[page]
+
+            util.write_json_file({
+                "entries": self._entries,
+                "blobs": self._blobs
+            }, os.path.join(self.directory, "index.json"))
@@ -0,0 +1,424 @@
+"""
+The ``fakewiki`` module houses a small stand-in for the MediaWiki Action API,
+sufficient for the requests made by ``dev.api`` to be served locally without a
+network connection or a Fandom account. Each ``FakeWikiServer`` hosts a single
+wiki of generated pages at ``/api.php`` and implements ``meta=tokens``,
+``meta=userinfo``, ``action=login``, ``prop=info``, ``prop=revisions``,
+``action=edit`` and the ``allpages``, ``categorymembers`` and ``embeddedin``
+lists with ``continue``, along with injectable latency and ``ratelimited``
+errors. Request counts and bytes moved are tallied for all wikis hosted in the
+process and may be read or reset at ``/_stats`` and ``/_reset``.
+"""
+
+__all__ = [
+    "FakeWiki",
+    "FakeWikiHandler",
+    "FakeWikiServer",
+    "serve"
+]
+__author__ = "Andrew Eissen"
+__version__ = "0.1"
+
+import email.parser
+import hashlib
+import http.server
+import json
+import threading
+import time
+import urllib.parse
+
+# Prefix of the names of the generated pages, i.e. MediaWiki:Bench/0.js
+PAGE_PREFIX = "MediaWiki:Bench/"
+
+# Maximum number of titles accepted per query, as for non-bot accounts
+MAX_TITLES = 50
+
+# Number of list members returned for a limit of "max"
+MAX_LIMIT = 500
+
+# Prefixes of the parameters of the supported list modules
+LIST_PREFIXES = {
+    "allpages": "ap",
+    "categorymembers": "cm",
+    "embeddedin": "ei"
+}
+
+
+class FakeWiki:
+    """
+    The ``FakeWiki`` class holds the pages and revision counter of a single
+    wiki. Every page is a member of every category and transcludes every
+    template, which suffices for exercising list continuation.
+    """
+
+    def __init__(self, pages=0, page_size=1024):
+        """
+        The ``FakeWiki`` constructor generates the wiki's pages.
+            :param pages: An optional integer denoting the number of pages
+            :param page_size: An optional integer denoting the approximate size
+                of each page in characters
+        """
+        self.lock = threading.Lock()
+        self.reset(pages, page_size)
+
+    def edit(self, title, text, baserevid=None):
+        """
+        The ``edit`` method saves new text to a page as MediaWiki would,
+        trimming trailing whitespace and refusing edits based on a revision
+        other than the page's latest.
+            :param title: A string representing the name of the page
+            :param text: A string representing the new text of the page
+            :param baserevid: An optional revision ID on which the edit is based
+            :return: A dictionary in the form of the API's ``edit`` response
+        """
+        text = text.rstrip(" \t\n\r\0\x0b")
+
+        with self.lock:
+            page = self.pages.get(title)
+            if page is not None and baserevid is not None and\
+                    int(baserevid) != page["revid"]:
+                return {"error": {"code": "editconflict", "info": title}}
+            elif page is not None and page["content"] == text:
+                return {"edit": {"result": "Success", "title": title,
+                    "nochange": True}}
+
+            self.next_revid += 1
+            self.pages[title] = {
+                "revid": self.next_revid,
+                "sha1": hashlib.sha1(text.encode("UTF-8")).hexdigest(),
+                "content": text
+            }
+            return {"edit": {"result": "Success", "title": title,
+                "newrevid": self.next_revid}}
+
+    def reset(self, pages=0, page_size=1024):
+        """
+        The ``reset`` method replaces the wiki's pages with freshly generated
+        ones, named ``MediaWiki:Bench/0.js`` and so on.
+            :param pages: An optional integer denoting the number of pages
+            :param page_size: An optional integer denoting the approximate size
+                of each page in characters
+            :return: None
+        """
+        with self.lock:
+            self.pages = {}
+            for index in range(pages):
+                text = f"// Page {index}\n" + "x" * max(0, page_size - 16)
+                self.pages[f"{PAGE_PREFIX}{index}.js"] = {
+                    "revid": index + 1,
+                    "sha1": hashlib.sha1(text.encode("UTF-8")).hexdigest(),
+                    "content": text
+                }
+            self.next_revid = pages
+
+
+class FakeWikiHandler(http.server.BaseHTTPRequestHandler):
+    """
+    The ``FakeWikiHandler`` class answers requests made to a
+    ``FakeWikiServer``. Requests for ``/api.php`` are answered from the
+    server's ``FakeWiki`` as the MediaWiki Action API would answer them, in
+    ``formatversion=2`` and with the error code repeated in the
+    ``MediaWiki-API-Error`` header.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    # Headers and body are written separately; don't hold the body back
+    disable_nagle_algorithm = True
+
+    def _get_params(self):
+        """
+        The private ``_get_params`` method reads the parameters of a request
+        from its query string and, for ``POST`` requests, its urlencoded or
+        ``multipart/form-data`` body.
+            :return: A dictionary of the request's parameters
+        """
+        url = urllib.parse.urlparse(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        self._received = len(self.requestline) + len(str(self.headers)) +\
+            length
+
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("multipart/form-data"):
+            message = email.parser.BytesParser().parsebytes(
+                f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+            for part in message.get_payload():
+                params[part.get_param("name", header="content-disposition")] =\
+                    part.get_payload(decode=True).decode("UTF-8")
+        elif body:
+            params.update(urllib.parse.parse_qsl(body.decode("UTF-8")))
+
+        return params
+
+    def _handle_query(self, params):
+        """
+        The private ``_handle_query`` method answers ``action=query`` requests.
+            :param params: A dictionary of the request's parameters
+            :return: A dictionary of the response data
+        """
+        wiki = self.server.wiki
+        query = {}
+        data = {"batchcomplete": True, "query": query}
+
+        if params.get("meta") == "tokens":
+            token_type = params.get("type", "csrf")
+            query["tokens"] = {f"{token_type}token": self.server.token}
+        elif params.get("meta") == "userinfo":
+            query["userinfo"] = {"id": 1, "name": self.server.username,
+                "groups": ["*", "user", "autoconfirmed"], "ratelimits": {}}\
+                if self._is_logged_in() else\
+                {"id": 0, "name": self.client_address[0], "anon": True}
+
+        titles = params["titles"].split("|") if params.get("titles") else []
+
+        # Lists may stand alone or generate the titles of a prop query
+        module = params.get("list") or params.get("generator")
+        if module in LIST_PREFIXES:
+            prefix = ("g" if "generator" in params else "") +\
+                LIST_PREFIXES[module]
+            limit = params.get(f"{prefix}limit", "10")
+            limit = MAX_LIMIT if limit == "max" else min(MAX_LIMIT, int(limit))
+            offset = int(params.get(f"{prefix}continue", 0))
+
+            with wiki.lock:
+                members = list(wiki.pages)[offset:offset + limit]
+                if offset + limit < len(wiki.pages):
+                    data["continue"] = {
+                        f"{prefix}continue": str(offset + limit),
+                        "continue": "-||" if "list" in params else "||"
+                    }
+
+            if "list" in params:
+                query[module] = [{"ns": 8, "title": title}
+                    for title in members]
+            else:
+                titles = members
+        elif len(titles) > MAX_TITLES:
+            return {"error": {"code": "toomanyvalues", "info": "titles"}}
+
+        if titles:
+            query["pages"] = [self._handle_page(title, params)
+                for title in titles]
+
+        return data
+
+    def _handle_page(self, title, params):
+        """
+        The private ``_handle_page`` method assembles the page object of a
+        ``prop=info`` or ``prop=revisions`` query for a single title.
+            :param title: A string representing the name of the page
+            :param params: A dictionary of the request's parameters
+            :return: A dictionary of the page object
+        """
+        with self.server.wiki.lock:
+            page = self.server.wiki.pages.get(title)
+
+        if page is None:
+            return {"ns": 0, "title": title, "missing": True}
+
+        entry = {"ns": 8, "title": title, "lastrevid": page["revid"],
+            "length": len(page["content"])}
+        if params.get("prop") == "revisions":
+            revision = {"revid": page["revid"], "sha1": page["sha1"]}
+            if "content" in params.get("rvprop", ""):
+                revision["slots"] = {"main": {"contentmodel": "javascript",
+                    "content": page["content"]}}
+            entry["revisions"] = [revision]
+
+        return entry
+
+    def _is_logged_in(self):
+        return f"fakewiki={self.server.token}" in self.headers.get("Cookie", "")
+
+    def _send_json(self, data, headers=()):
+        """
+        The private ``_send_json`` method sends a JSON response, after any
+        latency configured for the server has elapsed.
+            :param data: A JSON-serializable object to be sent
+            :param headers: An optional iterable of tuples of additional header
+                names and values
+            :return: None
+        """
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        body = json.dumps(data).encode("UTF-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+
+        if "error" in data:
+            self.send_header("MediaWiki-API-Error", data["error"]["code"])
+
+        # Count the buffered status line and headers as well as the body
+        sent = sum(map(len, getattr(self, "_headers_buffer", []))) + len(body)
+
+        self.end_headers()
+        self.wfile.write(body)
+
+        if self._is_api_request:
+            self.server.tally(self._received, sent, 1)
+
+    def do_GET(self):
+        self.handle_request()
+
+    def do_POST(self):
+        self.handle_request()
+
+    def handle_request(self):
+        """
+        The ``handle_request`` method dispatches a request to the appropriate
+        handler according to its path and ``action`` parameter.
+            :return: None
+        """
+        path = urllib.parse.urlparse(self.path).path
+        params = self._get_params()
+
+        # Requests to the control endpoints are not tallied
+        self._is_api_request = path == "/api.php"
+
+        if path == "/_stats":
+            with self.server.stats_lock:
+                return self._send_json(self.server.stats.copy())
+        elif path == "/_reset":
+            self.server.reset_all(int(params.get("pages", 0)),
+                int(params.get("page_size", 1024)))
+            return self._send_json({"reset": True})
+
+        action = params.get("action")
+
+        if action == "query":
+            return self._send_json(self._handle_query(params))
+        elif action == "login":
+            if params.get("lgtoken") != self.server.token:
+                return self._send_json({"login": {"result": "WrongToken"}})
+            self.server.username = params.get("lgname", "").split("@")[0]
+            return self._send_json({"login": {"result": "Success",
+                "lgusername": params.get("lgname")}},
+                [("Set-Cookie", f"fakewiki={self.server.token}; Path=/")])
+        elif action == "edit":
+            if params.get("token") != self.server.token:
+                return self._send_json({"error": {"code": "badtoken"}})
+            elif self.server.is_ratelimited():
+                return self._send_json({"error": {"code": "ratelimited"}},
+                    [("Retry-After", "0")])
+            return self._send_json(self.server.wiki.edit(params.get("title"),
+                params.get("text", ""), params.get("baserevid")))
+
+        self._send_json({"error": {"code": "badvalue", "info": "action"}})
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeWikiServer(http.server.ThreadingHTTPServer):
+    """
+    The ``FakeWikiServer`` class is a threaded HTTP server hosting a single
+    ``FakeWiki``. Servers started by ``serve`` share their statistics, so that
+    the cost of a workload spanning several wikis may be read in one request.
+    """
+
+    daemon_threads = True
+
+    # Lock guarding the statistics shared between servers
+    stats_lock = threading.Lock()
+
+    def __init__(self, address, wiki, stats, siblings, latency=0.0,
+            ratelimit_every=0):
+        """
+        The ``FakeWikiServer`` constructor binds the server to its address.
+            :param address: A tuple of the host and port to bind to
+            :param wiki: The ``FakeWiki`` hosted by the server
+            :param stats: A dictionary of statistics shared between servers
+            :param siblings: A list of all servers started together, reset as
+                one by ``reset_all``
+            :param latency: An optional float denoting the delay in seconds
+                before each response is sent
+            :param ratelimit_every: An optional integer. If nonzero, every nth
+                edit is refused with a ``ratelimited`` error.
+        """
+        super().__init__(address, FakeWikiHandler)
+        self.wiki = wiki
+        self.stats = stats
+        self.siblings = siblings
+        self.latency = latency
+        self.ratelimit_every = ratelimit_every
+        self.token = "fakewiki+\\"
+        self.username = "Bench"
+        self._edits = 0
+        self._lock = threading.Lock()
+
+    def is_ratelimited(self):
+        """
+        The ``is_ratelimited`` method counts an edit attempt and determines
+        whether it should be refused.
+            :return: A boolean indicating whether to refuse the edit
+        """
+        with self._lock:
+            self._edits += 1
+            return bool(self.ratelimit_every) and\
+                self._edits % self.ratelimit_every == 0
+
+    def reset_all(self, pages=0, page_size=1024):
+        """
+        The ``reset_all`` method regenerates the pages of every wiki started
+        alongside this one and zeroes their shared statistics.
+            :param pages: An optional integer denoting the number of pages
+            :param page_size: An optional integer denoting the approximate size
+                of each page in characters
+            :return: None
+        """
+        for server in self.siblings:
+            server.wiki.reset(pages, page_size)
+        with self.stats_lock:
+            self.stats.update(requests=0, bytes_sent=0, bytes_received=0)
+
+    def tally(self, received, sent, requests=0):
+        """
+        The ``tally`` method adds to the shared statistics. Bytes received by
+        the server were sent by its clients and vice versa.
+            :param received: An integer denoting the number of bytes received
+            :param sent: An integer denoting the number of bytes sent
+            :param requests: An optional integer denoting the number of API
+                requests served
+            :return: None
+        """
+        with self.stats_lock:
+            self.stats["requests"] += requests
+            self.stats["bytes_sent"] += received
+            self.stats["bytes_received"] += sent
+
+
+def serve(wikis=1, pages=0, page_size=1024, latency=0.0, ratelimit_every=0,
+        host="127.0.0.1"):
+    """
+    The ``serve`` function starts one ``FakeWikiServer`` per wiki, each on a
+    port of its own chosen by the operating system, and serves them from
+    daemon threads. The wikis' ``api.php`` URLs are derived from their ports,
+    i.e. ``http://127.0.0.1:49152``.
+        :param wikis: An optional integer denoting the number of wikis
+        :param pages: An optional integer denoting the number of pages per wiki
+        :param page_size: An optional integer denoting the approximate size of
+            each page in characters
+        :param latency: An optional float denoting the delay in seconds before
+            each response is sent
+        :param ratelimit_every: An optional integer. If nonzero, every nth edit
+            made to each wiki is refused with a ``ratelimited`` error.
+        :param host: An optional string denoting the address to bind to
+        :return: A list of the base URLs of the wikis
+    """
+    stats = {"requests": 0, "bytes_sent": 0, "bytes_received": 0}
+    servers = []
+
+    for _ in range(wikis):
+        server = FakeWikiServer((host, 0), FakeWiki(pages, page_size), stats,
+            servers, latency, ratelimit_every)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+
+    return [f"http://{host}:{server.server_address[1]}" for server in servers]
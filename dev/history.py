@@ -0,0 +1,271 @@
+"""
+The ``history`` module houses a local store of the complete revision history of
+a wiki page, so that any earlier version of a script may be recovered without
+paging through ``action=history`` on the wiki. Rather than a full copy of each
+revision, only the lines changed since the revision before it are stored, as a
+compressed delta, along with a full copy every ``CHECKPOINT_INTERVAL``
+revisions so that no version lies more than that many deltas from a copy it may
+be rebuilt from. The store is only ever appended to, new revisions being added
+as they are fetched by later runs.
+"""
+
+__all__ = [
+    "HistoryStore",
+    "apply_delta",
+    "build_delta"
+]
+__author__ = "Andrew Eissen"
+__version__ = "0.1"
+
+import difflib
+import hashlib
+import json
+import os
+import zlib
+
+import dev.util as util
+
+# Bumped whenever the layout of the store changes, invalidating saved stores
+HISTORY_VERSION = 1
+
+# Greatest number of deltas stored in a row before another full copy
+CHECKPOINT_INTERVAL = 50
+
+# Details of each revision recorded alongside its content
+REVISION_KEYS = ("revid", "parentid", "timestamp", "user", "comment", "sha1",
+    "size")
+
+
+def apply_delta(lines, delta):
+    """
+    The ``apply_delta`` function rebuilds the lines of a revision from those of
+    the revision before it and the delta between them.
+        :param lines: A list of strings representing the lines of the earlier
+            revision, line endings included
+        :param delta: A list as returned by ``build_delta``
+        :return: A list of strings representing the lines of the later revision
+    """
+    output = []
+    for operation in delta:
+        if isinstance(operation, str):
+            output.append(operation)
+        else:
+            output.extend(lines[operation[0]:operation[1]])
+    return output
+
+
+def build_delta(old_lines, new_lines):
+    """
+    The ``build_delta`` function describes a revision in terms of the revision
+    before it, as a list whose members are either pairs of indices denoting a
+    run of lines kept from the earlier revision or strings of text inserted in
+    place of the lines removed. Unchanged lines thereby cost a few bytes apiece
+    per run rather than their full length.
+        :param old_lines: A list of strings representing the lines of the
+            earlier revision, line endings included
+        :param new_lines: A list of strings representing the lines of the later
+            revision, line endings included
+        :return delta: A JSON-serializable list of operations
+    """
+    delta = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines)
+
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            delta.append([i1, i2])
+        elif j1 < j2:
+            delta.append("".join(new_lines[j1:j2]))
+
+    return delta
+
+
+class HistoryStore:
+    """
+    The ``HistoryStore`` class holds the revisions of a single page in a pair of
+    files, one of JSON listing the details of each revision in chronological
+    order and one of the compressed deltas and copies themselves, to which new
+    revisions are appended. Revisions whose content is hidden on the wiki are
+    listed without content, and the revision after them is stored relative to
+    the last revision whose content is known.
+    """
+
+    def __init__(self, history_file):
+        """
+        The ``HistoryStore`` constructor loads the store, if any, kept at the
+        given location. A missing, corrupt or outdated store yields an empty
+        store.
+            :param history_file: A string path to the store, to which the
+                extensions ``.json`` and ``.bin`` are appended for its files
+        """
+        self.index_file = f"{history_file}.json"
+        self.data_file = f"{history_file}.bin"
+
+        # Lines of the latest revision whose content is known, once rebuilt
+        self._lines = None
+
+        try:
+            index = util.get_json_file(self.index_file)
+            assert index["version"] == HISTORY_VERSION
+            assert os.path.isfile(self.data_file)
+            self._revisions = index["revisions"]
+        except (IOError, json.decoder.JSONDecodeError, AssertionError,
+                KeyError, TypeError):
+            self._revisions = []
+
+        self._positions = {revision["revid"]: position
+            for position, revision in enumerate(self._revisions)}
+
+    def _read_lines(self, position):
+        """
+        The private ``_read_lines`` method rebuilds the lines of the revision at
+        the given position from the nearest full copy at or before it and the
+        deltas stored since.
+            :param position: An integer denoting the index of the revision in
+                the list of revisions
+            :return: A list of strings representing the lines of the revision,
+                or ``None`` if its content is hidden
+        """
+        if self._revisions[position]["offset"] is None:
+            return None
+
+        # Blobs to be read, from the revision back to the nearest full copy
+        chain = []
+        for revision in reversed(self._revisions[:position + 1]):
+            if revision["offset"] is not None:
+                chain.append(revision)
+                if revision["full"]:
+                    break
+
+        lines = []
+        with open(self.data_file, "rb") as data:
+            for revision in reversed(chain):
+                data.seek(revision["offset"])
+
+                try:
+                    blob = zlib.decompress(data.read(revision["length"]))
+                except zlib.error as error:
+                    raise ValueError(f"Corrupt revision {revision['revid']}")\
+                        from error
+
+                # May throw UnicodeDecodeError or JSONDecodeError
+                blob = blob.decode("UTF-8")
+                lines = blob.splitlines(True) if revision["full"] else\
+                    apply_delta(lines, json.loads(blob))
+
+        return lines
+
+    @property
+    def latest_revid(self):
+        """
+        The ``latest_revid`` property provides the ID of the newest stored
+        revision, from which later runs resume fetching.
+            :return: An integer, or ``None`` if the store is empty
+        """
+        return self._revisions[-1]["revid"] if self._revisions else None
+
+    @property
+    def revisions(self):
+        """
+        The ``revisions`` property provides the details of the stored
+        revisions, oldest first.
+            :return: A list of dictionaries holding the ``REVISION_KEYS`` of
+                each revision
+        """
+        return [{key: revision.get(key) for key in REVISION_KEYS}
+            for revision in self._revisions]
+
+    def add(self, revision):
+        """
+        The ``add`` method appends a revision newer than any already stored,
+        as a delta against the latest revision of known content or, every
+        ``CHECKPOINT_INTERVAL`` revisions, as a full copy. Revisions already
+        stored are skipped.
+            :param revision: A dictionary holding the ``REVISION_KEYS`` of the
+                revision and its ``content``, which is ``None`` if hidden
+            :return: A status boolean indicating whether the revision was added
+        """
+        if self._revisions and revision["revid"] <= self.latest_revid:
+            return False
+
+        record = {key: revision.get(key) for key in REVISION_KEYS}
+        record["offset"] = record["length"] = None
+        record["full"] = False
+
+        if revision["content"] is not None:
+            # Positions of the revisions whose content is stored
+            stored = [position for position, entry in enumerate(
+                self._revisions) if entry["offset"] is not None]
+
+            if self._lines is None and stored:
+                # May throw IOError or ValueError
+                self._lines = self._read_lines(stored[-1])
+
+            lines = revision["content"].splitlines(True)
+            is_full = self._lines is None or not any(
+                self._revisions[position]["full"]
+                for position in stored[-CHECKPOINT_INTERVAL:])
+
+            blob = revision["content"] if is_full else json.dumps(
+                build_delta(self._lines, lines), ensure_ascii=False,
+                separators=(",", ":"))
+            blob = zlib.compress(blob.encode("UTF-8"), 9)
+
+            # May throw OSError
+            os.makedirs(os.path.dirname(self.data_file) or ".", exist_ok=True)
+            with open(self.data_file, "ab") as data:
+                record["offset"] = data.tell()
+                data.write(blob)
+
+            record["length"] = len(blob)
+            record["full"] = is_full
+            self._lines = lines
+
+        self._positions[record["revid"]] = len(self._revisions)
+        self._revisions.append(record)
+        return True
+
+    def get_content(self, revid):
+        """
+        The ``get_content`` method rebuilds the content of a stored revision,
+        checking it against the SHA-1 hash reported by the wiki.
+            :param revid: An integer denoting the ID of the revision
+            :return content: A string representing the content of the revision,
+                or ``None`` if its content is hidden
+        """
+
+        # May throw KeyError if the revision is not stored
+        position = self._positions[revid]
+
+        # May throw IOError or ValueError
+        lines = self._read_lines(position)
+        if lines is None:
+            return None
+
+        content = "".join(lines)
+        sha1 = self._revisions[position]["sha1"]
+        if sha1 and hashlib.sha1(content.encode("UTF-8")).hexdigest() != sha1:
+            raise ValueError(f"Revision {revid} does not match its hash")
+
+        return content
+
+    def get_sizes(self):
+        """
+        The ``get_sizes`` method totals the size of the stored revisions as
+        reported by the wiki and the space they occupy in the store.
+            :return: A tuple of the integer numbers of bytes of text and of
+                bytes stored
+        """
+        return (sum(revision["size"] or 0 for revision in self._revisions),
+            sum(revision["length"] or 0 for revision in self._revisions))
+
+    def save(self):
+        """
+        The ``save`` method writes the list of revisions to disk. As the blobs
+        of new revisions are appended before the list naming them is written,
+        a store interrupted between the two merely holds unreferenced bytes.
+            :return: None
+        """
+        util.write_json_file({
+            "version": HISTORY_VERSION,
+            "revisions": self._revisions
+        }, self.index_file)
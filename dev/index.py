@@ -0,0 +1,251 @@
+"""
+The ``index`` module houses a trigram index over the locally cached text of a
+wiki's pages, the Python counterpart of the find functionality of the JavaScript
+application. Whereas the browser downloads and scans the content of every page
+for each search, the index maps each sequence of three characters to the pages
+containing it, so that a search need only confirm its matches on those pages
+containing every trigram of the literal text any match must include. The index
+is brought up to date incrementally, only pages whose content has changed since
+it was last updated being indexed anew.
+"""
+
+__all__ = [
+    "TrigramIndex",
+    "get_required_literals"
+]
+__author__ = "Andrew Eissen"
+__version__ = "0.1"
+
+import array
+import os
+import pickle
+
+try:
+    import re._parser as sre_parse
+    import re._constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+
+# Bumped whenever the layout of the index changes, invalidating saved indices
+INDEX_VERSION = 1
+
+# Length of the substrings by which pages are indexed
+GRAM_LENGTH = 3
+
+# Opcodes of repeats, which require their item at least ``min`` times
+REPEAT_OPCODES = tuple(getattr(sre_constants, opcode) for opcode in
+    ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+    if hasattr(sre_constants, opcode))
+
+
+def _get_grams(text):
+    """
+    The private ``_get_grams`` function splits case-folded text into the set
+    of its distinct trigrams. Text is case-folded so that a single index serves
+    both case-sensitive and case-insensitive searches.
+        :param text: A string of case-folded text
+        :return: A set of strings of ``GRAM_LENGTH`` characters
+    """
+    return {text[index:index + GRAM_LENGTH]
+        for index in range(len(text) - GRAM_LENGTH + 1)}
+
+
+def get_required_literals(regexp):
+    """
+    The ``get_required_literals`` function determines runs of literal text that
+    every match of a regex must contain, i.e. ``"foo"`` and ``"bar"`` in the
+    case of ``foo\\d+bar``. Alternations, character classes and optional items
+    break runs without contributing to them, so that no required run is ever
+    overstated. Runs are returned case-folded, as the index stores them.
+        :param regexp: A compiled ``re.Pattern``, as returned by
+            ``replace.build_regexp``
+        :return: A list of strings, empty if no text is required of matches or
+            the regex could not be analyzed
+    """
+    literals = []
+    run = []
+
+    def flush():
+        if run:
+            literals.append("".join(run).casefold())
+            run.clear()
+
+    def walk(items):
+        for opcode, argument in items:
+            if opcode == sre_constants.LITERAL:
+                run.append(chr(argument))
+            elif opcode == sre_constants.SUBPATTERN:
+                # Groups without quantifiers are part of the enclosing run
+                walk(argument[-1])
+            elif opcode in REPEAT_OPCODES and argument[0] >= 1:
+                flush()
+                walk(argument[2])
+                flush()
+            else:
+                flush()
+
+    try:
+        walk(sre_parse.parse(regexp.pattern, regexp.flags))
+    except (AttributeError, TypeError, ValueError, RecursionError):
+        return []
+
+    flush()
+    return literals
+
+
+class TrigramIndex:
+    """
+    The ``TrigramIndex`` class maps the trigrams of a wiki's pages to the pages
+    containing them. Like ``cache.PageCache``, it is keyed by the SHA-1 hash of
+    page content, so that pages of identical content are indexed only once and
+    a page is reindexed only once its hash changes. Postings of content no
+    longer held by any page are left in place and merely disregarded until they
+    outnumber those still in use, whereupon the index is rebuilt.
+    """
+
+    def __init__(self, index_file):
+        """
+        The ``TrigramIndex`` constructor loads the index, if any, from the
+        given file. A missing, corrupt or outdated index yields an empty index.
+            :param index_file: A string path to the file of the index
+        """
+        self.index_file = index_file
+
+        try:
+            with open(index_file, "rb") as file:
+                data = pickle.load(file)
+            assert data["version"] == INDEX_VERSION
+            self._pages = data["pages"]
+            self._documents = data["documents"]
+            self._postings = data["postings"]
+        except (OSError, pickle.UnpicklingError, EOFError, AssertionError,
+                AttributeError, KeyError, TypeError, ValueError):
+            self._reset()
+
+    def _add(self, sha1, text):
+        """
+        The private ``_add`` method indexes the content of a page under a new
+        document ID, appending it to the postings of each of its trigrams.
+        As documents are only ever removed by resetting the index, IDs only
+        ever increase, and postings remain sorted.
+            :param sha1: The SHA-1 hash of the content
+            :param text: A string representing the content
+            :return: None
+        """
+        document = self._documents[sha1] = len(self._documents)
+
+        for gram in _get_grams(text.casefold()):
+            self._postings.setdefault(gram, array.array("I")).append(document)
+
+    def _reset(self):
+        self._pages = {}
+        self._documents = {}
+        self._postings = {}
+
+    @property
+    def pages(self):
+        """
+        The ``pages`` property provides the names of the indexed pages.
+            :return: A set of strings representing the names of the pages
+        """
+        return set(self._pages)
+
+    def get_candidates(self, literals):
+        """
+        The ``get_candidates`` method narrows the indexed pages to those whose
+        content contains every trigram of each of the given runs of literal
+        text. Pages so found may still not match, but no page left out can.
+            :param literals: An iterable of case-folded strings, as returned by
+                ``get_required_literals``
+            :return: A set of strings representing the names of the pages
+        """
+        grams = set().union(*(_get_grams(literal) for literal in literals))
+        if not grams:
+            return self.pages
+
+        # Intersect the shortest postings first to keep intermediate sets small
+        postings = sorted((self._postings.get(gram, ()) for gram in grams),
+            key=len)
+        documents = set(postings[0])
+        for posting in postings[1:]:
+            if not documents:
+                break
+            documents.intersection_update(posting)
+
+        return {page for page, sha1 in self._pages.items()
+            if self._documents[sha1] in documents}
+
+    def save(self):
+        """
+        The ``save`` method writes the index to its file.
+            :return: None
+        """
+        os.makedirs(os.path.dirname(self.index_file) or ".", exist_ok=True)
+
+        # Write to a temporary file so that no partial index is ever loaded
+        with open(f"{self.index_file}.tmp", "wb") as file:
+            pickle.dump({
+                "version": INDEX_VERSION,
+                "pages": self._pages,
+                "documents": self._documents,
+                "postings": self._postings
+            }, file, pickle.HIGHEST_PROTOCOL)
+        os.replace(f"{self.index_file}.tmp", self.index_file)
+
+    def search(self, regexp, get_content, pages=None):
+        """
+        The ``search`` method finds the indexed pages whose content matches a
+        regex. Candidates are first narrowed by means of the index, and the
+        regex is then applied to the content of the candidates alone.
+            :param regexp: A compiled ``re.Pattern``, as returned by
+                ``replace.build_regexp``
+            :param get_content: A callable taking a page name and returning its
+                content, or ``None`` if it is unavailable
+            :param pages: An optional iterable of page names to which the
+                search is confined
+            :return: A sorted list of strings representing the names of the
+                matching pages
+        """
+        candidates = self.get_candidates(get_required_literals(regexp))
+        if pages is not None:
+            candidates.intersection_update(pages)
+
+        matches = []
+        for page in sorted(candidates):
+            content = get_content(page)
+            if content is not None and regexp.search(content):
+                matches.append(page)
+
+        return matches
+
+    def update(self, pages, get_content):
+        """
+        The ``update`` method brings the index in line with the given pages.
+        Pages whose content hash is unchanged are left as they are, pages no
+        longer present are dropped, and new content is fetched and indexed. If
+        more content is indexed than is still in use, the index is rebuilt from
+        the content in use.
+            :param pages: A dictionary mapping the names of all pages to be
+                indexed to the SHA-1 hashes of their content
+            :param get_content: A callable taking a page name and returning its
+                content, or ``None`` if it is unavailable
+            :return: An integer denoting the number of pages indexed anew
+        """
+        in_use = set(pages.values())
+        if len(self._documents) > 2 * len(in_use):
+            self._reset()
+
+        indexed = 0
+        self._pages = {}
+
+        for page, sha1 in pages.items():
+            if sha1 not in self._documents:
+                content = get_content(page)
+                if content is None:
+                    continue
+                self._add(sha1, content)
+                indexed += 1
+            self._pages[page] = sha1
+
+        return indexed
@@ -0,0 +1,127 @@
+"""
+The ``journal`` module houses the append-only journal by which bulk operations
+are made resumable. As each page is finished, a line recording its title and
+revision is appended to the journal, as is the ``continue`` object of each
+member enumeration once every member listed before it has been finished. A run
+cut short by a crash, a rate limit or the user may thereby be resumed exactly
+where it stopped, without enumerating the members listed before that point
+again or refetching and rechecking the pages already finished.
+"""
+
+__all__ = [
+    "Journal"
+]
+__author__ = "Andrew Eissen"
+__version__ = "0.1"
+
+import json
+import os
+
+
+class Journal:
+    """
+    The ``Journal`` class records the progress of a bulk operation in a file of
+    JSON lines. Each line is flushed as soon as it is written, so that no more
+    than the page in progress is lost should the process die. Lines left
+    incomplete by such a death are ignored when the journal is read.
+    """
+
+    def __init__(self, journal_file, resume=False):
+        """
+        The ``Journal`` constructor opens a journal for appending. If resuming,
+        the progress recorded by an earlier run is read first; otherwise any
+        earlier journal is discarded.
+            :param journal_file: A string path to the journal
+            :param resume: An optional boolean indicating whether to continue
+                the journal of an earlier run rather than starting afresh
+        """
+        self.journal_file = journal_file
+        self.done = {}
+        self.failed = set()
+        self.continuation = None
+
+        if resume:
+            self._load()
+
+        # May throw OSError
+        os.makedirs(os.path.dirname(journal_file) or ".", exist_ok=True)
+        self._file = open(journal_file, "a" if resume else "w",
+            encoding="UTF-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _load(self):
+        """
+        The private ``_load`` method reads the progress recorded by an earlier
+        run, if any. Pages that failed and were later finished count as done.
+            :return: None
+        """
+        try:
+            with open(self.journal_file, encoding="UTF-8") as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return
+
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except json.decoder.JSONDecodeError:
+                continue
+
+            if "continue" in entry:
+                self.continuation = entry["continue"]
+            elif entry.get("failed"):
+                self.failed.add(entry["page"])
+            elif "page" in entry:
+                self.done[entry["page"]] = entry.get("revid")
+                self.failed.discard(entry["page"])
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def close(self):
+        """
+        The ``close`` method closes the journal's file.
+            :return: None
+        """
+        self._file.close()
+
+    def record_continuation(self, continuation):
+        """
+        The ``record_continuation`` method records the ``continue`` object from
+        which a member enumeration is to be resumed. It may only be recorded
+        once every member listed before it has been recorded as done or failed.
+            :param continuation: The ``continue`` object of an API response
+            :return: None
+        """
+        if continuation != self.continuation:
+            self.continuation = continuation
+            self._write({"continue": continuation})
+
+    def record_failure(self, page):
+        """
+        The ``record_failure`` method records that a page could not be
+        finished, so that a resumed run retries it.
+            :param page: A string representing the name of the page
+            :return: None
+        """
+        self.failed.add(page)
+        self._write({"page": page, "failed": True})
+
+    def record_page(self, page, revid=None):
+        """
+        The ``record_page`` method records that a page has been finished,
+        whether edited or found to need no edit.
+            :param page: A string representing the name of the page
+            :param revid: An optional integer denoting the ID of the revision
+                left by the operation
+            :return: None
+        """
+        self.done[page] = revid
+        self.failed.discard(page)
+        self._write({"page": page, "revid": revid})
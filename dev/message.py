@@ -0,0 +1,195 @@
+"""
+The ``message`` module houses the means by which users are messaged in bulk,
+the Python counterpart of the messaging functionality of the JavaScript
+application. Recipients are vetted by the same rules, whereby only existing
+users who have edited the wiki within the last ninety days may be messaged, but
+in batches of fifty users per query rather than one user at a time. Messages
+bound for Message Walls are converted from parsed HTML into the ProseMirror
+style "jsonModel" the walls require, as in ``main.buildJsonModel``.
+"""
+
+__all__ = [
+    "JsonModelParser",
+    "build_json_model",
+    "get_recipients",
+    "is_legal_input",
+    "normalize_username"
+]
+__author__ = "Andrew Eissen"
+__version__ = "0.1"
+
+import datetime
+import html.parser
+import json
+import re
+import urllib.parse
+
+# Characters permitted in titles by Fandom's wgLegalTitleChars
+LEGAL_TITLE_CHARS = r" %!\"$&'()*,\-./0-9:;=?@A-Z\\^_`a-z~+\u0080-\uFFFF"
+
+# Number of days within which recipients must have edited the wiki
+DAYS_ACTIVE = 90
+
+# Canonical name of the namespace prefixed to user pages
+USER_NAMESPACE = "User"
+
+
+class JsonModelParser(html.parser.HTMLParser):
+    """
+    The ``JsonModelParser`` class converts the HTML of a parsed message into a
+    jsonModel, after the fashion of the JavaScript application's
+    ``main.assembleJsonModelObject`` method, which was itself adapted from an
+    earlier implementation based on this very ``html.parser`` module. At
+    present, only paragraphs and links are represented; all other elements are
+    ignored.
+    """
+
+    def __init__(self):
+        """
+        The ``JsonModelParser`` constructor creates an empty jsonModel along
+        with the stacks of open paragraphs and links.
+        """
+        super().__init__()
+        self.json_model = {
+            "type": "doc",
+            "content": []
+        }
+        self._paragraphs = []
+        self._links = []
+
+    def handle_data(self, data):
+        if self._links:
+            # Apply the text to the active link as its text
+            self._links[-1]["text"] = data
+        elif self._paragraphs:
+            self._paragraphs[-1]["content"].append({
+                "type": "text",
+                "text": data
+            })
+
+    def handle_endtag(self, tag):
+        if tag == "p" and self._paragraphs:
+            self.json_model["content"].append(self._paragraphs.pop())
+        elif tag == "a" and self._links:
+            self._links.pop()
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "p":
+            self._paragraphs.append({
+                "type": "paragraph",
+                "content": []
+            })
+        elif tag == "a":
+            # jsonModel only cares for href and title link attributes
+            link = {
+                "type": "text",
+                "marks": [{
+                    "type": "link",
+                    "attrs": {name: value for name, value in attrs
+                        if name in ("href", "title")}
+                }]
+            }
+            self._links.append(link)
+            if self._paragraphs:
+                self._paragraphs[-1]["content"].append(link)
+
+
+def build_json_model(parsed_html, wiki_url):
+    """
+    The ``build_json_model`` function converts the HTML of a parsed message
+    into the stringified jsonModel accepted by the Message Wall controller.
+    Links relative to the wiki are first made absolute, as is done by the
+    JavaScript ``main.expandLinkAddress`` method.
+        :param parsed_html: A string of HTML as returned by
+            ``api.parse_wikitext``
+        :param wiki_url: A link to the wiki or a page on the wiki
+        :return: A string representing the jsonModel
+    """
+    uri = urllib.parse.urlparse(wiki_url.strip(" "))
+    parser = JsonModelParser()
+    parser.feed(parsed_html.replace('href="/wiki',
+        f'href="{uri.scheme}://{uri.netloc}/wiki'))
+    parser.close()
+    return json.dumps(parser.json_model)
+
+
+def get_recipients(client, users, days_active=DAYS_ACTIVE):
+    """
+    The ``get_recipients`` function vets a list of would-be recipients by the
+    rules of the JavaScript ``main.getActiveUsersData`` method. Users that do
+    not exist, have never edited or have not edited within ``days_active`` days
+    are rejected, so that the messaging functionality cannot be used to spam
+    users from a freshly created wiki. Users are looked up fifty at a time.
+        :param client: The ``ApiClient`` of the wiki
+        :param users: An iterable of strings representing the user names
+        :param days_active: An optional integer denoting the number of days
+            within which recipients must have edited
+        :return: A tuple of a list of dictionaries holding the ``name`` and
+            ``userid`` of each recipient and a dictionary mapping the names of
+            rejected users to the reason for their rejection, one of
+            ``"invalid"``, ``"missing"``, ``"not_editor"`` or ``"inactive"``
+    """
+    recipients = []
+    rejected = {}
+
+    # Normalized names in order of appearance, less any duplicates
+    names = {}
+
+    for user in users:
+        name = normalize_username(user)
+        if name is None:
+            rejected[user] = "invalid"
+        else:
+            names.setdefault(name)
+
+    # Contributions made before this point in time are disregarded
+    active_since = (datetime.datetime.now(datetime.timezone.utc) -
+        datetime.timedelta(days=days_active)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    # May throw HTTPError, JSONDecodeError, AssertionError, or KeyError
+    for user in client.get_users(names, active_since):
+        if "invalid" in user:
+            rejected[user["name"]] = "invalid"
+        elif "missing" in user or "userid" not in user:
+            rejected[user["name"]] = "missing"
+        elif not user.get("editcount"):
+            rejected[user["name"]] = "not_editor"
+        elif user["lastedit"] is None:
+            rejected[user["name"]] = "inactive"
+        else:
+            recipients.append({
+                "name": user["name"],
+                "userid": user["userid"]
+            })
+
+    return recipients, rejected
+
+
+def is_legal_input(string):
+    """
+    The ``is_legal_input`` function is the counterpart of the JavaScript
+    ``main.isLegalInput`` method, determining whether a string consists solely
+    of characters permitted in titles.
+        :param string: The string to be checked
+        :return: A boolean indicating whether the string is permissible
+    """
+    return re.fullmatch(f"[{LEGAL_TITLE_CHARS}]*", string) is not None
+
+
+def normalize_username(user):
+    """
+    The ``normalize_username`` function brings a user name into the form used
+    by MediaWiki, stripping any ``User:`` prefix, replacing underscores with
+    spaces and capitalizing the first letter, as ``main.getValidatedEntries``
+    does for recipients.
+        :param user: A string representing the user name
+        :return: The normalized user name, or ``None`` if the name contains
+            characters not permitted in titles
+    """
+    name = user.strip().replace("_", " ")
+    if name[:len(USER_NAMESPACE) + 1].lower() == f"{USER_NAMESPACE.lower()}:":
+        name = name[len(USER_NAMESPACE) + 1:].strip()
+
+    if not name or not is_legal_input(name):
+        return None
+    return name[0].upper() + name[1:]
@@ -0,0 +1,208 @@
+"""
+The ``mirror`` module houses the local mirror of every page on a wiki whose
+title begins with one of a number of prefixes, such as the subpages of a script
+and of its i18n data, pages created by other users included. The pages are
+listed once, after which the mirror is kept current by way of the wiki's recent
+changes, only the pages changed since the mirror was last brought up to date
+being fetched anew. Each page is written to a file named for its title within a
+directory named for its namespace, i.e. ``MediaWiki/MassEdit%2Fcode.js`` for
+``MediaWiki:MassEdit/code.js``.
+"""
+
+__all__ = [
+    "Mirror",
+    "get_local_path",
+    "resolve_prefix"
+]
+__author__ = "Andrew Eissen"
+__version__ = "0.1"
+
+import calendar
+import json
+import os
+import time
+import urllib.parse
+
+import dev.util as util
+
+# Bumped whenever the layout of the record changes, invalidating saved records
+MIRROR_VERSION = 1
+
+# Age in seconds past which changes may have aged out of the recent changes,
+# well short of the 90 days for which MediaWiki keeps them by default
+MAX_CHANGE_AGE = 30 * 24 * 60 * 60
+
+# Characters of titles left as they are in file names, others being escaped
+SAFE_CHARS = " !$&'()+,;=@[]^_`{}~-."
+
+# Format of the timestamps returned by the API
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def get_local_path(directory, page):
+    """
+    The ``get_local_path`` function determines the file to which a page is
+    mirrored. Slashes and such other characters as file names may not contain
+    are percent-encoded, so that a page and its subpages, i.e. ``Foo`` and
+    ``Foo/bar``, may be mirrored side by side.
+        :param directory: A string path to the directory of the mirror
+        :param page: A string representing the name of the page
+        :return: A string path to the page's file
+    """
+    namespace, separator, title = page.partition(":")
+    if not separator:
+        namespace, title = "", page
+
+    return os.path.join(directory, *filter(None, (namespace,
+        urllib.parse.quote(title, safe=SAFE_CHARS))))
+
+
+def resolve_prefix(prefix, site_info):
+    """
+    The ``resolve_prefix`` function divides a prefix such as
+    ``MediaWiki:MassEdit/`` into the number of its namespace and the remainder,
+    as taken by ``list=allpages``, by means of the wiki's namespaces and their
+    aliases. The prefix is also returned with the namespace written as the wiki
+    writes it in titles, against which changed titles may be compared.
+        :param prefix: A string representing the beginning of the titles of the
+            pages to be mirrored
+        :param site_info: A dictionary as returned by ``api.get_site_info``
+            with the ``namespaces`` and ``namespacealiases`` properties
+        :return: A tuple of the integer number of the namespace, the string
+            remainder of the prefix and the string prefix of titles
+    """
+    name, separator, remainder = prefix.partition(":")
+    namespaces = site_info["namespaces"].values()
+
+    # Names of all namespaces, canonical and localized, and their aliases
+    names = {}
+    for namespace in namespaces:
+        for key in ("name", "canonical"):
+            if namespace.get(key):
+                names[namespace[key].casefold()] = namespace["id"]
+    for alias in site_info.get("namespacealiases", []):
+        names[alias["alias"].casefold()] = alias["id"]
+
+    number = names.get(name.replace("_", " ").strip().casefold())
+    if not separator or not number:
+        return 0, prefix, prefix
+
+    local_name = next(namespace["name"] for namespace in namespaces
+        if namespace["id"] == number)
+    return number, remainder, f"{local_name}:{remainder}"
+
+
+class Mirror:
+    """
+    The ``Mirror`` class keeps the record of a mirror, namely the prefixes
+    mirrored, the latest revision of each page as last written and the time of
+    the latest change seen, from which the recent changes are next consulted,
+    along with the IDs of the changes seen at that time, which are listed again
+    by the next check. The record is saved in a file of its own, apart from the
+    mirrored pages.
+    """
+
+    def __init__(self, record_file, directory):
+        """
+        The ``Mirror`` constructor loads the record of the mirror, if any, from
+        the given file. A missing, corrupt or outdated record yields an empty
+        mirror, whose pages are listed anew.
+            :param record_file: A string path to the file of the record
+            :param directory: A string path to the directory of the mirror
+        """
+        self.record_file = record_file
+        self.directory = directory
+
+        try:
+            record = util.get_json_file(record_file)
+            assert record["version"] == MIRROR_VERSION
+            self.prefixes = record["prefixes"]
+            self.pages = record["pages"]
+            self.timestamp = record["timestamp"]
+            self.seen = record["seen"]
+        except (IOError, json.decoder.JSONDecodeError, AssertionError,
+                KeyError, TypeError):
+            self.prefixes = []
+            self.pages = {}
+            self.timestamp = None
+            self.seen = []
+
+    @property
+    def is_stale(self):
+        """
+        The ``is_stale`` property indicates whether the mirror must be listed
+        anew, either because it never was or because it was last brought up to
+        date so long ago that changes since may no longer be listed among the
+        wiki's recent changes.
+            :return: A boolean
+        """
+        if self.timestamp is None:
+            return True
+
+        seen = calendar.timegm(time.strptime(self.timestamp, TIMESTAMP_FORMAT))
+        return time.time() - seen > MAX_CHANGE_AGE
+
+    def has_page(self, page):
+        """
+        The ``has_page`` method determines whether a page falls under any of
+        the mirrored prefixes.
+            :param page: A string representing the name of the page
+            :return: A boolean
+        """
+        return any(page.startswith(title_prefix)
+            for _, _, title_prefix in self.prefixes)
+
+    def put(self, page, revision):
+        """
+        The ``put`` method writes the content of a page's latest revision to
+        the page's file, unless the file already holds it.
+            :param page: A string representing the name of the page
+            :param revision: A dictionary holding the ``revid``, ``sha1`` and
+                ``content`` of the revision
+            :return: A status boolean indicating whether the file was written
+        """
+        local_path = get_local_path(self.directory, page)
+        if self.pages.get(page, {}).get("sha1") == revision["sha1"] and\
+                os.path.isfile(local_path):
+            self.pages[page]["revid"] = revision["revid"]
+            return False
+
+        # May throw OSError
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        util.write_to_file(revision["content"], local_path)
+
+        self.pages[page] = {
+            "revid": revision["revid"],
+            "sha1": revision["sha1"]
+        }
+        return True
+
+    def remove(self, page):
+        """
+        The ``remove`` method deletes the file of a page that has been deleted
+        or moved out of the mirrored prefixes.
+            :param page: A string representing the name of the page
+            :return: A status boolean indicating whether the page was mirrored
+        """
+        if self.pages.pop(page, None) is None:
+            return False
+
+        try:
+            os.remove(get_local_path(self.directory, page))
+        except FileNotFoundError:
+            pass
+
+        return True
+
+    def save(self):
+        """
+        The ``save`` method writes the record of the mirror to disk.
+            :return: None
+        """
+        util.write_json_file({
+            "version": MIRROR_VERSION,
+            "prefixes": self.prefixes,
+            "timestamp": self.timestamp,
+            "seen": self.seen,
+            "pages": self.pages
+        }, self.record_file)
@@ -0,0 +1,169 @@
+"""
+The ``replace`` module houses a headless counterpart of the find-and-replace
+functionality of the JavaScript application. Its functions mirror
+``main.buildRegExp`` and ``main.replaceOccurrences`` so that targets, flags,
+replacement patterns and occurrence indices behave exactly as they do in the
+browser, while the replacement itself may be spread across several processes
+when a batch of pages is large enough to make doing so worthwhile.
+"""
+
+__all__ = [
+    "build_regexp",
+    "replace_in_texts",
+    "replace_occurrences"
+]
+__author__ = "Andrew Eissen"
+__version__ = "0.1"
+
+import functools
+import os
+import re
+
+# Total length in characters of a batch beyond which it is replaced in parallel
+PARALLEL_THRESHOLD = 1024 * 1024
+
+# JavaScript replacement patterns, i.e. $$, $&, $`, $', $1 and $<name>
+REPLACEMENT_PATTERN = re.compile(r"\$(?:(\$)|(&)|(`)|(')|(\d{1,2})|<([^>]*)>)")
+
+
+def _expand_replacement(match, replacement):
+    """
+    The private ``_expand_replacement`` function substitutes the special
+    patterns of a JavaScript ``String.prototype.replace`` replacement string for
+    the parts of a match to which they refer. Patterns that refer to no such
+    part, i.e. ``$9`` in a regex of two groups, are left as they are, as they
+    are by JavaScript.
+        :param match: The ``re.Match`` whose text is being replaced
+        :param replacement: A string representing the replacement text
+        :return: The replacement text with all patterns substituted
+    """
+
+    def substitute(pattern):
+        dollar, whole, before, after, number, name = pattern.groups()
+
+        if dollar:
+            return "$"
+        elif whole:
+            return match.group()
+        elif before:
+            return match.string[:match.start()]
+        elif after:
+            return match.string[match.end():]
+        elif number is not None:
+            # Two-digit references fall back to one digit followed by a literal
+            for digits in (number, number[0]):
+                if 0 < int(digits) <= match.re.groups:
+                    return (match.group(int(digits)) or "") +\
+                        number[len(digits):]
+            return pattern.group()
+        elif match.re.groupindex:
+            return match.groupdict().get(name) or ""
+        else:
+            return pattern.group()
+
+    return REPLACEMENT_PATTERN.sub(substitute, replacement)
+
+
+def _replace(regexp, replacement, instances, text):
+    """
+    The private ``_replace`` function performs the replacement described by
+    ``replace_occurrences`` on a single text. It resides at module level so that
+    it, and thereby replacers built from it, may be sent to worker processes.
+        :param regexp: The compiled ``re.Pattern`` of the target
+        :param replacement: A string representing the replacement text
+        :param instances: A collection of the one-based indices of the
+            occurrences to be replaced, or an empty collection for all
+        :param text: A string representing the text in which to replace
+        :return: The text with the occurrences replaced
+    """
+
+    # Counter of occurrences encountered, restarted for every text
+    counter = 0
+
+    def substitute(match):
+        nonlocal counter
+        counter += 1
+        return _expand_replacement(match, replacement)\
+            if not instances or counter in instances else match.group()
+
+    return regexp.sub(substitute, text)
+
+
+def _translate_regexp(target):
+    """
+    The private ``_translate_regexp`` function rewrites the JavaScript syntax
+    for named groups and named backreferences, ``(?<name>...)`` and
+    ``\\k<name>``, into the forms understood by Python's ``re`` module. The
+    remainder of the syntax common to user regexes is shared by both.
+        :param target: A string representing a JavaScript regex
+        :return: The equivalent Python regex string
+    """
+    target = re.sub(r"(?<!\\)\(\?<(?=[A-Za-z_])", "(?P<", target)
+    return re.sub(r"\\k<([A-Za-z_]\w*)>", r"(?P=\1)", target)
+
+
+def build_regexp(target, is_regex, is_case_sensitive):
+    """
+    The ``build_regexp`` function is the counterpart of the JavaScript
+    ``main.buildRegExp`` method. Plain targets are stripped of carriage returns
+    and escaped, while regex targets are used as given. In either case, the
+    resulting regex is multiline and, unless ``is_case_sensitive`` is set,
+    case-insensitive.
+        :param target: A string representing the target text or regex
+        :param is_regex: A boolean denoting whether the target is a regex
+        :param is_case_sensitive: A boolean denoting whether matching should be
+            case sensitive
+        :return: The compiled ``re.Pattern`` of the target
+    """
+    flags = re.MULTILINE if is_case_sensitive else re.MULTILINE | re.IGNORECASE
+
+    # May throw re.error for malformed user regexes
+    return re.compile(_translate_regexp(target) if is_regex
+        else re.escape(target.replace("\r", "")), flags)
+
+
+def replace_in_texts(replacer, texts, executor=None):
+    """
+    The ``replace_in_texts`` function applies a replacer returned by
+    ``replace_occurrences`` to a number of texts, returning only those that were
+    actually changed so that pages without occurrences need not be edited. If
+    an executor is passed and the texts together exceed ``PARALLEL_THRESHOLD``
+    characters, the texts are divided among the executor's worker processes.
+        :param replacer: A callable taking and returning a single text
+        :param texts: A dictionary mapping page names to their texts
+        :param executor: An optional ``concurrent.futures.Executor``
+        :return: A dictionary mapping the names of changed pages to their new
+            texts
+    """
+    if executor is not None and\
+            sum(map(len, texts.values())) > PARALLEL_THRESHOLD:
+        new_texts = executor.map(replacer, texts.values(),
+            chunksize=max(1, len(texts) // ((os.cpu_count() or 1) * 4)))
+    else:
+        new_texts = map(replacer, texts.values())
+
+    return {
+        page: new_text
+        for (page, text), new_text in zip(texts.items(), new_texts)
+        if new_text != text
+    }
+
+
+def replace_occurrences(regexp, replacement, instances=None):
+    """
+    The ``replace_occurrences`` function is the counterpart of the JavaScript
+    ``main.replaceOccurrences`` method, returning a callable that replaces
+    occurrences of ``regexp`` in a given text with ``replacement``. If one-based
+    ``instances`` are passed, only those occurrences are replaced, counting
+    afresh in each text. As in JavaScript, patterns such as ``$&`` and ``$1`` in
+    the replacement refer to the text matched. The callable may be pickled and
+    thus passed to a ``concurrent.futures.ProcessPoolExecutor``.
+        :param regexp: The compiled ``re.Pattern`` returned by
+            ``build_regexp``
+        :param replacement: A string representing the replacement text
+        :param instances: An optional iterable of the integer indices of the
+            occurrences to be replaced
+        :return: A callable taking and returning a single text
+    """
+    return functools.partial(_replace, regexp, replacement,
+        frozenset(instances or ()))
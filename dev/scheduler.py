@@ -0,0 +1,222 @@
+"""
+The ``scheduler`` module houses the machinery used to pace requests made to the
+MediaWiki Action API so that bulk operations proceed at the highest rate a wiki
+permits rather than aborting on the first ``ratelimited`` or ``maxlag`` error.
+Every request is sent with a ``maxlag`` parameter, edits are drawn from a token
+bucket sized to the user's rate limits, and requests refused by the server are
+retried after the delay it requests or, failing that, a jittered exponential
+backoff, much as ``main.setDynamicTimeout`` lengthens its interval in the
+JavaScript application when ratelimited.
+"""
+
+__all__ = [
+    "Scheduler",
+    "ScheduledSession",
+    "TokenBucket"
+]
+__author__ = "Andrew Eissen"
+__version__ = "0.1"
+
+import email.utils
+import random
+import threading
+import time
+
+import requests
+
+# Error codes indicating that the request may succeed if repeated later
+RETRYABLE_ERRORS = ("maxlag", "ratelimited", "readonly")
+
+# HTTP status codes indicating the same
+RETRYABLE_STATUSES = (429, 502, 503, 504)
+
+# Actions drawn from the edit token bucket
+WRITE_ACTIONS = ("edit", "move", "delete", "protect", "upload")
+
+# Nirvana controller methods likewise drawn from the edit token bucket
+WRITE_METHODS = ("createThread",)
+
+
+class TokenBucket:
+    """
+    The ``TokenBucket`` class implements the token bucket algorithm, permitting
+    bursts of up to ``capacity`` operations and thereafter one operation every
+    ``1 / rate`` seconds. It is safe for use from multiple threads.
+    """
+
+    def __init__(self, rate, capacity=1):
+        """
+        The ``TokenBucket`` constructor creates a full bucket.
+            :param rate: A float denoting the number of tokens added per second
+            :param capacity: An optional integer denoting the maximum number of
+                tokens held at once, i.e. the size of a permitted burst
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        The ``acquire`` method takes a token from the bucket, blocking until one
+        becomes available if the bucket is empty.
+            :return: The number of seconds spent waiting for a token
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity,
+                self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            # Claim the next token now and sleep until it has accrued
+            self._tokens -= 1
+            delay = max(0.0, -self._tokens / self.rate)
+
+        time.sleep(delay)
+        return delay
+
+
+class Scheduler:
+    """
+    The ``Scheduler`` class decides when requests to a wiki may be sent and
+    whether failed requests should be retried. One scheduler is shared by all
+    requests made through a ``ScheduledSession``, so a wiki's rate limits are
+    respected however many functions of ``dev.api`` are in use.
+    """
+
+    def __init__(self, maxlag=5, max_retries=5, base_delay=1.0, max_delay=60.0):
+        """
+        The ``Scheduler`` constructor sets the scheduler's retry policy. Edits
+        are unthrottled until ``set_edit_rate`` is called.
+            :param maxlag: An optional integer denoting the number of seconds of
+                database replication lag beyond which the wiki should refuse
+                requests, or ``None`` to omit the parameter
+            :param max_retries: An optional integer denoting the number of times
+                a refused request is retried before giving up
+            :param base_delay: An optional float denoting the delay in seconds
+                before the first retry, doubled on each subsequent retry
+            :param max_delay: An optional float denoting the longest delay in
+                seconds between retries
+        """
+        self.maxlag = maxlag
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.edit_bucket = None
+
+    def get_retry_delay(self, response, attempt):
+        """
+        The ``get_retry_delay`` method determines whether a response refuses the
+        request on grounds of replication lag, rate limits or server load and,
+        if so, how long to wait before retrying. MediaWiki names the code of an
+        error in the ``MediaWiki-API-Error`` header, sparing the response from
+        being decoded here. A ``Retry-After`` header, in seconds or as an HTTP
+        date, is honoured; otherwise the delay grows exponentially with jitter.
+            :param response: The ``requests.Response`` received
+            :param attempt: An integer denoting the number of retries made so far
+            :return: The delay in seconds before retrying, or ``None`` if the
+                request should not be retried
+        """
+        if attempt >= self.max_retries or (
+                response.status_code not in RETRYABLE_STATUSES and
+                response.headers.get("MediaWiki-API-Error")
+                not in RETRYABLE_ERRORS):
+            return None
+
+        # Randomize the delay so that concurrent clients do not retry in step
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt) *\
+            random.uniform(0.5, 1.0)
+
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is None:
+            return delay
+        elif retry_after.isdigit():
+            return max(delay, float(retry_after))
+
+        try:
+            return max(delay, email.utils.parsedate_to_datetime(
+                retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return delay
+
+    def set_edit_rate(self, hits, seconds):
+        """
+        The ``set_edit_rate`` method throttles edits to at most ``hits`` edits
+        every ``seconds`` seconds, in the format used by MediaWiki's
+        ``$wgRateLimits``. Passing a ``hits`` of ``None`` or zero removes the
+        throttle.
+            :param hits: An integer denoting the number of edits permitted
+            :param seconds: An integer denoting the period over which they are
+                permitted
+            :return: None
+        """
+        self.edit_bucket = TokenBucket(hits / seconds, hits)\
+            if hits and seconds else None
+
+    def wait_for_turn(self, method, payload, params=None):
+        """
+        The ``wait_for_turn`` method blocks until a request may be sent. Only
+        write actions, and the Nirvana methods that write, are subject to the
+        edit token bucket.
+            :param method: The HTTP method of the request
+            :param payload: The request's form data or body, if any
+            :param params: The request's query string parameters, if any
+            :return: None
+        """
+        # Streamed multipart bodies expose their form fields as well
+        fields = getattr(payload, "fields", payload)
+
+        if self.edit_bucket is not None and method.upper() == "POST" and (
+                isinstance(fields, dict) and
+                fields.get("action") in WRITE_ACTIONS or
+                isinstance(params, dict) and
+                params.get("method") in WRITE_METHODS):
+            self.edit_bucket.acquire()
+
+
+class ScheduledSession(requests.Session):
+    """
+    The ``ScheduledSession`` class is a ``requests.Session`` that routes every
+    request through a ``Scheduler``. As the functions of ``dev.api`` accept any
+    session, passing them a ``ScheduledSession`` paces all of their requests
+    without any of them having to be aware of it.
+    """
+
+    def __init__(self, scheduler=None):
+        """
+        The ``ScheduledSession`` constructor attaches the session's scheduler.
+            :param scheduler: An optional ``Scheduler``. If none is passed, a
+                new ``Scheduler`` with default settings is used.
+        """
+        super().__init__()
+        self.scheduler = scheduler or Scheduler()
+
+    def request(self, method, url, params=None, data=None, **kwargs):
+        """
+        The ``request`` method overrides that of ``requests.Session``, adding
+        the ``maxlag`` parameter to the request, waiting for the scheduler to
+        permit it to be sent, and retrying it for as long as the scheduler deems
+        appropriate.
+            :return: The final ``requests.Response`` received
+        """
+        if self.scheduler.maxlag is not None:
+            params = {**(params or {}), "maxlag": self.scheduler.maxlag}
+
+        attempt = 0
+        while True:
+            self.scheduler.wait_for_turn(method, data, params)
+            response = super().request(method, url, params=params, data=data,
+                **kwargs)
+
+            delay = self.scheduler.get_retry_delay(response, attempt)
+            if delay is None:
+                return response
+
+            # Rewind file-like bodies so that they may be sent again
+            if hasattr(data, "seek"):
+                data.seek(0)
+
+            response.close()
+            time.sleep(delay)
+            attempt += 1
@@ -0,0 +1,242 @@
+"""
+The ``trace`` module houses instrumentation for the HTTP requests made by
+``dev.api``. A ``Tracer`` attached to a session records, for every API call,
+the operation performed, its duration, the bytes sent and received, the number
+of retries and any API error code, without any of the functions of ``dev.api``
+having to be aware of it. Recorded calls may be written out as JSON lines or in
+the Chrome trace event format, viewable in ``chrome://tracing`` or Perfetto,
+and summarized by operation to show where the time of a run went.
+"""
+
+__all__ = [
+    "Tracer"
+]
+__author__ = "Andrew Eissen"
+__version__ = "0.1"
+
+import collections
+import json
+import threading
+import time
+import urllib.parse
+
+
+class Tracer:
+    """
+    The ``Tracer`` class records the API calls made through the sessions it is
+    attached to. Each call is recorded once, however many times the session
+    retried it, with the retries and the error codes that prompted them noted.
+    It is safe for use from multiple threads.
+    """
+
+    def __init__(self):
+        """
+        The ``Tracer`` constructor creates a tracer with no recorded calls.
+        """
+        self.events = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin = time.perf_counter()
+
+    @staticmethod
+    def _get_operation(params, data):
+        """
+        The private ``_get_operation`` method names the operation performed by
+        a request after its ``action`` and, for queries, the modules used, i.e.
+        ``edit``, ``query:tokens`` or ``query:revisions``. Requests to Nirvana
+        controllers are named after the controller method, i.e.
+        ``createThread``.
+            :param params: The request's query string parameters, if any
+            :param data: The request's form data or body, if any
+            :return: A string naming the operation
+        """
+        fields = {
+            **(params if isinstance(params, dict) else {}),
+            **(getattr(data, "fields", data) if isinstance(
+                getattr(data, "fields", data), dict) else {})
+        }
+        action = fields.get("action") or fields.get("method", "unknown")
+
+        modules = [fields[key] for key in ("meta", "prop", "list", "generator")
+            if key in fields]
+        return f"{action}:{'+'.join(map(str, modules))}" if modules else action
+
+    def _on_response(self, response, *args, **kwargs):
+        """
+        The private ``_on_response`` method is the ``response`` hook registered
+        with traced sessions. It is invoked once per attempt, before the body of
+        the response is read, and notes the attempt and any error code.
+            :param response: The ``requests.Response`` received
+            :return: None
+        """
+        attempts = getattr(self._local, "attempts", None)
+        if attempts is None:
+            return
+
+        body = response.request.body
+        attempts.append({
+            "bytes_sent": len(response.request.url) + sum(len(name) +
+                len(value) + 4 for name, value in
+                response.request.headers.items()) + (len(body) if body else 0),
+            "bytes_received": int(response.headers.get("Content-Length", 0)),
+            "error": response.headers.get("MediaWiki-API-Error") or
+                (f"http{response.status_code}"
+                    if response.status_code >= 400 else None)
+        })
+
+    def _request(self, request, label, method, url, params=None, data=None,
+            **kwargs):
+        """
+        The private ``_request`` method stands in for the ``request`` method of
+        a traced session, timing the complete call, including any retries and
+        the reading of the response body, and recording it as an event.
+            :param request: The session's original bound ``request`` method
+            :param label: A string identifying the wiki, or ``None``
+            :return: The final ``requests.Response`` received
+        """
+        self._local.attempts = attempts = []
+        start = time.perf_counter()
+        response = None
+
+        try:
+            response = request(method, url, params=params, data=data,
+                **kwargs)
+            return response
+        finally:
+            duration = time.perf_counter() - start
+            self._local.attempts = None
+
+            # Only the last attempt's body has been read in full
+            if response is not None and attempts:
+                attempts[-1]["bytes_received"] = len(response.content)
+
+            self.record({
+                "wiki": label or urllib.parse.urlparse(url).netloc,
+                "operation": self._get_operation(params, data),
+                "method": method.upper(),
+                "start": start - self._origin,
+                "duration": duration,
+                "status": getattr(response, "status_code", None),
+                "retries": max(0, len(attempts) - 1),
+                "error": attempts[-1]["error"] if attempts else "http",
+                "retried_errors": [attempt["error"]
+                    for attempt in attempts[:-1]],
+                "bytes_sent": sum(attempt["bytes_sent"]
+                    for attempt in attempts),
+                "bytes_received": sum(attempt["bytes_received"]
+                    for attempt in attempts),
+                "thread": threading.get_ident()
+            })
+
+    def attach(self, session, label=None):
+        """
+        The ``attach`` method instruments a ``requests.Session`` so that every
+        call made through it is recorded. A ``response`` hook is registered to
+        observe each attempt, and the session's ``request`` method is wrapped
+        to time each call as a whole.
+            :param session: The ``requests.Session`` to instrument
+            :param label: An optional string identifying the wiki in recorded
+                events. If none is passed, the host of each request is used.
+            :return: The session, for convenience
+        """
+        session.hooks["response"].append(self._on_response)
+        request = session.request
+        session.request = lambda *args, **kwargs: self._request(request,
+            label, *args, **kwargs)
+        return session
+
+    def record(self, event):
+        """
+        The ``record`` method adds an event to the tracer's record.
+            :param event: A dictionary describing the event
+            :return: None
+        """
+        with self._lock:
+            self.events.append(event)
+
+    def summarize(self):
+        """
+        The ``summarize`` method totals the recorded calls by operation, most
+        time-consuming first.
+            :return: A list of dictionaries holding the ``operation``, number
+                of ``calls``, ``retries`` and ``errors``, total ``duration`` in
+                seconds and ``bytes_sent`` and ``bytes_received`` of each
+                operation
+        """
+        totals = collections.defaultdict(lambda: {"calls": 0, "retries": 0,
+            "errors": 0, "duration": 0.0, "bytes_sent": 0, "bytes_received": 0})
+
+        with self._lock:
+            for event in self.events:
+                total = totals[event["operation"]]
+                total["calls"] += 1
+                total["retries"] += event["retries"]
+                total["errors"] += event["error"] is not None
+                total["duration"] += event["duration"]
+                total["bytes_sent"] += event["bytes_sent"]
+                total["bytes_received"] += event["bytes_received"]
+
+        return sorted(({"operation": operation, **total}
+            for operation, total in totals.items()),
+            key=lambda total: total["duration"], reverse=True)
+
+    def format_summary(self):
+        """
+        The ``format_summary`` method renders the output of ``summarize`` as a
+        table for display in the console, with each operation's share of the
+        total time spent in API calls.
+            :return: A string representing the table
+        """
+        summary = self.summarize()
+        total_duration = sum(total["duration"] for total in summary) or 1
+
+        rows = [f"{'operation':<24}{'calls':>7}{'retries':>9}{'errors':>8}"
+            f"{'total s':>10}{'mean ms':>10}{'sent KiB':>10}{'recv KiB':>10}"
+            f"{'time':>7}"]
+        for total in summary:
+            rows.append(f"{total['operation']:<24}{total['calls']:>7}"
+                f"{total['retries']:>9}{total['errors']:>8}"
+                f"{total['duration']:>10.3f}"
+                f"{total['duration'] / total['calls'] * 1000:>10.1f}"
+                f"{total['bytes_sent'] / 1024:>10.1f}"
+                f"{total['bytes_received'] / 1024:>10.1f}"
+                f"{total['duration'] / total_duration:>7.0%}")
+
+        return "\n".join(rows)
+
+    def write(self, trace_file):
+        """
+        The ``write`` method writes the recorded events to a file. Files whose
+        names end in ``.json`` receive a Chrome trace, in which each wiki
+        appears as a track of its own; all others receive one JSON object per
+        line.
+            :param trace_file: A string path to the file to be written
+            :return: None
+        """
+        with self._lock:
+            events = list(self.events)
+
+        with open(trace_file, "w") as file:
+            if not trace_file.endswith(".json"):
+                for event in events:
+                    file.write(json.dumps(event) + "\n")
+                return
+
+            tracks = {}
+            json.dump({"traceEvents": [{
+                "name": event["operation"],
+                "cat": event["wiki"],
+                "ph": "X",
+                "ts": round(event["start"] * 1e6),
+                "dur": round(event["duration"] * 1e6),
+                "pid": 1,
+                "tid": tracks.setdefault(event["wiki"], len(tracks) + 1),
+                "args": {key: value for key, value in event.items()
+                    if key not in ("operation", "start", "duration")}
+            } for event in events] + [{
+                "name": "thread_name",
+                "ph": "M",
+                "pid": 1,
+                "tid": tid,
+                "args": {"name": wiki}
+            } for wiki, tid in tracks.items()]}, file)
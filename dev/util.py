@@ -8,20 +8,24 @@ package or program.
 """
 
 __all__ = [
+    "MultipartStream",
     "build_api_php_url",
+    "build_wikia_php_url",
     "determine_system_language",
     "get_file_contents",
     "get_json_file",
     "is_fandom_wiki_url",
+    "lazy_import",
     "log_msg",
     "pretty_print",
     "prompt_for_value",
+    "write_json_file",
     "write_to_file"
 ]
 __author__ = "Andrew Eissen"
 __version__ = "1.0"
 
-import ctypes
+import importlib.util
 import json
 import locale
 import os
@@ -29,6 +33,101 @@ import sys
 import urllib.parse
 
 
+class MultipartStream:
+    """
+    The ``MultipartStream`` class is a read-only, file-like
+    ``multipart/form-data`` request body assembled on the fly from a mixture of
+    string fields and binary file objects. The contents of the files are read
+    from disk in blocks as the body is sent rather than loaded into memory, and
+    are sent verbatim, avoiding the inflation that percent-encoding imposes on
+    ``application/x-www-form-urlencoded`` bodies. As the length of the body is
+    known in advance, it is sent with a ``Content-Length`` rather than chunked.
+    """
+
+    def __init__(self, fields):
+        """
+        The ``MultipartStream`` constructor lays out the parts of the body in
+        the order in which ``fields`` lists them.
+            :param fields: A dictionary mapping field names to either strings or
+                binary file objects opened for reading, whose contents are sent
+                from their current positions onward
+        """
+        self.fields = fields
+        self.boundary = os.urandom(16).hex()
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+
+        # Alternating byte strings and (file, start position) pairs
+        self._layout = []
+        self._length = 0
+        for name, value in fields.items():
+            self._add_bytes(f"--{self.boundary}\r\nContent-Disposition: "
+                f"form-data; name=\"{name}\"\r\n\r\n".encode("UTF-8"))
+            if hasattr(value, "read"):
+                start = value.tell()
+                self._layout.append((value, start))
+                self._length += os.fstat(value.fileno()).st_size - start
+            else:
+                self._add_bytes(str(value).encode("UTF-8"))
+            self._add_bytes(b"\r\n")
+        self._add_bytes(f"--{self.boundary}--\r\n".encode("UTF-8"))
+
+        # Parts remaining to be read, the first of which may be partly read
+        self._parts = list(self._layout)
+        self._index = 0
+
+    def __len__(self):
+        return self._length
+
+    def _add_bytes(self, data):
+        self._layout.append(data)
+        self._length += len(data)
+
+    def read(self, size=-1):
+        """
+        The ``read`` method returns up to ``size`` bytes of the body, or the
+        remainder of the body if ``size`` is negative, advancing through the
+        parts as each is exhausted.
+            :param size: An optional integer denoting the number of bytes to read
+            :return: A byte string, empty once the body has been read in full
+        """
+        chunks = []
+        while self._index < len(self._parts) and size != 0:
+            part = self._parts[self._index]
+            if isinstance(part, tuple):
+                chunk = part[0].read(size)
+            else:
+                chunk, self._parts[self._index] =\
+                    (part, b"") if size < 0 else (part[:size], part[size:])
+
+            if not chunk:
+                self._index += 1
+                continue
+
+            chunks.append(chunk)
+            size -= len(chunk) if size > 0 else 0
+
+        return b"".join(chunks)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        """
+        The ``seek`` method supports rewinding the body to its start so that a
+        request may be retried. No other positions are supported.
+            :param offset: Must be ``0``
+            :param whence: Must be ``os.SEEK_SET``
+            :return: The new position, ``0``
+        """
+        if offset != 0 or whence != os.SEEK_SET:
+            raise OSError("MultipartStream can only be rewound to its start")
+
+        for part in self._layout:
+            if isinstance(part, tuple):
+                part[0].seek(part[1])
+
+        self._parts = list(self._layout)
+        self._index = 0
+        return 0
+
+
 def build_api_php_url(fandom_url):
     """
     The ``build_api_php_url`` helper function is used to construct a well-formed
@@ -45,6 +144,21 @@ def build_api_php_url(fandom_url):
         uri=urllib.parse.urlparse(fandom_url.strip(" ")))
 
 
+def build_wikia_php_url(fandom_url):
+    """
+    The ``build_wikia_php_url`` helper function is the counterpart of
+    ``build_api_php_url`` for a Fandom wiki's ``wikia.php`` resource, through
+    which the Nirvana controllers, such as that of the Message Walls, are
+    reached.
+        :param fandom_url: A link to a page or a resource on a Fandom wiki, i.e.
+            ``https://eizen.fandom.com/api.php``
+        :return: A formatted URI scheme linking to the ``wikia.php`` resource on
+            the specified wiki (i.e., ``https://eizen.fandom.com/wikia.php``
+    """
+    return "{uri.scheme}://{uri.netloc}/wikia.php".format(
+        uri=urllib.parse.urlparse(fandom_url.strip(" ")))
+
+
 def determine_system_language():
     """
     The (admittedly janky) ``determine_system_language`` function is used to
@@ -57,6 +171,8 @@ def determine_system_language():
             detected system language ("en" for "en_US" and "en_UK", etc.)
     """
     if os.name == "nt":
+        # Imported here alone, as only Windows has need of it
+        import ctypes
         windll = ctypes.windll.kernel32.GetUserDefaultUILanguage()
         return locale.windows_locale[windll].split("_")[0]
     elif os.name == "posix":
@@ -137,6 +253,34 @@ def is_fandom_wiki_url(url):
     return domain in ["fandom.com", "wikia.org"]
 
 
+def lazy_import(name):
+    """
+    The ``lazy_import`` function imports a module whose code is only run once
+    one of its attributes is first accessed, so that modules needed by some
+    actions alone, ``requests`` above all, add nothing to the startup time of
+    the others. Modules already imported are returned as they are.
+        :param name: A string representing the absolute name of the module
+        :return: The module, loaded on first use
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    # May throw ModuleNotFoundError
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+
+    # Bind submodules to their packages as the import statement would
+    parent, _, child = name.rpartition(".")
+    if parent:
+        setattr(sys.modules[parent], child, module)
+
+    return module
+
+
 def log_msg(message_text, text_io=sys.stdout):
     """
     The ``log_msg`` function is simply used to log a message in the console
@@ -186,6 +330,24 @@ def prompt_for_value(message_text):
     return sys.stdin.readline().rstrip()
 
 
+def write_json_file(json_data, filename):
+    """
+    The ``write_json_file`` function is the counterpart of ``get_json_file``,
+    serializing ``json_data`` to the file indicated by ``filename``. The data is
+    first written to a temporary file alongside the target, which then replaces
+    the target in a single step, so an interrupted write never leaves a
+    truncated file behind. Any missing parent directories are created.
+        :param json_data: A JSON-serializable object to be written
+        :param filename: A string indicating the location and name of the
+            desired JSON file
+        :return: None
+    """
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    with open(f"{filename}.tmp", "w") as jf:
+        json.dump(json_data, jf, indent=2, sort_keys=False)
+    os.replace(f"{filename}.tmp", filename)
+
+
 def write_to_file(file_contents, file_path):
     """
     The ``write_to_file`` function is a simple helper function used to write the
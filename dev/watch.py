@@ -0,0 +1,230 @@
+"""
+The ``watch`` module houses the means by which local files are watched for
+changes. On Linux, the kernel's ``inotify`` interface is used by way of
+``ctypes``, so that a change is noticed the moment a file is saved without any
+of the files being read or even stat'd in the meantime; elsewhere, the files'
+modification times and sizes are polled at a short interval. Bursts of changes,
+as made by editors that save a file in several steps, are debounced into one.
+"""
+
+__all__ = [
+    "InotifyWatcher",
+    "PollingWatcher",
+    "build_watcher",
+    "watch"
+]
+__author__ = "Andrew Eissen"
+__version__ = "0.1"
+
+import os
+import select
+import struct
+import time
+
+import dev.util as util
+
+# Loaded on first use, as only the inotify watcher has need of them
+ctypes = util.lazy_import("ctypes")
+util.lazy_import("ctypes.util")
+
+# Seconds without further changes after which a burst of changes is complete
+DEBOUNCE = 0.2
+
+# Seconds between successive checks of the files when polling
+POLL_INTERVAL = 0.5
+
+# inotify events signalling that a file has been written, replaced or created
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+# Layout of the fixed part of a struct inotify_event: wd, mask, cookie, len
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """
+    The ``InotifyWatcher`` class watches files by means of Linux's ``inotify``.
+    The directories containing the files are watched rather than the files
+    themselves, as many editors save by writing a new file and renaming it over
+    the old one, which would end a watch placed on the old file.
+    """
+
+    def __init__(self, paths):
+        """
+        The ``InotifyWatcher`` constructor creates an ``inotify`` instance and
+        adds a watch for the directory of each file.
+            :param paths: An iterable of string paths to the files to watch
+        """
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6",
+            use_errno=True)
+
+        # May throw AttributeError on systems without inotify
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        # Map absolute paths back onto the paths as passed by the caller
+        self._paths = {os.path.abspath(path): path for path in paths}
+        self._directories = {}
+
+        for directory in {os.path.dirname(path) for path in self._paths}:
+            descriptor = libc.inotify_add_watch(self._fd,
+                os.fsencode(directory), WATCH_MASK)
+            if descriptor < 0:
+                self.close()
+                raise OSError(ctypes.get_errno(), "inotify_add_watch failed",
+                    directory)
+            self._directories[descriptor] = directory
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        The ``close`` method releases the ``inotify`` instance, removing all of
+        its watches.
+            :return: None
+        """
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def wait(self, timeout=None):
+        """
+        The ``wait`` method blocks until one or more watched files change or
+        the timeout elapses.
+            :param timeout: An optional float denoting the maximum number of
+                seconds to wait, or ``None`` to wait indefinitely
+            :return: A set of the paths of the files that changed, empty if the
+                timeout elapsed first
+        """
+        changed = set()
+
+        while not changed:
+            if not select.select([self._fd], [], [], timeout)[0]:
+                break
+
+            buffer = os.read(self._fd, 64 * 1024)
+            offset = 0
+            while offset < len(buffer):
+                descriptor, _, _, length = EVENT_HEADER.unpack_from(buffer,
+                    offset)
+                name = buffer[offset + EVENT_HEADER.size:
+                    offset + EVENT_HEADER.size + length].rstrip(b"\0")
+                offset += EVENT_HEADER.size + length
+
+                path = os.path.join(self._directories.get(descriptor, ""),
+                    os.fsdecode(name))
+                if path in self._paths:
+                    changed.add(self._paths[path])
+
+        return changed
+
+
+class PollingWatcher:
+    """
+    The ``PollingWatcher`` class watches files by comparing their modification
+    times and sizes at a regular interval. It serves wherever ``inotify`` is
+    unavailable.
+    """
+
+    def __init__(self, paths, interval=POLL_INTERVAL):
+        """
+        The ``PollingWatcher`` constructor notes the present state of each
+        file.
+            :param paths: An iterable of string paths to the files to watch
+            :param interval: An optional float denoting the number of seconds
+                between checks
+        """
+        self.interval = interval
+        self._states = {path: self._get_state(path) for path in paths}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @staticmethod
+    def _get_state(path):
+        try:
+            stat = os.stat(path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def close(self):
+        pass
+
+    def wait(self, timeout=None):
+        """
+        The ``wait`` method blocks until one or more watched files change or
+        the timeout elapses.
+            :param timeout: An optional float denoting the maximum number of
+                seconds to wait, or ``None`` to wait indefinitely
+            :return: A set of the paths of the files that changed, empty if the
+                timeout elapsed first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            changed = set()
+            for path, state in self._states.items():
+                new_state = self._get_state(path)
+                if new_state != state:
+                    self._states[path] = new_state
+                    changed.add(path)
+
+            if changed:
+                return changed
+            elif deadline is not None and time.monotonic() >= deadline:
+                return changed
+
+            time.sleep(self.interval if deadline is None else
+                max(0.0, min(self.interval, deadline - time.monotonic())))
+
+
+def build_watcher(paths):
+    """
+    The ``build_watcher`` function creates the most efficient watcher available
+    on the system, an ``InotifyWatcher`` if possible and a ``PollingWatcher``
+    otherwise.
+        :param paths: An iterable of string paths to the files to watch
+        :return: A watcher providing ``wait`` and ``close`` methods
+    """
+    paths = list(paths)
+    try:
+        return InotifyWatcher(paths)
+    except (AttributeError, OSError):
+        return PollingWatcher(paths)
+
+
+def watch(paths, callback, debounce=DEBOUNCE, watcher=None):
+    """
+    The ``watch`` function invokes a callback whenever watched files change,
+    until interrupted. Changes arriving within ``debounce`` seconds of one
+    another are gathered into a single invocation, so that an editor saving a
+    file in several steps, or several files being saved at once, results in
+    just one.
+        :param paths: An iterable of string paths to the files to watch
+        :param callback: A callable taking a set of the paths that changed
+        :param debounce: An optional float denoting the number of seconds to
+            wait for further changes before invoking the callback
+        :param watcher: An optional watcher. If none is passed, one is created
+            by ``build_watcher``.
+        :return: None
+    """
+    with watcher or build_watcher(paths) as active_watcher:
+        while True:
+            changed = active_watcher.wait()
+
+            # Gather further changes until the files have settled
+            while more := active_watcher.wait(debounce):
+                changed |= more
+
+            callback(changed)